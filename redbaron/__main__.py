@@ -0,0 +1,53 @@
+"""
+Command line of redbaron.
+
+    python -m redbaron grep IDENTIFIER [VALUE] PATH...
+"""
+
+import argparse
+import os
+import sys
+
+
+def _glob(value):
+    "VALUE of grep, a glob when it has wildcards and no prefix"
+    if not value.startswith(("g:", "re:")) and any(wildcard in value for wildcard in "*?["):
+        return "g:" + value
+    return value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m redbaron")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    grep_parser = commands.add_parser(
+        "grep",
+        help="find nodes in python files",
+        description=(
+            "Print path:line:column: code for each node of the files matching find_all(IDENTIFIER, VALUE). "
+            "VALUE is compared to the name or the value of the nodes, as a glob if it has wildcards, "
+            "'re:' and 'g:' prefixes work like in find_all(). Directories are searched for python files."
+        ),
+    )
+    grep_parser.add_argument("identifier")
+    grep_parser.add_argument("arguments", nargs="+", metavar="[VALUE] PATH")
+    grep_parser.add_argument("-j", "--jobs", type=int, help="number of worker processes")
+
+    options = parser.parse_args(argv)
+    if options.command == "grep":
+        from .grep import grep
+
+        arguments = options.arguments
+        # A single argument is the path
+        args = (_glob(arguments[0]),) if len(arguments) > 1 else ()
+        try:
+            return grep(options.identifier, args, arguments[len(args) :], jobs=options.jobs)
+        except BrokenPipeError:
+            # The output was closed, e.g. piped to head, silence the flush at exit
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+Helpers to parse, transform and dump trees from asyncio code.
+
+Parsing, dumps() and reading or writing the files are run in an executor,
+the default executor of the loop unless one is given, so that the event
+loop never blocks on them. Trees are safe to use from another thread, see
+redbaron.batch, as long as a tree is only used by one of them at a time.
+
+>>> async for path, changed in rewrite_files(transform, paths, concurrency=16):
+...     print(path, "changed" if changed else "unchanged")
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from collections import deque
+from collections.abc import AsyncIterable, AsyncIterator, Callable, Iterable
+from concurrent.futures import Executor
+
+from .base_nodes import Node
+from .batch import Source, load
+from .redbaron import RedBaron
+
+
+async def parse(source: Source, executor: Executor | None = None) -> RedBaron:
+    "Tree of a source, see redbaron.batch.load(), parsed in the executor"
+    return await asyncio.get_running_loop().run_in_executor(executor, load, source)
+
+
+async def dumps(node: Node, executor: Executor | None = None) -> str:
+    "Code of a node, rendered in the executor"
+    return await asyncio.get_running_loop().run_in_executor(executor, node.dumps)
+
+
+async def _iterate(items):
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+async def _map_in_executor(process, items, concurrency, executor):
+    "Results of process(item), computed for at most concurrency items at a time"
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+
+    loop = asyncio.get_running_loop()
+    pending = deque()
+    try:
+        async for item in _iterate(items):
+            if len(pending) >= concurrency:
+                yield await pending.popleft()
+            pending.append(loop.run_in_executor(executor, process, item))
+        while pending:
+            yield await pending.popleft()
+    finally:
+        # The iteration was stopped early, don't start the remaining items
+        for future in pending:
+            future.cancel()
+
+
+async def map_trees[T](
+    function: Callable[[RedBaron], T],
+    sources: Iterable[Source] | AsyncIterable[Source],
+    *,
+    concurrency: int = 8,
+    executor: Executor | None = None,
+) -> AsyncIterator[T]:
+    """
+    Async iterator of function called on the tree of each source, in the
+    order of the sources.
+
+    Parsing a source and calling function on its tree are done in the
+    executor, for at most concurrency sources at a time: the next source is
+    only taken once the result of the oldest one has been consumed.
+    """
+
+    def process(source):
+        return function(load(source))
+
+    async for result in _map_in_executor(process, sources, concurrency, executor):
+        yield result
+
+
+async def rewrite_files(
+    function: Callable[[RedBaron], object],
+    paths: Iterable[str | os.PathLike] | AsyncIterable[str | os.PathLike],
+    *,
+    concurrency: int = 8,
+    executor: Executor | None = None,
+) -> AsyncIterator[tuple[str | os.PathLike, bool]]:
+    """
+    Call function to modify the tree of each file, and write the files whose
+    code changed back, keeping their encoding and new lines.
+
+    Async iterator of (path, changed), in the order of the paths, see
+    map_trees().
+    """
+
+    def rewrite(path):
+        red = RedBaron.from_path(path)
+        source = red.to_bytes()
+        function(red)
+        code = red.to_bytes()
+        if code == source:
+            return path, False
+        with open(path, "wb") as f:
+            f.write(code)
+        return path, True
+
+    async for result in _map_in_executor(rewrite, paths, concurrency, executor):
+        yield result
@@ -1,4 +1,4 @@
-import inspect
+import itertools
 import re
 from collections import UserList
 from fnmatch import fnmatch
@@ -8,8 +8,9 @@ import baron
 import baron.path
 from baron.render import nodes_rendering_order
 
+from .journal import journaled
 from .node_path import Path
-from .node_property import AliasProperty, NodeListProperty, NodeProperty, set_name_for_node_properties
+from .node_property import AliasProperty, ConditionalFormattingProperty, NodeListProperty, NodeProperty
 from .syntax_highlight import help_highlight, python_highlight
 from .utils import (
     baron_type_from_class,
@@ -18,7 +19,7 @@ from .utils import (
     in_ipython,
     indent_str,
     squash_successive_duplicates,
-    truncate,
+    truncate_chunks,
 )
 
 INDENT_UNIT = 4 * " "
@@ -54,18 +55,28 @@ class NeighborsMixin:
 
         return self.parent
 
-    def _next_neighbors(self, neighbors):
-        neighbors = dropwhile(lambda x: x is not self, neighbors)
-        next(neighbors, None)
-        return neighbors
+    def _iter_siblings(self, step, nodelist=False):
+        if not isinstance(self.parent, NodeList):
+            return iter(())
+
+        siblings = self.parent.node_list if nodelist else self.parent
+        index = self.parent.position_of(self, nodelist=nodelist)
+        if index is None:
+            if self not in siblings:
+                raise ValueError("Invalid node")
+            # e.g. separator of a proxy list
+            return iter(())
+
+        indexes = range(index + 1, len(siblings)) if step > 0 else range(index - 1, -1, -1)
+        return (siblings[i] for i in indexes)
 
     @property
     def next_neighbors(self):
-        return self._next_neighbors(self.neighbors)
+        return self._iter_siblings(1)
 
     @property
     def previous_neighbors(self):
-        return self._next_neighbors(reversed(self.neighbors))
+        return self._iter_siblings(-1)
 
     @property
     def next(self):
@@ -101,11 +112,11 @@ class NeighborsMixin:
 
     @property
     def next_neighbors_nodelist(self):
-        return self._next_neighbors(self.neighbors_nodelist)
+        return self._iter_siblings(1, nodelist=True)
 
     @property
     def previous_neighbors_nodelist(self):
-        return self._next_neighbors(reversed(self.neighbors_nodelist))
+        return self._iter_siblings(-1, nodelist=True)
 
     @property
     def next_nodelist(self):
@@ -125,11 +136,22 @@ class BaseNode(NeighborsMixin):
     indent_unit = INDENT_UNIT
     _leftover_indentation = ""
     hidden = False
+    # Overridden by the nodes opening a scope, see ScopeMixin
+    _scope_covers = None
+    # True for the nodes of watched trees, see journal.py
+    _watched = False
 
     def __init__(self, parent, on_attribute):
         self.parent = parent
         self.on_attribute = on_attribute
 
+    def __getstate__(self):
+        "Pickle and copy the node without the attributes holding their default"
+        state = self.__dict__.copy()
+        if state.get("indent") == "":
+            del state["indent"]
+        return state
+
     @property
     def relative_box(self):
         box = baron.path.node_to_bounding_box(self.fst())
@@ -152,6 +174,43 @@ class BaseNode(NeighborsMixin):
 
         return box
 
+    def _code_before_on_line(self):
+        """
+        Code before the node on the line it starts on, None if it can't be
+        found without rendering the whole tree.
+
+        Only what is rendered between the node and the previous new line is
+        rendered, going up the parent chain, instead of the whole tree like
+        box does.
+        """
+        chunks = []
+        node = self
+        while node.parent is not None:
+            parent = node.parent
+            if isinstance(parent, NodeList):
+                owner = parent.parent
+                if owner is not None and type(owner)._iter_dumps_attribute is not Node._iter_dumps_attribute:
+                    # e.g. decorators are rendered with the indentation of the function
+                    code = "".join(parent._iter_dumps())
+                    if not "".join(owner._iter_dumps_attribute(parent.on_attribute, parent)).startswith(code):
+                        return None
+
+                index = parent.position_of(node, nodelist=True)
+                previous = (parent.node_list[i] for i in range(index - 1, -1, -1))
+                pieces = ("".join(n._iter_dumps()) for n in previous if not n.hidden)
+            else:
+                pieces = reversed(list(parent._iter_dumps(stop=node)))
+
+            for code in pieces:
+                line_start = code.rfind("\n")
+                if line_start != -1:
+                    chunks.append(code[line_start + 1 :])
+                    return "".join(reversed(chunks))
+                chunks.append(code)
+            node = parent
+
+        return "".join(reversed(chunks))
+
     def find_by_position(self, position):
         path = baron.path.position_to_path(self.fst(), position) or []
         return self.find_by_path(path)
@@ -204,14 +263,21 @@ class BaseNode(NeighborsMixin):
     def dumps(self):
         return baron.dumps(self.fst())
 
+    def _iter_dumps(self):
+        raise NotImplementedError()
+
     def find_all(self, identifier, *args, **kwargs):
         return list(self.find_iter(identifier, *args, **kwargs))
 
     def find_iter(self, identifier, *args, recursive=True, **kwargs):
+        return self._search(identifier, args, kwargs, recursive, use_index=True)
+
+    def _search(self, identifier, args, kwargs, recursive, use_index):
         raise NotImplementedError()
 
-    def find(self, identifier, *args, **kwargs):
-        return next(self.find_iter(identifier, *args, **kwargs), None)
+    def find(self, identifier, *args, recursive=True, **kwargs):
+        # The first match is usually found before the tree could be indexed, see prefilter.py
+        return next(self._search(identifier, args, kwargs, recursive, use_index=False), None)
 
     def replace(self, new_node):
         if not self.parent:
@@ -267,6 +333,8 @@ class BaseNode(NeighborsMixin):
 
 
 class IndentationMixin:
+    indent = ""
+
     def __init__(self, indent):
         self.indent = indent
 
@@ -286,6 +354,30 @@ class NodeList(UserList, BaseNode, IndentationMixin):
         BaseNode.__init__(self, parent=parent, on_attribute=on_attribute)
         IndentationMixin.__init__(self, getattr(node_list, "indentation", ""))
 
+    def position_of(self, node, nodelist=False):
+        """
+        Index of node in the list, or in node_list, None if it is not there.
+
+        Positions are cached so that going from a node to its siblings does
+        not scan the list each time, the cache is built again whenever it
+        does not match the list anymore. It is replaced instead of updated
+        in place so that threads reading the same tree don't see it half
+        built.
+        """
+        siblings = self.node_list if nodelist else self
+        # Positions of the elements and of the nodes of node_list, only
+        # created when needed, not to be pickled along with every list
+        caches = self.__dict__.get("_positions")
+        if caches is None:
+            caches = self.__dict__["_positions"] = [{}, {}]
+        positions = caches[nodelist]
+        index = positions.get(id(node))
+        if index is None or index >= len(siblings) or siblings[index] is not node:
+            positions = {id(sibling): i for i, sibling in enumerate(siblings)}
+            caches[nodelist] = positions
+            index = positions.get(id(node))
+        return index
+
     @classmethod
     def generic_from_fst(cls, fst_list, parent=None, on_attribute=None):
         assert parent is None or isinstance(parent, BaseNode)
@@ -299,6 +391,7 @@ class NodeList(UserList, BaseNode, IndentationMixin):
     def from_str(self, value: str, on_attribute=None):
         return self.generic_from_str(value, parent=self, on_attribute=on_attribute)
 
+    @journaled
     def __setitem__(self, key, value):
         if isinstance(value, str):
             value = Node.generic_from_str(value)
@@ -309,16 +402,32 @@ class NodeList(UserList, BaseNode, IndentationMixin):
         value.on_attribute = None
         self.data[key] = value
 
-    def _find_iter(self, identifier, *args, recursive=True, **kwargs):
+    def _find_iter(self, identifier, *args, recursive=True, subtree_filter=None, **kwargs):
+        if subtree_filter is not None and not subtree_filter(self):
+            return
+
         for node in self.data:
-            yield from node._find_iter(identifier, *args, recursive=recursive, **kwargs)
+            yield from node._find_iter(identifier, *args, recursive=recursive, subtree_filter=subtree_filter, **kwargs)
 
-    def find_iter(self, identifier, *args, recursive=True, **kwargs):
-        return self._find_iter(identifier, *args, recursive=recursive, **kwargs)
+    def _search(self, identifier, args, kwargs, recursive, use_index):
+        from .prefilter import subtree_filter
+
+        return self._find_iter(
+            identifier,
+            *args,
+            recursive=recursive,
+            subtree_filter=subtree_filter(self, identifier, args, kwargs) if use_index else None,
+            **kwargs,
+        )
 
     def fst(self):
         return [x.fst() for x in self.node_list if not x.hidden]
 
+    def _iter_dumps(self):
+        for node in self.node_list:
+            if not node.hidden:
+                yield from node._iter_dumps()
+
     def __repr__(self):
         if in_a_shell():
             return self.__str__()
@@ -326,7 +435,7 @@ class NodeList(UserList, BaseNode, IndentationMixin):
         return '<{} {}, "{}" {}, on {} {}>'.format(
             self.__class__.__name__,
             self.path().to_baron_path(),
-            truncate(self.dumps().replace("\n", "\\n"), 20),
+            truncate_chunks((x.replace("\n", "\\n") for x in self._iter_dumps()), 20),
             id(self),
             self.parent.__class__.__name__,
             id(self.parent),
@@ -377,16 +486,19 @@ class NodeList(UserList, BaseNode, IndentationMixin):
     def node_list(self):
         return self
 
+    @journaled
     def insert(self, i, item):
         item.parent = self
         item.on_attribute = None
         super().insert(i, item)
 
+    @journaled
     def append(self, item):
         item.parent = self
         item.on_attribute = None
         super().append(item)
 
+    @journaled
     def extend(self, other):
         for node in other:
             node.parent = self
@@ -407,10 +519,33 @@ class NodeList(UserList, BaseNode, IndentationMixin):
         for el in self:
             el.decrease_indentation(indent)
 
+    @journaled
     def extend_node_list(self, new_node_list):
         self.set_parent_and_on_attribute(new_node_list)
         self.data += new_node_list
 
+    pop = journaled(UserList.pop)
+    remove = journaled(UserList.remove)
+    clear = journaled(UserList.clear)
+    sort = journaled(UserList.sort)
+    reverse = journaled(UserList.reverse)
+    __delitem__ = journaled(UserList.__delitem__)
+    __iadd__ = journaled(UserList.__iadd__)
+
+    # Lists saved by _save_state()
+    _state_attributes = ("data",)
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state.pop("_positions", None)
+        return state
+
+    def _save_state(self):
+        return (list(self.data),)
+
+    def _restore_state(self, state):
+        (self.__dict__["data"],) = state
+
     @property
     def indentation(self):
         if self.on_attribute:
@@ -448,6 +583,7 @@ class NodeList(UserList, BaseNode, IndentationMixin):
 
         return r
 
+    @journaled
     def consume_leftover_indentation(self):
         from .nodes import SpaceNode
 
@@ -480,7 +616,6 @@ class NodeRegistration(type):
             NodeRegistration.register_type(cls)
             if cls.baron_type in NODES_RENDERING_ORDER:
                 cls.define_attributes_from_baron(cls.baron_type)  # pylint: disable=no-value-for-parameter
-        set_name_for_node_properties(cls)  # pylint: disable=no-value-for-parameter
 
     def define_attributes_from_baron(cls, baron_type):
         cls._raw_keys = ["type"]
@@ -493,7 +628,7 @@ class NodeRegistration(type):
             if key in RESERVED_KEYWORDS:
                 key += "_"
                 if not hasattr(cls, orig_key):
-                    setattr(cls, orig_key, AliasProperty(key))
+                    cls.add_property(orig_key, AliasProperty(key))
 
             if kind == "constant":
                 if orig_key not in cls._raw_keys:
@@ -502,15 +637,20 @@ class NodeRegistration(type):
                 cls._raw_keys.append(orig_key)
             elif kind == "key":
                 if not hasattr(cls, key):
-                    setattr(cls, key, NodeProperty())
+                    cls.add_property(key, NodeProperty())
                 cls._dict_keys.append(orig_key)
             elif kind in ("list", "formatting"):
                 if not hasattr(cls, key):
-                    setattr(cls, key, NodeListProperty(NodeList))
+                    cls.add_property(key, NodeListProperty(NodeList))
                 cls._list_keys.append(orig_key)
             else:
                 raise Exception(f"Invalid kind {kind} for {baron_type}.{key}")
 
+    def add_property(cls, name, node_property):
+        # Properties in the class body are named by __set_name__()
+        node_property.__set_name__(cls, name)
+        setattr(cls, name, node_property)
+
     @classmethod
     def register_type(mcs, node_class):
         mcs.node_type_mapping[node_class.baron_type] = node_class
@@ -527,6 +667,25 @@ class NodeRegistration(type):
         return mcs.node_type_mapping
 
 
+# Node class -> (default caches, attributes of its plain node lists)
+_pickled_attributes = {}
+
+
+def _pickled_attributes_of(cls):
+    "Attributes of the nodes of cls left out of pickles, see Node.__getstate__()"
+    attributes = _pickled_attributes.get(cls)
+    if attributes is None:
+        caches, lists = [], []
+        for kind, key, _ in cls._baron_attributes():
+            node_property = getattr(cls, key, None) if kind in ("list", "formatting") else None
+            if isinstance(node_property, ConditionalFormattingProperty):
+                caches.append(node_property.attr_name + "_default")
+            if isinstance(node_property, NodeListProperty) and node_property.list_type is NodeList:
+                lists.append(node_property.attr_name)
+        attributes = _pickled_attributes.setdefault(cls, (caches, lists))
+    return attributes
+
+
 class Node(BaseNode, IndentationMixin, metaclass=NodeRegistration):
     _other_identifiers = []
     _default_test_value = "value"
@@ -546,6 +705,22 @@ class Node(BaseNode, IndentationMixin, metaclass=NodeRegistration):
         IndentationMixin.__init__(self, getattr(fst, "indentation", ""))
         self.set_attributes_from_fst(fst)
 
+    def __getstate__(self):
+        """
+        Pickle and copy the node without its default formatting and its
+        empty formatting lists, most of them are, both built again when
+        read, see NodeListProperty
+        """
+        state = super().__getstate__()
+        caches, lists = _pickled_attributes_of(type(self))
+        for name in caches:
+            state.pop(name, None)
+        for name in lists:
+            value = state.get(name)
+            if value is not None and not value.data:
+                del state[name]
+        return state
+
     def set_attributes_from_fst(self, fst):
         assert self.type == fst["type"]
 
@@ -613,30 +788,52 @@ class Node(BaseNode, IndentationMixin, metaclass=NodeRegistration):
 
         return previous_
 
+    def rendering_cursor(self):
+        "RenderingCursor on this node, in the rendering order of its root"
+        from .cursor import RenderingCursor, rendering_root
+
+        return RenderingCursor(rendering_root(self)).seek(self)
+
     @property
     def next_rendered(self):
-        previous = None
-        target = self.parent
-        while target is not None:
-            for i in reversed(list(target._generate_nodes_in_rendering_order())):
-                if i is self and previous is not None:
-                    return previous
-                previous = i
-
-            previous = None
-            target = target.parent
+        from .cursor import RenderingCursor, rendering_root
+
+        if self.parent is None:
+            return None
+
+        try:
+            cursor = RenderingCursor(self.parent).seek(self, last=True)
+        except ValueError:
+            return None
+
+        next_node = cursor.advance()
+        if next_node is not None:
+            return next_node
+
+        # Last in the code of the parent, use the previous place self is rendered at
+        cursor.seek(self, last=True)
+        while (previous := cursor.retreat()) is not None:
+            if previous is self:
+                return cursor.advance()
+
+        root = rendering_root(self)
+        if root is self.parent:
+            return None
+        return RenderingCursor(root).seek(self, last=True).advance()
 
     @property
     def previous_rendered(self):
-        previous = None
-        target = self.parent
-        while target is not None:
-            for i in target._generate_nodes_in_rendering_order():
-                if i is self:
-                    return previous
-                previous = i
+        from .cursor import RenderingCursor
 
-            target = target.parent
+        if self.parent is None:
+            return None
+
+        # Only look in the code of the parent
+        try:
+            cursor = RenderingCursor(self.parent).seek(self)
+        except ValueError:
+            return None
+        return cursor.retreat()
 
     def _next_recursive(self, getter):
         target = self
@@ -654,7 +851,11 @@ class Node(BaseNode, IndentationMixin, metaclass=NodeRegistration):
     def previous_recursive(self):
         return self._next_recursive(lambda node: node.previous)
 
-    def _find_iter(self, identifier, *args, recursive=True, include_sub=True, **kwargs):
+    def _find_iter(self, identifier, *args, recursive=True, include_sub=True, subtree_filter=None, **kwargs):
+        # Skips the subtrees where nothing can match, see prefilter.py
+        if subtree_filter is not None and not subtree_filter(self):
+            return
+
         if self._node_match_query(self, identifier, *args, **kwargs):
             yield self
 
@@ -664,11 +865,27 @@ class Node(BaseNode, IndentationMixin, metaclass=NodeRegistration):
                     node = getattr(self, key)
                     if node:
                         yield from node._find_iter(
-                            identifier, *args, **kwargs, recursive=recursive, include_sub=recursive
+                            identifier,
+                            *args,
+                            **kwargs,
+                            recursive=recursive,
+                            include_sub=recursive,
+                            subtree_filter=subtree_filter,
                         )
 
-    def find_iter(self, identifier, *args, recursive=True, **kwargs):
-        return dropwhile(lambda node: node is self, self._find_iter(identifier, *args, recursive=recursive, **kwargs))
+    def _search(self, identifier, args, kwargs, recursive, use_index):
+        from .prefilter import subtree_filter
+
+        return dropwhile(
+            lambda node: node is self,
+            self._find_iter(
+                identifier,
+                *args,
+                recursive=recursive,
+                subtree_filter=subtree_filter(self, identifier, args, kwargs) if use_index else None,
+                **kwargs,
+            ),
+        )
 
     def parent_find(self, identifier, *args, **kwargs):
         current = self
@@ -705,7 +922,8 @@ class Node(BaseNode, IndentationMixin, metaclass=NodeRegistration):
 
         return True
 
-    def _attribute_match_query(self, attribute_names, query):
+    @staticmethod
+    def _attribute_match_query(attribute_names, query):
         """
         Take a list/tuple of attributes that can match and a query, return True
         if any of the attributes match the query.
@@ -758,6 +976,8 @@ class Node(BaseNode, IndentationMixin, metaclass=NodeRegistration):
             "find_by_path",
             "find_by_position",
             "find_iter",
+            "find_name_binding",
+            "find_name_uses",
             "fst",
             "generate_identifiers",
             "box_of_attribute",
@@ -769,7 +989,9 @@ class Node(BaseNode, IndentationMixin, metaclass=NodeRegistration):
             "insert_before",
             "parent_find",
             "path",
+            "rendering_cursor",
             "replace",
+            "to_ast",
             "to_python",
             "consume_leftover_indentation",
             "set_attributes_from_fst",
@@ -799,6 +1021,8 @@ class Node(BaseNode, IndentationMixin, metaclass=NodeRegistration):
             "put_on_same_line",
             "is_sep",
         }
+        import inspect
+
         for attr_name in dir(self):
             if attr_name.startswith("_"):  # private method
                 continue
@@ -903,10 +1127,11 @@ class Node(BaseNode, IndentationMixin, metaclass=NodeRegistration):
         if in_a_shell():
             return self.__str__()
 
+        chunks = itertools.chain([self.indentation], self._iter_dumps())
         return '<{} path={}, "{}" {}, on {} {}>'.format(
             self.__class__.__name__,
             self.path().to_baron_path(),
-            truncate(self.dumps().replace("\n", "\\n"), 20),
+            truncate_chunks((x.replace("\n", "\\n") for x in chunks), 20),
             id(self),
             self.parent.__class__.__name__,
             id(self.parent),
@@ -988,6 +1213,71 @@ class Node(BaseNode, IndentationMixin, metaclass=NodeRegistration):
     def dumps(self):
         return self.indentation + super().dumps()
 
+    def to_ast(self):
+        """
+        Convert the node to the nodes of the ast module, with the positions
+        of its code in the whole tree, without parsing the code again.
+
+        The result can be given to compile() if the node is a statement or
+        the root of the tree.
+        """
+        from .to_ast import node_to_ast
+
+        return node_to_ast(self)
+
+    def _iter_dumps(self, stop=None):
+        """
+        Lazily render the node, without its indentation, piece by piece.
+
+        Joining the pieces gives baron.dumps(self.fst()), but callers that
+        only need the beginning of the code (e.g. __repr__) can stop early
+        instead of rendering the whole subtree. Given stop, a child of the
+        node, the rendering stops at the attribute holding it.
+        """
+        attributes = self._baron_attributes() if stop is None else self._attributes_before(stop)
+        for kind, key, dependent in attributes:
+            if not self._is_rendered(dependent):
+                continue
+
+            if kind == "constant":
+                yield key
+            elif kind == "string":
+                yield getattr(self, key)
+            elif kind == "key":
+                node = getattr(self, key)
+                if node:
+                    yield from self._iter_dumps_attribute(key, node)
+            elif kind in ("list", "formatting"):
+                yield from self._iter_dumps_attribute(key, getattr(self, key))
+
+    def _iter_dumps_attribute(self, key, value):
+        yield from value._iter_dumps()
+
+    def _attributes_before(self, child):
+        "The _baron_attributes() rendered before the one holding child"
+        attributes = self._baron_attributes()
+        for i, (kind, key, _) in enumerate(attributes):
+            if kind in ("key", "list", "formatting") and getattr(self, key) is child:
+                return attributes[:i]
+        raise ValueError(f"{child!r} is not an attribute of {self!r}")
+
+    def _is_rendered(self, dependent):
+        # Mirror baron.render.render_node() conditions
+        if isinstance(dependent, bool):
+            return dependent
+
+        if isinstance(dependent, str):
+            dependent = [dependent]
+
+        for key in dependent:
+            value = getattr(self, key)
+            if isinstance(value, NodeList):
+                value = any(not x.hidden for x in value.node_list)
+            if not value:
+                return False
+
+        return True
+
     @property
     def indentation(self):
         return self.indent
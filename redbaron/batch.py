@@ -0,0 +1,57 @@
+"""
+Parsing and processing many trees in threads.
+
+Separate trees can be used from separate threads at the same time. What
+is shared between trees is either built once when redbaron is imported,
+like the node classes and their rendering order, or caches of fsts that
+are never modified, filled by whichever thread needs them first, or the
+watched subclasses of the node classes, created the same way. A tree
+can also be read from several threads, as long as none of them modifies
+it. The DEBUG and FORCE_IPYTHON_BEHAVIOR flags are settings of the whole
+process.
+
+On free-threaded builds of Python the threads run in parallel, which
+avoids pickling the trees back and forth like with a process pool.
+
+Sources are paths of files, given as str or path-like objects like
+everywhere else in redbaron, or code given as bytes.
+
+>>> for path, names in zip(paths, map_trees(lambda red: red.find_all("def").name, paths)):
+...     print(path, names)
+"""
+
+from __future__ import annotations
+
+import os
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+
+from .redbaron import RedBaron
+
+type Source = str | bytes | bytearray | os.PathLike
+
+
+def load(source: Source) -> RedBaron:
+    "Tree of the file at a path, given as str or path-like object, or of encoded source code given as bytes"
+    if isinstance(source, bytes | bytearray):
+        return RedBaron.from_bytes(source)
+    return RedBaron.from_path(source)
+
+
+def map_trees[T](
+    function: Callable[[RedBaron], T], sources: Iterable[Source], max_workers: int | None = None
+) -> Iterator[T]:
+    """
+    Call function on the tree of each source in a pool of threads.
+
+    Each tree is only used by the thread that parsed it. Return an iterator
+    of the results in the order of the sources, like map(), raising the
+    first exception raised by function or by the parsing.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        yield from executor.map(lambda source: function(load(source)), sources)
+
+
+def parse_all(sources: Iterable[Source], max_workers: int | None = None) -> list[RedBaron]:
+    "Trees of the sources, parsed in a pool of threads"
+    return list(map_trees(lambda red: red, sources, max_workers=max_workers))
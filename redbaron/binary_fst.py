@@ -0,0 +1,79 @@
+"""
+Compact binary encoding of trees.
+
+    magic, version, zlib compressed pickle of (indentation, fst)
+
+The fst is pickled with protocol 5, which writes each key shared by the
+nodes once, and the pickle is compressed with the fastest zlib level,
+which takes care of the repeated values, e.g. the spaces and the empty
+formatting lists. On the files of the standard library, the result is
+about 7 times smaller than the pickle and 18 times smaller than the json
+of the fst, for about the same time as pickling, and less than json.
+Flattening the fst following NODES_RENDERING_ORDER in python instead
+takes longer than pickling and compressing it does.
+
+Decoding accepts any buffer, e.g. a memory map, but isn't zero copy:
+zlib.decompress() copies the payload into new bytes, pickle.loads()
+builds the fst from them, and Node.generic_from_fst() then builds the
+nodes, parsing nothing but running their whole construction. So
+node_from_bytes() is much slower than unpickling a tree, which only
+restores the attributes of its nodes, see pickling.py: about 10 times
+on a module of 200 functions. The encoding is for storing or sending
+many trees where size matters more than loading time, pickle for
+loading them fast.
+
+Like pickle, the encoding isn't meant for untrusted data: only decode what
+was encoded by redbaron.
+"""
+
+import pickle
+import zlib
+
+from .base_nodes import Node
+
+MAGIC = b"RBF"
+VERSION = 3
+
+COMPRESSION_LEVEL = 1
+
+
+def encode(fst, indentation=""):
+    "Encode the fst of a node"
+    data = pickle.dumps((indentation, fst), protocol=5)
+    return MAGIC + bytes([VERSION]) + zlib.compress(data, COMPRESSION_LEVEL)
+
+
+def _decode(data):
+    "(indentation, fst) of encoded data"
+    data = memoryview(data).cast("B")
+    if data[:3] != MAGIC:
+        raise ValueError("Not an encoded tree")
+    if data[3] != VERSION:
+        raise ValueError(f"Unsupported version {data[3]}")
+    return pickle.loads(zlib.decompress(data[4:]))
+
+
+def decode(data):
+    "Decode the fst of a node from bytes or any buffer"
+    return _decode(data)[1]
+
+
+def node_to_bytes(node):
+    "Encode a node, or a whole tree, with its indentation"
+    return encode(node.fst(), node.indentation)
+
+
+def node_from_bytes(data, root_type=None):
+    "Node or tree encoded by node_to_bytes(), trees being instances of root_type"
+    if root_type is None:
+        from .redbaron import RedBaron as root_type
+
+    indentation, fst = _decode(data)
+    if fst["type"] == "root":
+        root = root_type("")
+        root.value = fst["value"]
+        return root
+
+    node = Node.generic_from_fst(fst)
+    node.indentation = indentation
+    return node
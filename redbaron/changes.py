@@ -0,0 +1,336 @@
+"""
+Text edits made to a tree since a snapshot.
+
+The journal gives the nodes and node lists that were modified. Only the
+modified attributes of a node are rendered again while the elements of a
+modified node list are matched by identity so that only the inserted and
+removed ones are rendered. The rest of the tree is only walked up to them
+to find out where they were in the code at the time of the snapshot.
+"""
+
+import os
+from difflib import SequenceMatcher
+
+from .base_nodes import RESERVED_KEYWORDS, Node, NodeList
+
+
+def advance(position, code):
+    "Position after the code starting at position"
+    line, column = position
+    newlines = code.count("\n")
+    if newlines:
+        return line + newlines, len(code) - code.rfind("\n")
+    return line, column + len(code)
+
+
+def trim_change(start, old, new):
+    "Smallest (start, end, replacement) change turning old into new"
+    prefix = len(os.path.commonprefix([old, new]))
+    suffix = len(os.path.commonprefix([old[prefix:][::-1], new[prefix:][::-1]]))
+    return (
+        advance(start, old[:prefix]),
+        advance(start, old[: len(old) - suffix]),
+        new[prefix : len(new) - suffix],
+    )
+
+
+def ancestors(root, obj):
+    "ids of the ancestors of obj, None if obj is not in the tree"
+    ids = []
+    while obj is not root:
+        # Nodes created since the snapshot had no parent yet
+        obj = getattr(obj, "parent", None)
+        if obj is None:
+            return None
+        ids.append(id(obj))
+    return ids
+
+
+def rendered_children(node_list):
+    from .nodes import IndentationNode
+
+    children = []
+    for node in node_list.node_list:
+        if node.hidden:
+            continue
+        # Indentation nodes are created again each time the list is synchronised
+        key = ("indentation", id(node.node)) if isinstance(node, IndentationNode) else id(node)
+        children.append((key, node))
+    return children
+
+
+def rendered_indentation(node_list, node):
+    "Indentation of node as rendered by the node list it belongs to"
+    for key, _ in rendered_children(node_list):
+        if key == ("indentation", id(node)):
+            return node.indentation
+    return ""
+
+
+def render_attribute(node, kind, key, dependent):
+    if not node._is_rendered(dependent):
+        return ""
+    if kind == "constant":
+        return key
+    if kind == "string":
+        return getattr(node, key)
+
+    value = getattr(node, key)
+    if kind == "key" and not value:
+        return ""
+    return "".join(node._iter_dumps_attribute(key, value))
+
+
+def modified_keys(node, names):
+    "Keys of the modified attributes of a node, None if the whole node has to be rendered again"
+    stored = {}
+    for kind, key, _ in node._baron_attributes():
+        name = key + "_" if key in RESERVED_KEYWORDS else key
+        if kind in ("string", "bool"):
+            stored[name] = key
+        elif kind != "constant":
+            stored["_" + name] = key
+
+    keys = set()
+    for name in names:
+        if name == "indent":
+            # e.g. try renders the indentation of its clauses
+            if type(node)._iter_dumps_attribute is not Node._iter_dumps_attribute:
+                return None
+        elif name in stored:
+            keys.add(stored[name])
+        elif not name.endswith("_default"):  # cached default formatting
+            return None
+    return keys
+
+
+class Target:
+    "Modified node or node list"
+
+    def __init__(self, obj, names):
+        self.obj = obj
+        self.is_list = isinstance(obj, NodeList)
+        self.indentation_changed = "indent" in names
+        self.keys = None
+        if not self.is_list:
+            self.keys = modified_keys(obj, names)
+            if self.keys is None:
+                self.keys = {key for _, key, _ in obj._baron_attributes()}
+
+        self.new_ancestors = None
+        self.old_ancestors = None
+        self.old_children = None
+        self.new_children = None
+        self.opcodes = []
+
+    def affects(self, key, dependent, targets):
+        "Whether the rendering of an attribute of the node changed"
+        if key in self.keys:
+            return True
+        if isinstance(dependent, bool):
+            return False
+        if isinstance(dependent, str):
+            dependent = [dependent]
+        # A node list becoming empty also changes what depends on it
+        return any(key in self.keys or id(getattr(self.obj, key)) in targets for key in dependent)
+
+    def replaced_ids(self):
+        "ids of the nodes and node lists replaced by the modification"
+        if not self.is_list:
+            for kind, key, _ in self.obj._baron_attributes():
+                if kind in ("key", "list", "formatting") and key in self.keys:
+                    yield id(getattr(self.obj, key))
+            return
+
+        for _, i1, i2, j1, j2 in self.opcodes:
+            for children, start, end in ((self.old_children, i1, i2), (self.new_children, j1, j2)):
+                for key, _ in children[start:end]:
+                    # Only the indentation of the node is replaced
+                    if not isinstance(key, tuple):
+                        yield key
+
+    def match_children(self):
+        "Match the children at the time of the snapshot with the current ones"
+        self.old_children = rendered_children(self.obj)
+        old_keys = [key for key, _ in self.old_children]
+        new_keys = [key for key, _ in self.new_children]
+        opcodes = SequenceMatcher(None, old_keys, new_keys, autojunk=False).get_opcodes()
+        self.opcodes = [opcode for opcode in opcodes if opcode[0] != "equal"]
+
+
+class Slot:
+    "Code at the time of the snapshot to be replaced by the current one"
+
+    def __init__(self, start, old, render_new):
+        self.start = start
+        self.old = old
+        self.render_new = render_new
+
+
+class SpanFinder:
+    """
+    Walk the tree at the time of the snapshot to collect the code of the
+    targets, in rendering order, along with where it is.
+
+    Nodes that do not contain targets are rendered only to advance the
+    position, the walk stops once all the targets are found.
+    """
+
+    def __init__(self, targets):
+        self.targets = {id(target.obj): target for target in targets}
+        self.ancestors = set()
+        for target in targets:
+            self.ancestors.update(target.old_ancestors)
+
+        self.position = (1, 1)
+        self.found = 0
+        self.slots = []
+        self.reindented = set()
+
+    def advance(self, code):
+        self.position = advance(self.position, code)
+
+    def add_slot(self, old, render_new):
+        slot = Slot(self.position, old, render_new)
+        self.slots.append(slot)
+        self.advance(old)
+        return slot
+
+    def walk(self, node, node_list=None):
+        from .nodes import IndentationNode
+
+        if self.found == len(self.targets):
+            return
+
+        target = self.targets.get(id(node))
+        if isinstance(node, IndentationNode) and id(node.node) in self.targets:
+            # The indentation of a node is rendered by its parent list
+            indented = node.node
+            if self.targets[id(indented)].indentation_changed:
+                self.reindented.add(id(indented))
+                self.add_slot(node.value, lambda: rendered_indentation(node_list, indented))
+            else:
+                self.advance(node.value)
+        elif target is not None:
+            if target.is_list:
+                self.walk_children(target)
+            else:
+                if target.indentation_changed and node_list is not None and id(node) not in self.reindented:
+                    # Not indented at the time of the snapshot
+                    self.add_slot("", lambda: rendered_indentation(node_list, node))
+                self.walk_node(node, target)
+            # Only counted once done with what it contains
+            self.found += 1
+        elif id(node) not in self.ancestors:
+            self.advance("".join(node._iter_dumps()))
+        elif isinstance(node, NodeList):
+            for _, child in rendered_children(node):
+                self.walk(child, node)
+        else:
+            self.walk_node(node, None)
+
+    def walk_node(self, node, target):
+        run = []
+        for kind, key, dependent in node._baron_attributes():
+            if target is not None and target.affects(key, dependent, self.targets):
+                # Consecutive modified attributes are rendered together
+                if not run:
+
+                    def render_new(node=node, attributes=run):
+                        return "".join(render_attribute(node, *attribute) for attribute in attributes)
+
+                    slot = self.add_slot("", render_new)
+                code = render_attribute(node, kind, key, dependent)
+                slot.old += code
+                self.advance(code)
+                run.append((kind, key, dependent))
+                continue
+
+            run = []
+            if not node._is_rendered(dependent):
+                continue
+
+            if kind == "constant":
+                self.advance(key)
+            elif kind == "string":
+                self.advance(getattr(node, key))
+            else:
+                value = getattr(node, key)
+                if kind == "key" and not value:
+                    continue
+                if id(value) not in self.targets and id(value) not in self.ancestors:
+                    self.advance("".join(node._iter_dumps_attribute(key, value)))
+                elif type(node)._iter_dumps_attribute is Node._iter_dumps_attribute:
+                    self.walk(value)
+                else:
+                    # e.g. decorators rendered with the indentation of the function
+                    code = "".join(node._iter_dumps_attribute(key, value))
+                    self.add_slot(
+                        code, lambda node=node, attribute=(kind, key, dependent): render_attribute(node, *attribute)
+                    )
+
+    def walk_children(self, target):
+        opcodes = {}
+        for opcode in target.opcodes:
+            opcodes.setdefault(opcode[1], []).append(opcode)
+        removed = {index for _, i1, i2, _, _ in target.opcodes for index in range(i1, i2)}
+
+        for index in range(len(target.old_children) + 1):
+            # Insertions come before the child they are inserted in front of
+            for _, i1, i2, j1, j2 in opcodes.get(index, ()):
+                for key, _ in target.old_children[i1:i2] + target.new_children[j1:j2]:
+                    if isinstance(key, tuple):
+                        self.reindented.add(key[1])
+                old = "".join("".join(node._iter_dumps()) for _, node in target.old_children[i1:i2])
+                new_children = [node for _, node in target.new_children[j1:j2]]
+
+                def render_new(new_children=new_children):
+                    return "".join("".join(node._iter_dumps()) for node in new_children)
+
+                self.add_slot(old, render_new)
+
+            if index < len(target.old_children) and index not in removed:
+                self.walk(target.old_children[index][1], target.obj)
+
+
+def select_targets(targets, replaced, attribute):
+    "Targets in the tree and not inside code that is rendered again as a whole"
+    selected = []
+    for target in targets:
+        ids = getattr(target, attribute)
+        if ids is not None and id(target.obj) not in replaced and replaced.isdisjoint(ids):
+            selected.append(target)
+    return selected
+
+
+def changes_since(root, journal, snapshot):
+    targets = [Target(obj, names) for obj, names in journal.modified_since(snapshot)]
+    replaced = set()
+    for target in targets:
+        target.new_ancestors = ancestors(root, target.obj)
+        if target.is_list:
+            target.new_children = rendered_children(target.obj)
+        else:
+            replaced.update(target.replaced_ids())
+
+    with journal.rewound(snapshot):
+        for target in targets:
+            target.old_ancestors = ancestors(root, target.obj)
+            if target.old_ancestors is None or target.new_ancestors is None:
+                continue
+            if target.is_list:
+                target.match_children()
+            replaced.update(target.replaced_ids())
+
+        targets = select_targets(targets, replaced, "old_ancestors")
+        targets = select_targets(targets, replaced, "new_ancestors")
+
+        finder = SpanFinder(targets)
+        finder.walk(root)
+
+    changes = []
+    for slot in finder.slots:
+        new = slot.render_new()
+        if new != slot.old:
+            changes.append(trim_change(slot.start, slot.old, new))
+    return sorted(changes, key=lambda change: change[0])
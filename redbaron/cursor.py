@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+from .base_nodes import Node, NodeList
+
+
+def _rendering_items(node):
+    """
+    What node renders, in order: node itself where it renders some text and
+    its children nodes and node lists, like _iter_in_rendering_order().
+    """
+    if isinstance(node, NodeList):
+        return node
+
+    items = []
+    for kind, key, display in node._baron_attributes():
+        if display is not True:
+            continue
+
+        if kind == "constant":
+            items.append(node)
+        elif kind == "string":
+            if getattr(node, key) is not None:
+                items.append(node)
+        elif kind == "key":
+            child = getattr(node, key)
+            if child:
+                items.append(child)
+        elif kind in ("list", "formatting"):
+            items.append(getattr(node, key))
+    return items
+
+
+def rendering_root(node):
+    "Highest ancestor of node whose rendering order goes through node"
+    root = node
+    while root.parent is not None:
+        if isinstance(root.parent, NodeList):
+            rendered = root.parent.position_of(root) is not None
+        else:
+            rendered = any(item is root for item in _rendering_items(root.parent))
+        if not rendered:
+            break
+        root = root.parent
+    return root
+
+
+class RenderingCursor:
+    """
+    Position in the rendering order of a tree, the order of the nodes
+    returned by _generate_nodes_in_rendering_order() on its root.
+
+    The cursor keeps the path from the root to the current node along with
+    the index of each node in its parent, so moving to the next or previous
+    node only looks at the nodes in between and a walk through the whole
+    tree is linear.
+    A new cursor is before the first node of the tree.
+    """
+
+    def __init__(self, root: Node | NodeList) -> None:
+        self.root = root
+        self.node = None
+        # [node, rendering items of node, index of the current item]
+        self._frames = []
+        self._at_end = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        node = self.advance()
+        if node is None:
+            raise StopIteration
+        return node
+
+    def seek(self, node: Node, last: bool = False) -> RenderingCursor:
+        """
+        Move the cursor to node, to its last position in the rendering order
+        if last is true as a node renders itself at several places when it
+        holds several strings, e.g. keywords.
+
+        Raise ValueError if node is not in the rendering order of the tree.
+        """
+        path = [node]
+        while path[-1] is not self.root:
+            if path[-1].parent is None:
+                raise ValueError(f"{node!r} is not in the tree")
+            path.append(path[-1].parent)
+
+        frames = []
+        for i in range(len(path) - 1, 0, -1):
+            parent, child = path[i], path[i - 1]
+            items = _rendering_items(parent)
+            if isinstance(parent, NodeList):
+                index = parent.position_of(child)
+            else:
+                index = next((i for i, item in enumerate(items) if item is child), None)
+            if index is None:
+                raise ValueError(f"{node!r} is not rendered")
+            frames.append([parent, items, index])
+
+        items = _rendering_items(node)
+        indexes = [i for i, item in enumerate(items) if item is node]
+        if not indexes:
+            raise ValueError(f"{node!r} is not rendered")
+        frames.append([node, items, indexes[-1] if last else indexes[0]])
+
+        self._frames = frames
+        self._at_end = False
+        self.node = node
+        return self
+
+    def advance(self) -> Node | None:
+        "Move to the next node and return it, None once past the last node"
+        return self._move(1)
+
+    def retreat(self) -> Node | None:
+        "Move to the previous node and return it, None once before the first node"
+        return self._move(-1)
+
+    def _move(self, step):
+        current = self.node
+        node = self._step(step)
+        # Same as squash_successive_duplicates()
+        while node is not None and node is current:
+            node = self._step(step)
+        self.node = node
+        return node
+
+    def _step(self, step):
+        frames = self._frames
+        if not frames:
+            # Before the first node or after the last one
+            if self._at_end == (step > 0):
+                return None
+            items = _rendering_items(self.root)
+            frames.append([self.root, items, -1 if step > 0 else len(items)])
+
+        while frames:
+            frame = frames[-1]
+            node, items, index = frame
+            index += step
+            if not 0 <= index < len(items):
+                frames.pop()
+                continue
+
+            frame[2] = index
+            item = items[index]
+            if item is node:
+                return node
+
+            child_items = _rendering_items(item)
+            frames.append([item, child_items, -1 if step > 0 else len(child_items)])
+
+        self._at_end = step > 0
+        return None
@@ -0,0 +1,102 @@
+"""
+Structural grep: find_all() across files.
+
+    python -m redbaron grep def 'test_*' src/
+
+Files are searched in a pool of processes. Before parsing a file, its code
+is tested with the textual prefilter of the query, see query_prefilter(),
+so that the files that can't match are not parsed at all.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from .node_path import positions_by_path
+from .prefilter import query_prefilter
+from .redbaron import RedBaron
+from .utils import decode_source, python_files
+
+
+def grep_file(path, identifier, *args, **kwargs):
+    """
+    Matches of find_all(identifier, *args, **kwargs) in a file, list of
+    (line, column, first line of the code of the node).
+    """
+    with open(path, "rb") as f:
+        source_code, _ = decode_source(f.read())
+
+    may_match = query_prefilter(identifier, *args, **kwargs)
+    if may_match is not None and not may_match(source_code):
+        return []
+
+    red = RedBaron(source_code)
+    nodes = red.find_all(identifier, *args, **kwargs)
+    if not nodes:
+        return []
+
+    positions = positions_by_path(red.fst())
+    matches = []
+    for node in nodes:
+        line, column = positions[tuple(node.path().to_baron_path())]
+        matches.append((line, column, node.dumps().split("\n", 1)[0].strip()))
+    return matches
+
+
+def _grep_file(path, identifier, args):
+    try:
+        return grep_file(path, identifier, *args), None
+    except Exception as e:  # pylint: disable=broad-except
+        return [], f"{type(e).__name__}: {e}"
+
+
+def _paths(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            yield from python_files(path)
+        else:
+            yield path
+
+
+def grep(identifier, args, paths, jobs=None, out=None, err=None):
+    """
+    Print the matches in the files and in the python files of the directories
+    given as paths as path:line:column: code, as soon as they are found.
+
+    Return the exit status of grep: 0 if something matched, 1 if not, 2 if a
+    file couldn't be searched.
+    """
+    out = sys.stdout if out is None else out
+    err = sys.stderr if err is None else err
+    status = 1
+    paths = list(_paths(paths))
+    jobs = jobs or os.cpu_count() or 1
+    # Forking a process with threads, like the one of the pool, may deadlock
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=context) as executor:
+        results = executor.map(
+            _grep_file,
+            paths,
+            [identifier] * len(paths),
+            [args] * len(paths),
+            # Bigger chunks for less round trips, small enough to stream the results
+            chunksize=max(1, len(paths) // (4 * jobs)),
+        )
+        try:
+            for path, (matches, error) in zip(paths, results, strict=True):
+                if error is not None:
+                    print(f"{path}: {error}", file=err)
+                    status = 2
+                for line, column, code in matches:
+                    print(f"{path}:{line}:{column}: {code}", file=out, flush=True)
+                    if status == 1:
+                        status = 0
+        except BaseException:
+            # e.g. interrupted or the output was closed, don't search the other files
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+    return status
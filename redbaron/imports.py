@@ -0,0 +1,304 @@
+"""
+Import graph of the python files under a directory.
+
+    graph = ImportGraph("src/")
+    graph.refresh()
+    graph.importers_of("pkg.models")  # modules importing pkg.models
+    graph.dependents("pkg.models")  # and the modules importing them, etc.
+    graph.cycles()
+
+The modules are named after the path of their file relative to the
+directory. Only the import statements of a file are kept, as (level,
+module, names) tuples, extracted from its fst: no tree is built, and the
+files without any import statement according to their textual prefilter
+aren't even parsed. Many files are parsed in a pool of processes.
+
+refresh() only parses again the files whose modification time or size
+changed, and the graph only changes around their modules, unless modules
+were added or removed, as "from package import name" imports the module
+package.name when there is one.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import cache
+
+import baron
+
+from .prefilter import query_prefilter
+from .utils import decode_source, python_files, stat_key
+
+# Less files are parsed without starting processes
+MIN_PARALLEL_FILES = 8
+
+
+def _dotted_name(fst_names):
+    "Level of the leading dots and name of the names and dots of a module"
+    level = 0
+    names = []
+    for fst in fst_names:
+        if fst["type"] == "name":
+            names.append(fst["value"])
+        elif not names:
+            level += 3 if fst["type"] == "ellipsis" else 1
+    return level, ".".join(names)
+
+
+def fst_imports(fst):
+    """
+    Import statements of an fst, list of (level, module, names) tuples:
+    level being the number of leading dots of relative imports, and names
+    the names imported from the module by a from import, empty for an
+    import statement.
+    """
+    imports = []
+    stack = [fst]
+    while stack:
+        fst = stack.pop()
+        if isinstance(fst, list):
+            stack.extend(reversed(fst))
+            continue
+        if not isinstance(fst, dict):
+            continue
+
+        kind = fst.get("type")
+        if kind == "import":
+            for dotted in fst["value"]:
+                if dotted["type"] == "dotted_as_name":
+                    imports.append((0, _dotted_name(dotted["value"])[1], ()))
+        elif kind == "from_import":
+            level, module = _dotted_name(fst["value"])
+            names = tuple(target["value"] for target in fst["targets"] if target["type"] in ("name_as_name", "star"))
+            imports.append((level, module, names))
+        else:
+            stack.extend(reversed([value for value in fst.values() if isinstance(value, (dict, list))]))
+    return imports
+
+
+@cache
+def _import_prefilter():
+    return query_prefilter(["import", "from_import"])
+
+
+def file_imports(path):
+    "Import statements of a python file, see fst_imports()"
+    with open(path, "rb") as f:
+        source_code, _ = decode_source(f.read())
+    if not _import_prefilter()(source_code):
+        return []
+    return fst_imports(baron.parse(source_code))
+
+
+def _file_imports(path):
+    try:
+        return file_imports(path), None
+    except Exception as e:  # pylint: disable=broad-except
+        return None, f"{type(e).__name__}: {e}"
+
+
+def module_name(path, root):
+    "(dotted name of the module of the file at path, whether it's a package)"
+    parts = os.path.splitext(os.path.relpath(path, root))[0].split(os.sep)
+    is_package = parts[-1] == "__init__"
+    if is_package:
+        parts.pop()
+    return ".".join(parts), is_package
+
+
+def absolute_module(importer, is_package, level, module):
+    "Name of the module imported by a relative import in importer, None if it's out of the packages"
+    if not level:
+        return module
+    package = importer.split(".") if is_package else importer.split(".")[:-1]
+    # "attempted relative import beyond top-level package"
+    if level - 1 >= len(package):
+        return None
+    parts = package[: len(package) - (level - 1)]
+    if module:
+        parts.append(module)
+    return ".".join(parts)
+
+
+class ImportGraph:
+    """
+    Modules of the python files under root and the modules they import,
+    including the modules out of root, e.g. of the standard library.
+
+    imports maps each module to {imported module: set of the names
+    imported from it}, importers maps each imported module to the set of
+    modules importing it.
+    """
+
+    def __init__(self, root, max_workers=None):
+        self.root = root
+        self.max_workers = max_workers
+        # path -> (stat key, module, is package, imports of the file)
+        self.files = {}
+        self.errors = {}
+        # module -> path
+        self.modules = {}
+        self.imports = {}
+        self.importers = {}
+
+    def refresh(self):
+        """
+        Parse the files that were added or modified since the last refresh
+        and update the graph, return (changed paths, removed paths).
+        """
+        stat_keys = {}
+        for path in python_files(self.root):
+            try:
+                stat_keys[path] = stat_key(path)
+            except OSError:
+                continue
+
+        changed = [
+            path
+            for path, key in stat_keys.items()
+            if (self.files[path][0] if path in self.files else self.errors.get(path, (None,))[0]) != key
+        ]
+        removed = [path for path in list(self.files) + list(self.errors) if path not in stat_keys]
+
+        modified_modules = set()
+        for path, (imports, error) in zip(changed, self._parse(changed), strict=True):
+            if path in self.files:
+                modified_modules.add(self.files[path][1])
+            if error is not None:
+                self.files.pop(path, None)
+                self.errors[path] = (stat_keys[path], error)
+                continue
+            module, is_package = module_name(path, self.root)
+            self.files[path] = (stat_keys[path], module, is_package, imports)
+            self.errors.pop(path, None)
+            modified_modules.add(module)
+        for path in removed:
+            if path in self.files:
+                modified_modules.add(self.files.pop(path)[1])
+            self.errors.pop(path, None)
+
+        modules = {module: path for path, (_, module, _, _) in self.files.items()}
+        if modules.keys() != self.modules.keys():
+            # What "from package import name" imports might have changed
+            modified_modules = set(modules) | set(self.modules)
+        self.modules = modules
+        for module in modified_modules:
+            self._link(module)
+        return changed, removed
+
+    def _parse(self, paths):
+        "(imports, error) of each path"
+        jobs = self.max_workers or os.cpu_count() or 1
+        if jobs == 1 or len(paths) < MIN_PARALLEL_FILES:
+            return [_file_imports(path) for path in paths]
+
+        # Forking a process with threads may deadlock, like in grep()
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        with ProcessPoolExecutor(max_workers=jobs, mp_context=context) as executor:
+            return list(executor.map(_file_imports, paths, chunksize=max(1, len(paths) // (4 * jobs))))
+
+    def _link(self, module):
+        "Update the edges of the graph going out of module"
+        for imported in self.imports.pop(module, {}):
+            importers = self.importers[imported]
+            importers.discard(module)
+            if not importers:
+                del self.importers[imported]
+
+        path = self.modules.get(module)
+        if path is None:
+            return
+
+        _, _, is_package, file_imports = self.files[path]
+        imports = {}
+        for level, name, names in file_imports:
+            imported = absolute_module(module, is_package, level, name)
+            if imported is None:
+                continue
+            imports.setdefault(imported, set()).update(names)
+            for name in names:
+                # A submodule rather than a name defined in the package
+                submodule = f"{imported}.{name}"
+                if submodule in self.modules:
+                    imports.setdefault(submodule, set())
+        self.imports[module] = imports
+        for imported in imports:
+            self.importers.setdefault(imported, set()).add(module)
+
+    def imports_of(self, module):
+        "Sorted names of the modules imported by module"
+        return sorted(self.imports.get(module, ()))
+
+    def importers_of(self, module):
+        "Sorted names of the modules importing module"
+        return sorted(self.importers.get(module, ()))
+
+    def dependencies(self, module):
+        "Sorted names of the modules imported by module, directly or not"
+        return sorted(_reachable(module, self.imports))
+
+    def dependents(self, module):
+        "Sorted names of the modules importing module, directly or not"
+        return sorted(_reachable(module, self.importers))
+
+    def cycles(self):
+        """
+        Groups of modules importing each other, directly or not, list of
+        sorted lists of module names, the strongly connected components of
+        the graph.
+        """
+        # Tarjan's algorithm, without recursion
+        index = {}
+        lowlink = {}
+        stack = []
+        on_stack = set()
+        cycles = []
+        for start in sorted(self.imports):
+            if start in index:
+                continue
+            work = [(start, iter(sorted(self.imports.get(start, ()))))]
+            index[start] = lowlink[start] = len(index)
+            stack.append(start)
+            on_stack.add(start)
+            while work:
+                module, successors = work[-1]
+                for successor in successors:
+                    if successor not in index:
+                        index[successor] = lowlink[successor] = len(index)
+                        stack.append(successor)
+                        on_stack.add(successor)
+                        work.append((successor, iter(sorted(self.imports.get(successor, ())))))
+                        break
+                    if successor in on_stack:
+                        lowlink[module] = min(lowlink[module], index[successor])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[module])
+                    if lowlink[module] == index[module]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component.append(member)
+                            if member == module:
+                                break
+                        if len(component) > 1 or module in self.imports.get(module, ()):
+                            cycles.append(sorted(component))
+        return sorted(cycles)
+
+
+def _reachable(start, edges):
+    seen = set()
+    todo = [start]
+    while todo:
+        for successor in edges.get(todo.pop(), ()):
+            if successor not in seen:
+                seen.add(successor)
+                todo.append(successor)
+    seen.discard(start)
+    return seen
@@ -0,0 +1,352 @@
+"""
+Mutation journal used to take snapshots of a tree and restore them.
+
+The nodes of a watched tree, journaled or holding caches like scope
+tables or a token index, or of a watched subtree, e.g. holding a literal
+value, are instances of subclasses of their classes recording their
+attribute assignments and dropping the caches they change, created on
+demand and named like them: the other trees don't pay for the hook. The nodes inserted in a watched tree get the
+subclasses too, and get their classes back when they are pickled or
+copied.
+
+The in place modifications of node lists are recorded as the content of
+their lists when they are first modified after a snapshot, and only what
+changed is kept when the next snapshot is taken: undoing a modification
+only costs the size of the modification instead of a copy of the whole
+tree.
+"""
+
+import copyreg
+import operator
+from contextlib import contextmanager
+from functools import wraps
+
+_MISSING = object()
+# Node class -> its watched subclass
+_watched_classes = {}
+# Attributes of the nodes of watched trees kept up to date by drop_caches()
+_CACHES = frozenset({"_scope_table", "_token_index", "_literal_value_cache"})
+
+
+class Snapshot:
+    def __init__(self, journal, position):
+        self.journal = journal
+        self.position = position
+
+
+class Journal:
+    def __init__(self):
+        self.records = []
+        self.snapshots = []
+        # id of the lists saved since the last snapshot -> index of their record
+        self._saved_lists = {}
+        self.restoring = False
+        # Changes whenever the tree is modified, for caches of the tree to see it
+        self.version = 0
+
+    def snapshot(self):
+        # Lists need to be saved again to be restored to this snapshot
+        self._compact_lists()
+        snapshot = Snapshot(self, len(self.records))
+        self.snapshots.append(snapshot)
+        return snapshot
+
+    def restore(self, snapshot):
+        if snapshot not in self.snapshots:
+            raise ValueError("Invalid snapshot, it belongs to another tree or was already discarded")
+
+        self.version += 1
+        self.restoring = True
+        try:
+            while len(self.records) > snapshot.position:
+                _apply(*self.records.pop())
+        finally:
+            self.restoring = False
+
+        del self.snapshots[self.snapshots.index(snapshot) + 1 :]
+        self._saved_lists = {}
+
+    def record_attribute(self, obj, name):
+        self.version += 1
+        # Part of the content of a saved list, see _compact_lists()
+        if id(obj) in self._saved_lists and name in obj._state_attributes:
+            return
+        self.records.append((obj, name, obj.__dict__.get(name, _MISSING)))
+
+    def record_list(self, node_list):
+        self.version += 1
+        if id(node_list) in self._saved_lists:
+            return
+
+        self._saved_lists[id(node_list)] = len(self.records)
+        self.records.append((node_list, None, node_list._save_state()))
+
+    def _compact_lists(self):
+        "Replace the content of the lists saved since the last snapshot by what changed in it"
+        for index in self._saved_lists.values():
+            node_list, _, state = self.records[index]
+            self.records[index] = (node_list, None, _Splices.between(node_list, state))
+        self._saved_lists = {}
+
+    @contextmanager
+    def rewound(self, snapshot):
+        "Temporarily bring the tree back to its state at the snapshot"
+        if snapshot not in self.snapshots:
+            raise ValueError("Invalid snapshot, it belongs to another tree or was already discarded")
+
+        self.version += 1
+        self.restoring = True
+        redo = []
+        try:
+            for obj, name, old_value in reversed(self.records[snapshot.position :]):
+                redo.append((obj, name, _apply(obj, name, old_value)))
+            yield
+        finally:
+            for record in reversed(redo):
+                _apply(*record)
+            self.restoring = False
+            self.version += 1
+
+    def modified_since(self, snapshot):
+        """
+        Nodes and node lists modified since the snapshot.
+
+        Return a list of (obj, names), names being the set of attributes
+        modified on obj, None standing for the content of a node list.
+        """
+        modified = {}
+        for obj, name, _ in self.records[snapshot.position :]:
+            # Moving a node only changes the rendering of the lists involved
+            if name not in ("parent", "on_attribute"):
+                modified.setdefault(id(obj), (obj, set()))[1].add(name)
+        return list(modified.values())
+
+
+def _copy_items(items):
+    # The elements of proxy lists are [node, separator] lists modified in place
+    return [list(item) if isinstance(item, list) else item for item in items]
+
+
+def _common_start(old, new):
+    "Number of equal elements at the start of both lists, nodes being only equal to themselves"
+    same = list(map(operator.eq, old, new))
+    return same.index(False) if False in same else len(same)
+
+
+class _Splices:
+    """
+    What changed in the lists of a node list, (attribute, start, old items,
+    number of new items) tuples, the old items replacing the new ones.
+    """
+
+    def __init__(self, splices):
+        self.splices = splices
+
+    @classmethod
+    def between(cls, node_list, state):
+        "Splices turning the lists of node_list back into its saved state"
+        splices = []
+        for name, old in zip(node_list._state_attributes, state, strict=True):
+            new = node_list.__dict__[name]
+            start = _common_start(old, new)
+            old_rest, new_rest = old[start:], new[start:]
+            end = _common_start(old_rest[::-1], new_rest[::-1])
+            if len(old_rest) > end or len(new_rest) > end:
+                splices.append((name, start, old_rest[: len(old_rest) - end], len(new_rest) - end))
+        return cls(splices)
+
+    def apply(self, node_list):
+        "Apply the splices, return the splices undoing them"
+        undo = []
+        for name, start, items, count in self.splices:
+            current = node_list.__dict__[name]
+            undo.append((name, start, _copy_items(current[start : start + count]), len(items)))
+            current[start : start + count] = _copy_items(items)
+        return _Splices(undo)
+
+
+def _apply(obj, name, value):
+    "Put back a recorded value, return the current one"
+    drop_caches(obj)
+    if name is None:
+        if isinstance(value, _Splices):
+            return value.apply(obj)
+        current = obj._save_state()
+        obj._restore_state(value)
+    else:
+        current = obj.__dict__.get(name, _MISSING)
+        if value is _MISSING:
+            obj.__dict__.pop(name, None)
+        else:
+            obj.__dict__[name] = value
+    return current
+
+
+def drop_caches(obj):
+    """
+    Forget the caches of the tree that may hold obj: the scope tables up
+    to the first scope covering it, the token index entries of the
+    subtrees holding it and the literal value of obj, see
+    LiteralyEvaluableMixin. Return the root of the tree.
+    """
+    obj.__dict__.pop("_literal_value_cache", None)
+    path = []
+    covered = False
+    root = None
+    while obj is not None:
+        if not covered:
+            obj.__dict__.pop("_scope_table", None)
+            covered = bool(path) and obj._scope_covers is not None and obj._scope_covers(path)
+        path.append(obj)
+        root, obj = obj, obj.__dict__.get("parent")
+
+    index = root.__dict__.get("_token_index") if root is not None else None
+    if index is not None:
+        for subtree in path:
+            index.subtrees.pop(id(subtree), None)
+    return root
+
+
+def _root_journal(root):
+    journal = getattr(root, "_journal", None)
+    if journal is None or journal.restoring:
+        return None
+    return journal
+
+
+def journal_of(node):
+    root = None
+    # Nodes under construction might not have a parent attribute yet
+    while node is not None:
+        root, node = node, node.__dict__.get("parent")
+    return _root_journal(root)
+
+
+def _watched_setattr(self, name, value):
+    # Descriptors store their value in another attribute, watched on its own
+    if not hasattr(getattr(type(self), name, None), "__set__"):
+        if name in ("parent", "on_attribute"):
+            journal = journal_of(self)
+        else:
+            # e.g. the string attributes, indexed and read by the scope tables
+            journal = _root_journal(drop_caches(self))
+        if journal is not None:
+            journal.record_attribute(self, name)
+
+        if name == "parent":
+            # Moving a node to another tree
+            new_journal = journal_of(value)
+            if new_journal is not None and new_journal is not journal:
+                new_journal.record_attribute(self, name)
+        elif isinstance(value, list):
+            # Unless the list method setting it does it when done, see journaled()
+            if "_journaling" not in self.__dict__:
+                _watch_nodes(value)
+        # Inserting a node
+        elif not isinstance(value, str) and getattr(value, "_watched", True) is False:
+            _watch_nodes((value,))
+
+    object.__setattr__(self, name, value)
+
+
+def _reduce_unwatched(self, protocol):
+    "Pickle and copy the node as an instance of its original class, without the caches"
+    cls = type(self)
+    state, *rest = super(cls, self).__reduce_ex__(protocol)[2:]
+    if isinstance(state, dict) and not _CACHES.isdisjoint(state):
+        state = {name: value for name, value in state.items() if name not in _CACHES}
+    # pickle checks that the class given to copyreg.__newobj__ is the class of the node
+    return (copyreg._reconstructor, (cls.__base__, object, None), state, *rest)
+
+
+def _watched_class(cls):
+    watched_cls = _watched_classes.get(cls)
+    if watched_cls is None:
+        # type.__new__() doesn't register the subclass as the class of a baron type
+        watched_cls = type.__new__(
+            type(cls),
+            cls.__name__,
+            (cls,),
+            {
+                "__slots__": (),
+                "__module__": cls.__module__,
+                "__qualname__": cls.__qualname__,
+                "_watched": True,
+                "__setattr__": _watched_setattr,
+                "__reduce_ex__": _reduce_unwatched,
+            },
+        )
+        watched_cls = _watched_classes.setdefault(cls, watched_cls)
+    return watched_cls
+
+
+def _iter_children(obj):
+    "Nodes held by obj: its attributes, the elements of its lists and of their pairs"
+    for name, value in obj.__dict__.items():
+        if name == "parent":
+            continue
+        if isinstance(value, list):
+            for item in value:
+                if isinstance(item, list):
+                    yield from item
+                else:
+                    yield item
+        else:
+            yield value
+
+
+def _watch_nodes(values):
+    "Watch the nodes among values that aren't yet"
+    from .base_nodes import BaseNode
+
+    for value in values:
+        if isinstance(value, BaseNode) and not value._watched:
+            watch(value)
+
+
+def watch(node):
+    "Give node and the nodes under it the watched subclasses of their classes"
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        # e.g. also held by an IndentationNode
+        if node._watched:
+            continue
+        cls = type(node)
+        node.__class__ = _watched_classes.get(cls) or _watched_class(cls)
+        # Only the classes of the nodes not watched yet have _watched False
+        stack += [child for child in _iter_children(node) if getattr(type(child), "_watched", True) is False]
+
+
+def start_journal(root):
+    "Journal for the tree, its nodes being from now on watched"
+    watch(root)
+    return Journal()
+
+
+def record_list(node_list):
+    journal = journal_of(node_list)
+    if journal is not None:
+        journal.record_list(node_list)
+
+
+def journaled(method):
+    "Decorator for node list methods modifying the list in place"
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        # The outermost call on the list of a watched tree handles it
+        if not self._watched or "_journaling" in self.__dict__:
+            return method(self, *args, **kwargs)
+
+        record_list(self)
+        drop_caches(self)
+        self.__dict__["_journaling"] = True
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            del self.__dict__["_journaling"]
+            # The inserted nodes
+            _watch_nodes(list(_iter_children(self)))
+
+    return wrapper
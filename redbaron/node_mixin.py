@@ -1,18 +1,83 @@
 import ast
+import copy
+from functools import lru_cache
 
 import baron
 import baron.path
 
+from . import journal
 from .base_nodes import BaseNode, Node, NodeList
 from .node_property import NodeProperty, conditional_formatting_property, nodelist_property
 from .proxy_list import CodeProxyList, DecoratorsProxyList
 from .utils import indent_str, strip_comments
 
 
+@lru_cache(maxsize=2)
+def _empty_clause_fst(keyword):
+    "fst of the empty else or finally clause of a try statement"
+    return baron.parse(f"try: pass\nexcept: pass\n{keyword}:\n    pass")[0][keyword]
+
+
+def _make_empty_clause(keyword, parent):
+    "Empty else or finally clause, parsed once and then copied"
+    return Node.generic_from_fst(copy.deepcopy(_empty_clause_fst(keyword)), parent=parent)
+
+
+_NOT_SIMPLE = object()
+
+
+def _simple_literal_value(code):
+    "Value of a number, a string without escapes or a constant, _NOT_SIMPLE otherwise"
+    if code in ("True", "False", "None"):
+        return {"True": True, "False": False, "None": None}[code]
+
+    if code[:1].isdigit():
+        try:
+            return int(code, 0)
+        except ValueError:
+            pass
+        # float() also takes integers with leading zeros
+        if any(char in code for char in ".eE") and code[-1] not in "jJ":
+            try:
+                return float(code)
+            except ValueError:
+                pass
+        return _NOT_SIMPLE
+
+    if code[-1:] not in ("'", '"'):
+        return _NOT_SIMPLE
+    quote_start = min(code.find(quote) % (len(code) + 1) for quote in ("'", '"'))
+    prefix = code[:quote_start].lower()
+    quote = code[quote_start : quote_start + 3]
+    if quote not in ('"""', "'''"):
+        quote = quote[0]
+    body = code[quote_start + len(quote) : -len(quote)]
+    if "f" in prefix or "\r" in body or ("\\" in body and "r" not in prefix):
+        return _NOT_SIMPLE
+    if "b" in prefix:
+        try:
+            return body.encode("ascii")
+        except UnicodeEncodeError:
+            return _NOT_SIMPLE
+    return body
+
+
+def literal_value(node):
+    "Value of a literal nested in a literal, without rendering it when possible"
+    if isinstance(node, LiteralyEvaluableMixin):
+        return node._literal_value()
+    # e.g. negative numbers
+    return ast.literal_eval(node.dumps().strip())
+
+
 class LiteralyEvaluableMixin:
     def to_python(self):
         try:
-            return ast.literal_eval(self.dumps().strip())
+            try:
+                return self._literal_value()
+            except (ValueError, TypeError, SyntaxError):
+                # Let literal_eval() report the error, or evaluate what the tree can't
+                return ast.literal_eval(self.dumps().strip())
         except ValueError as e:
             message = (
                 "to_python method only works on numbers, strings, "
@@ -25,6 +90,69 @@ class LiteralyEvaluableMixin:
             e.args = (message,)
             raise e
 
+    def _literal_value(self):
+        """
+        Value of the node, overridden by the containers to evaluate their
+        elements from the tree instead of rendering them. The value of the
+        others, numbers, strings and constants, is their code.
+        """
+        code = self.value
+        value = _simple_literal_value(code)
+        if value is not _NOT_SIMPLE:
+            return value
+
+        if "_literal_value_cache" in self.__dict__:
+            return self.__dict__["_literal_value_cache"]
+
+        value = ast.literal_eval(code)
+        # For the modifications of the node to drop the cache, which isn't
+        # one, kept out of the journal
+        journal.watch(self)
+        self.__dict__["_literal_value_cache"] = value
+        return value
+
+
+class ScopeMixin:
+    "Node opening a scope, see scopes.py"
+
+    @property
+    def scope(self):
+        "Symbol table of the names bound and used in the scope"
+        from .scopes import scope_table
+
+        return scope_table(self)
+
+    def _scope_covers(self, path):
+        """
+        Whether the last node of path, going up from a descendant to a child
+        of self, is in this scope rather than in the enclosing one
+        """
+        kind = self.baron_type
+        if kind == "root":
+            return True
+        # Nodes being moved or restored might miss on_attribute
+        attributes = [obj.__dict__.get("on_attribute") for obj in path[-3:]]
+        child_attribute = attributes[-1]
+        if kind == "class":
+            return child_attribute == "value"
+        if kind in ("def", "lambda"):
+            if child_attribute == "value":
+                return True
+            if child_attribute != "arguments" or len(path) < 3:
+                return False
+            # The names of the arguments, not their default values and annotations
+            if path[-2].baron_type == "def_argument":
+                return attributes[0] == "target"
+            return attributes[0] == "value"
+
+        # Comprehensions, but their first iterable
+        if child_attribute == "result":
+            return True
+        if child_attribute != "generators" or len(path) < 3:
+            return False
+        # The target of a loop is its iterable
+        return attributes[0] != "target" or path[-2] is not next(iter(path[-1].node_list), None)
+
 
 class DecoratorsMixin:
     @nodelist_property(DecoratorsProxyList)
@@ -340,11 +468,7 @@ class ElseMixin:
         return else_node
 
     def make_empty_else_node(self):
-        code = "try: pass\nexcept: pass\nelse:\n    pass"
-        try_node = Node.generic_from_str(code)
-        empty_else_node = try_node.else_
-        empty_else_node.parent = self
-        return empty_else_node
+        return _make_empty_clause("else", parent=self)
 
     @NodeProperty
     def else_(self, value):
@@ -383,6 +507,12 @@ class ElseMixin:
 
         return fst
 
+    def _iter_dumps_attribute(self, key, value):
+        yield from super()._iter_dumps_attribute(key, value)
+
+        if key == "value" and self.else_ and self.baron_type != "try":
+            yield self.indentation
+
     def increase_indentation(self, indent=None):
         super().increase_indentation(indent)
         if self.else_:
@@ -401,11 +531,7 @@ class FinallyMixin:
         return finally_node
 
     def make_empty_finally_node(self):
-        code = "try: pass\nexcept: pass\nfinally:\n    pass"
-        try_node = Node.generic_from_str(code)
-        empty_finally_node = try_node.finally_
-        empty_finally_node.parent = self
-        return empty_finally_node
+        return _make_empty_clause("finally", parent=self)
 
     @NodeProperty
     def finally_(self, value):
@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
+from baron.path import PathWalker
+
 if TYPE_CHECKING:
     from .base_nodes import BaseNode
 
@@ -91,3 +93,31 @@ class Path:
             return self.to_baron_path() == other.to_baron_path()
 
         return self.to_baron_path() == other
+
+
+class _PositionWalker(PathWalker):
+    def compute(self, fst):
+        self.line, self.column = 1, 1
+        self.positions = {}
+        self.walk(fst)
+        return self.positions
+
+    def before(self, key_type, item, render_key):
+        stop = super().before(key_type, item, render_key)
+        self.positions.setdefault(tuple(self.current_path), (self.line, self.column))
+        if key_type in ("constant", "string"):
+            lines = item.split("\n")
+            if len(lines) > 1:
+                self.line += len(lines) - 1
+                self.column = len(lines[-1]) + 1
+            else:
+                self.column += len(item)
+        return stop
+
+
+def positions_by_path(fst) -> dict[tuple[BaronPathKey, ...], tuple[int, int]]:
+    """
+    (line, column) of the start of every node of an fst by baron path, like
+    box.top_left, found in one walk instead of one per node.
+    """
+    return _PositionWalker().compute(fst)
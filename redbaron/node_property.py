@@ -3,8 +3,26 @@ from functools import partial
 
 import baron
 
+from . import journal
+
+# fst of the formatting used as default value by conditional formatting properties
+_formatting_fsts = {}
+
+
+def _formatting_fst(value):
+    "Parse the formatting once for all the nodes"
+    fst = _formatting_fsts.get(value)
+    if fst is None:
+        fst = _formatting_fsts[value] = baron.parse(value)[0]
+    return dict(fst)
+
 
 class BaseProperty:
+    name = None
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
     @property
     def attr_name(self):
         return "_" + self.name
@@ -12,7 +30,6 @@ class BaseProperty:
 
 class NodeProperty(BaseProperty):
     _after_set: Callable
-    name = None
 
     def __init__(self, str_to_fst=None):
         self.str_to_fst = str_to_fst if str_to_fst else self.default_str_to_fst
@@ -37,6 +54,8 @@ class NodeProperty(BaseProperty):
 
     def __set__(self, obj, value):
         self._set(obj, value)
+        if obj._watched:
+            journal.drop_caches(obj)
         self._after_set(obj, value)
 
     def to_value(self, obj, value):
@@ -111,8 +130,11 @@ class NodeListProperty(NodeProperty):
         try:
             value = getattr(obj, self.attr_name)
         except AttributeError:
-            setattr(obj, self.name, [])
-            value = getattr(obj, self.attr_name)
+            # e.g. an empty formatting list left out of a pickle, not a
+            # modification of the tree, see Node.__getstate__()
+            value = obj.__dict__.setdefault(self.attr_name, self.to_value(obj, []))
+            if obj._watched:
+                journal.watch(value)
 
         return value
 
@@ -144,10 +166,12 @@ class ConditionalFormattingProperty(NodeListProperty):
         default = getattr(obj, attr_name_for_default, None)
         if default is None:
             default = {
-                True: self.to_value(obj, self._default_true),
-                False: self.to_value(obj, self._default_false),
+                True: self.to_value(obj, [_formatting_fst(el) for el in self._default_true]),
+                False: self.to_value(obj, [_formatting_fst(el) for el in self._default_false]),
             }
-            setattr(obj, attr_name_for_default, default)
+            # A cache, kept out of the journal, the first one built wins
+            # when threads reading the same tree race to build it
+            default = obj.__dict__.setdefault(attr_name_for_default, default)
 
         return default[bool(self.condition(obj))]
 
@@ -184,13 +208,6 @@ def conditional_formatting_property(list_type, default_true, default_false, allo
     )
 
 
-def set_name_for_node_properties(cls):
-    for attr_name in dir(cls):
-        attr = getattr(cls, attr_name)
-        if isinstance(attr, BaseProperty):
-            attr.name = attr_name
-
-
 class AliasProperty(BaseProperty):
     def __init__(self, aliased_name):
         self.aliased_name = aliased_name
@@ -18,9 +18,11 @@ from .node_mixin import (
     ListTupleMixin,
     LiteralyEvaluableMixin,
     ReturnAnnotationMixin,
+    ScopeMixin,
     SecondFormattingIndentMixin,
     SeparatorMixin,
     ValueIterableMixin,
+    literal_value,
 )
 from .node_property import NodeListProperty, NodeProperty, conditional_formatting_property, nodelist_property
 from .proxy_list import (
@@ -35,7 +37,7 @@ from .proxy_list import (
 )
 
 
-class ArgumentGeneratorComprehensionNode(Node):
+class ArgumentGeneratorComprehensionNode(ScopeMixin, Node):
     @nodelist_property(NodeList)
     def generators(self, value):
         return baron.parse(f"(x {value})")[0]["generators"]
@@ -254,7 +256,7 @@ class CaseNode(IndentedCodeBlockMixin, Node):
         return baron.parse(code)[0]["cases"][1]["guard"]
 
 
-class ClassNode(IndentedCodeBlockMixin, Node, DecoratorsMixin):
+class ClassNode(ScopeMixin, IndentedCodeBlockMixin, Node, DecoratorsMixin):
     _default_test_value = "name"
     parenthesis = False
 
@@ -344,7 +346,7 @@ class DecoratorNode(Node):
         return baron.parse(f"@a{value}\ndef a(): pass")[0]["decorators"][0]["call"]
 
 
-class DefNode(IndentedCodeBlockMixin, DecoratorsMixin, ReturnAnnotationMixin, Node):
+class DefNode(ScopeMixin, IndentedCodeBlockMixin, DecoratorsMixin, ReturnAnnotationMixin, Node):
     _default_test_value = "name"
 
     def __init__(self, fst=None, parent=None, on_attribute=None):
@@ -363,13 +365,22 @@ class DefNode(IndentedCodeBlockMixin, DecoratorsMixin, ReturnAnnotationMixin, No
 
     def fst(self):
         fst = super().fst()
+        self._fix_decorators_indentation(fst["decorators"])
+        return fst
 
+    def _fix_decorators_indentation(self, decorators_fst):
         # Force indentation for each decorator
-        for el in fst["decorators"]:
+        for el in decorators_fst:
             if el["type"] == "endl":
                 el["indent"] = self.indentation
 
-        return fst
+        return decorators_fst
+
+    def _iter_dumps_attribute(self, key, value):
+        if key == "decorators":
+            yield baron.dumps(self._fix_decorators_indentation(value.fst()))
+        else:
+            yield from super()._iter_dumps_attribute(key, value)
 
 
 class DefArgumentNode(Node, AnnotationMixin):
@@ -418,6 +429,9 @@ class DictNode(FourthFormattingIndentMixin, ValueIterableMixin, LiteralyEvaluabl
         code = f"{{{value}}}"
         return baron.parse(code)[0]["value"]
 
+    def _literal_value(self):
+        return {literal_value(item.key): literal_value(item.value) for item in self.value}
+
     def put_on_new_line(self, item, indentation=None):
         return self.value.put_on_new_line(item, indentation=indentation)
 
@@ -433,7 +447,7 @@ class DictNode(FourthFormattingIndentMixin, ValueIterableMixin, LiteralyEvaluabl
         self.fourth_formatting.pop()
 
 
-class DictComprehensionNode(Node):
+class DictComprehensionNode(ScopeMixin, Node):
     @nodelist_property(NodeList)
     def generators(self, value):
         return baron.parse(f"{{x {value}}}")[0]["generators"]
@@ -846,7 +860,7 @@ class FromImportNode(ValueIterableMixin, Node):
         return baron.parse(f"from {value} import s")[0]["value"]
 
 
-class GeneratorComprehensionNode(Node):
+class GeneratorComprehensionNode(ScopeMixin, Node):
     @nodelist_property(NodeList)
     def generators(self, value):
         return baron.parse(f"(x {value})")[0]["generators"]
@@ -911,11 +925,11 @@ class IfelseblockNode(CodeBlockMixin, Node):
 class ImportNode(ValueIterableMixin, Node):
     def modules(self):
         "return a list of string of modules imported"
-        return [x.value.dumps() for x in self.find_all("dotted_as_name")]
+        return [x.value.dumps() for x in self.value if x.baron_type == "dotted_as_name"]
 
     def names(self):
         "return a list of string of new names inserted in the python context"
-        return [x.target if x.target else x.value.dumps() for x in self.find_all("dotted_as_name")]
+        return [x.target if x.target else x.value.dumps() for x in self.value if x.baron_type == "dotted_as_name"]
 
     @nodelist_property(ImportsProxyList)
     def value(self, value):
@@ -953,7 +967,7 @@ class KwargsOnlyMarkerNode(Node):
     pass
 
 
-class LambdaNode(Node):
+class LambdaNode(ScopeMixin, Node):
     @nodelist_property(ArgsProxyList)
     def arguments(self, value):
         return baron.parse(f"lambda {value}: x")[0]["arguments"]
@@ -978,7 +992,7 @@ class ListArgumentNode(AnnotationMixin, Node):
         return baron.parse(f"lambda *{value}: x")[0]["arguments"][0]["value"]
 
 
-class ListComprehensionNode(Node):
+class ListComprehensionNode(ScopeMixin, Node):
     @nodelist_property(NodeList)
     def generators(self, value):
         return baron.parse(f"[x {value}]")[0]["generators"]
@@ -993,6 +1007,9 @@ class ListNode(FourthFormattingIndentMixin, ListTupleMixin, ValueIterableMixin,
     def value(self, value):
         return baron.parse(f"[{value}]")[0]["value"]
 
+    def _literal_value(self):
+        return [literal_value(el) for el in self.value]
+
     @value.after_set
     def value(self, value):
         self.move_second_formatting()
@@ -1037,7 +1054,27 @@ class MatchNode(IndentedCodeBlockMixin, Node):
 
 
 class NameNode(LiteralyEvaluableMixin, Node):
-    pass
+    def find_name_binding(self):
+        """
+        Nodes binding the variable this name refers to, see Scope.bindings,
+        empty if the name isn't a variable, e.g. an attribute, or if the
+        variable isn't bound in the tree.
+        """
+        from .scopes import scope_of
+
+        scope = scope_of(self)
+        if scope is None or not scope.refers_to_variable(self):
+            return []
+        return scope.find_bindings(self.value)
+
+    def find_name_uses(self):
+        "Name nodes reading the variable this name refers to"
+        from .scopes import scope_of
+
+        scope = scope_of(self)
+        if scope is None or not scope.refers_to_variable(self):
+            return []
+        return scope.find_uses(self.value)
 
 
 class NamedExprNode(Node):
@@ -1215,13 +1252,16 @@ class SemicolonNode(Node):
     pass
 
 
-class SetNode(Node):
+class SetNode(LiteralyEvaluableMixin, Node):
     @nodelist_property(CommaProxyList)
     def value(self, value):
         return baron.parse(f"{{{value}}}")[0]["value"]
 
+    def _literal_value(self):
+        return {literal_value(el) for el in self.value}
 
-class SetComprehensionNode(Node):
+
+class SetComprehensionNode(ScopeMixin, Node):
     @nodelist_property(NodeList)
     def generators(self, value):
         return baron.parse(f"{{x {value}}}")[0]["generators"]
@@ -1318,6 +1358,11 @@ class StringChainNode(LiteralyEvaluableMixin, Node):
     def value(self, value):
         return baron.parse(f"a = {value}")[0]["value"]["value"]
 
+    def _literal_value(self):
+        values = [literal_value(el) for el in self.value]
+        # Mixing bytes and str raises a TypeError like in Python
+        return type(values[0])().join(values)
+
 
 class TernaryOperatorNode(Node):
     @NodeProperty
@@ -1393,6 +1438,18 @@ class TryNode(ElseMixin, FinallyMixin, IndentedCodeBlockMixin, Node):
 
         return fst
 
+    def _iter_dumps_attribute(self, key, value):
+        yield from super()._iter_dumps_attribute(key, value)
+
+        # Same spaces as added in fst()
+        followed_by = {
+            "value": self.excepts or self.else_ or self.finally_,
+            "excepts": self.excepts and (self.else_ or self.finally_),
+            "else": self.finally_,
+        }
+        if followed_by.get(key):
+            yield self.indentation
+
     def increase_indentation(self, indent=None):
         ElseMixin.increase_indentation(self, indent)
         self.excepts.increase_indentation(indent)
@@ -1420,6 +1477,9 @@ class TupleNode(ListTupleMixin, ValueIterableMixin, LiteralyEvaluableMixin, Node
 
         return fst
 
+    def _literal_value(self):
+        return tuple(literal_value(el) for el in self.value)
+
 
 class TypeParamNode(Node):
     """Type parameter node for PEP 695 (Python 3.12+)."""
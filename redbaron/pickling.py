@@ -0,0 +1,64 @@
+"""
+Pickling of trees.
+
+Nodes are pickled with their attributes, including their parent, so that
+pickling a node pickles the whole tree it belongs to, like copy.deepcopy()
+copies it, and unpickling only restores the attributes. The snapshots of a
+tree aren't pickled, and neither is what is built again when read: the
+default formatting of the nodes, their empty formatting lists and the
+rendered data of proxy lists, see Node.__getstate__().
+
+Subtree pickles a node without the rest of its tree.
+"""
+
+import io
+import pickle
+
+
+class _DetachingPickler(pickle.Pickler):
+    "Pickle the parent of node as None, and so only the subtree of node"
+
+    def __init__(self, file, node):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.parent = node.parent
+
+    def persistent_id(self, obj):
+        return "parent" if obj is self.parent else None
+
+
+class _DetachedUnpickler(pickle.Unpickler):
+    def persistent_load(self, pid):
+        return None
+
+
+def subtree_from_bytes(data, path):
+    node = _DetachedUnpickler(io.BytesIO(data)).load()
+    node.on_attribute = None
+    return Subtree(node, path)
+
+
+class Subtree:
+    """
+    Node pickled without the rest of its tree, along with its path in the
+    tree, to find the same node in another copy of the tree.
+
+    >>> subtree = pickle.loads(pickle.dumps(Subtree(red.find("def"))))
+    >>> subtree.node  # the def, on its own
+    >>> subtree.find_in(red)  # the def in red
+    """
+
+    def __init__(self, node, path=None):
+        self.node = node
+        self.path = node.path().to_baron_path() if path is None else path
+
+    def find_in(self, root):
+        "Node at the path of the subtree in root"
+        return root.find_by_path(self.path)
+
+    def __reduce__(self):
+        data = io.BytesIO()
+        if self.node.parent is None:
+            pickle.dump(self.node, data, protocol=pickle.HIGHEST_PROTOCOL)
+        else:
+            _DetachingPickler(data, self.node).dump(self.node)
+        return subtree_from_bytes, (data.getvalue(), self.path)
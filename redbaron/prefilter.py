@@ -0,0 +1,237 @@
+"""
+Textual prefilter of find_all() queries.
+
+A query can only match code containing some text: the keywords and
+punctuation always rendered by the node types matching its identifier,
+see NODES_RENDERING_ORDER, and the value given to compare to a string
+attribute of the nodes, as string attributes hold the text of the code.
+query_prefilter() turns a query into a test of the code telling whether
+it can't match, e.g. to skip parsing files.
+
+Within a tree, find_iter() skips the subtrees without any node of the
+types matching the identifier, using a TokenIndex of the classes of the
+nodes of each subtree, kept on the root of the tree and built from the
+second search of the tree on. Building the index
+watches the tree, see journal.watch(): its modifications only drop the
+entries of the modified subtree and its ancestors, see
+journal.drop_caches(). The string values of the nodes are indexed too,
+for the subtrees without any string attribute matching the value given
+to find_all() to be skipped. find() doesn't use the index, building or
+even querying it would cost more than finding the first match.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from collections.abc import Callable
+
+from . import journal
+from .base_nodes import NODES_RENDERING_ORDER, Node, NodeList, NodeRegistration
+
+# Wildcards of fnmatch patterns
+_WILDCARDS = re.compile(r"[*?]|\[[^\]]*\]")
+
+
+def type_needles(node_class) -> tuple[str, ...]:
+    "Texts that the code of every node of node_class contains"
+    order = NODES_RENDERING_ORDER.get(node_class.baron_type, ())
+    return tuple(key for kind, key, dependent in order if kind == "constant" and dependent is True)
+
+
+# A constraint is a list of alternatives, (needles, normcase) tuples: the code
+# must contain all the needles of one of them, compared after os.path.normcase()
+# when normcase is true
+
+
+def _identifier_needles(identifier):
+    "Constraint on the code of the nodes matching identifier, None if there is none"
+    if callable(identifier):
+        return None
+    if isinstance(identifier, str) and not identifier.startswith("re:"):
+        identifier = identifier.lower()
+
+    alternatives = set()
+    for node_class in NodeRegistration.all_types().values():
+        if node_class._attribute_match_query(node_class.generate_identifiers(), identifier):
+            needles = type_needles(node_class)
+            if not needles:
+                return None
+            alternatives.add(needles)
+    return [(needles, False) for needles in alternatives]
+
+
+def _value_needles(query):
+    "Constraint on the code of the string attributes matching query, None if there is none"
+    if isinstance(query, (list, tuple)):
+        if not all(isinstance(value, str) for value in query):
+            return None
+        return [((value,), False) for value in query]
+
+    if not isinstance(query, str) or query.startswith("re:"):
+        return None
+    if query.startswith("g:"):
+        pattern = os.path.normcase(query[2:])
+        if "[" in _WILDCARDS.sub("", pattern):
+            # Unclosed bracket
+            return None
+        # fnmatch() compares normalized cases
+        return [(tuple(chunk for chunk in _WILDCARDS.split(pattern) if chunk), True)]
+    return [((query,), False)]
+
+
+def query_prefilter(identifier, *args, **kwargs) -> Callable[[str], bool] | None:
+    """
+    Function of code returning False when find_all(identifier, *args,
+    **kwargs) can't match anything in it, None if the query can't be
+    prefiltered. True only means that the query may match.
+    """
+    constraints = []
+    needles = _identifier_needles(identifier)
+    if needles is not None:
+        constraints.append(needles)
+    if args and isinstance(args[0], (str, re.Pattern, list, tuple)):
+        args = args[:1]
+    else:
+        args = ()
+    for query in (*args, *kwargs.values()):
+        needles = _value_needles(query)
+        if needles is not None:
+            constraints.append(needles)
+
+    if not constraints:
+        return None
+
+    def may_match(code):
+        normalized = None
+        for alternatives in constraints:
+            for needles, normcase in alternatives:
+                text = code
+                if normcase:
+                    if normalized is None:
+                        normalized = os.path.normcase(code)
+                    text = normalized
+                if all(needle in text for needle in needles):
+                    break
+            else:
+                return False
+        return True
+
+    return may_match
+
+
+# Smaller subtrees are searched without looking at their tokens
+MIN_INDEXED_SIZE = 16
+
+
+def _value_query(args, kwargs):
+    "Queries compared to string attributes of the nodes, None if some can't be indexed"
+    queries = list(kwargs.values())
+    if args and isinstance(args[0], (str, re.Pattern, list, tuple)):
+        queries.append(args[0])
+    for query in queries:
+        if isinstance(query, (list, tuple)) and not all(isinstance(value, str) for value in query):
+            return None
+        if not isinstance(query, (str, re.Pattern, list, tuple)):
+            return None
+    return queries
+
+
+class TokenIndex:
+    """
+    Classes and string attribute values of the nodes of the subtrees of a tree, as seen by _find_iter(), for the subtrees of at
+    least MIN_INDEXED_SIZE nodes.
+    """
+
+    def __init__(self):
+        # id(subtree) -> (subtree, classes, values, size)
+        self.subtrees = {}
+
+    def tokens(self, subtree):
+        "(classes, values, size) of a subtree"
+        entry = self.subtrees.get(id(subtree))
+        if entry is not None and entry[0] is subtree:
+            return entry[1:]
+
+        classes = set()
+        values = set()
+        size = 0
+        if isinstance(subtree, NodeList):
+            children = subtree.data
+        else:
+            # Without the watched subclass, see journal.py
+            classes.add(type(subtree).__base__ if subtree._watched else type(subtree))
+            for key in getattr(subtree, "_raw_keys", ()):
+                value = getattr(subtree, key, None)
+                if isinstance(value, str):
+                    values.add(value)
+            size = 1
+            children = []
+            for kind, key, _ in subtree._baron_attributes():
+                if kind in ("key", "list", "formatting"):
+                    child = getattr(subtree, key)
+                    if child:
+                        children.append(child)
+
+        for child in children:
+            child_classes, child_values, child_size = self.tokens(child)
+            classes |= child_classes
+            values |= child_values
+            size += child_size
+
+        if size >= MIN_INDEXED_SIZE:
+            classes, values = frozenset(classes), frozenset(values)
+            self.subtrees[id(subtree)] = (subtree, classes, values, size)
+        return classes, values, size
+
+    def subtree_filter(self, search_root, identifier, args, kwargs):
+        """
+        Function telling whether a subtree of search_root may contain a node
+        matching the query, None if the query can't use the index.
+        """
+        queries = _value_query(args, kwargs)
+        if queries is None or callable(identifier):
+            return None
+        if isinstance(identifier, str) and not identifier.startswith("re:"):
+            identifier = identifier.lower()
+
+        all_classes, all_values, size = self.tokens(search_root)
+        if size < MIN_INDEXED_SIZE:
+            return None
+
+        # What matches in the whole tree, the subtrees are then tested with
+        # set operations
+        classes = {cls for cls in all_classes if cls._attribute_match_query(cls.generate_identifiers(), identifier)}
+        value_sets = [
+            {value for value in all_values if Node._attribute_match_query([value], query)} for query in queries
+        ]
+
+        def may_match(subtree):
+            entry = self.subtrees.get(id(subtree))
+            if entry is None or entry[0] is not subtree:
+                return True
+            _, subtree_classes, subtree_values, _ = entry
+            if classes.isdisjoint(subtree_classes):
+                return False
+            return all(not values.isdisjoint(subtree_values) for values in value_sets)
+
+        return may_match
+
+
+def subtree_filter(search_root, identifier, args, kwargs):
+    """
+    Function telling whether a subtree may contain a node matching
+    find_all(identifier, *args, **kwargs), None if there is no filter.
+    """
+    root = search_root
+    while root.parent is not None:
+        root = root.parent
+    index = root.__dict__.get("_token_index")
+    if index is None:
+        # A tree searched only once doesn't pay for building the index
+        root.__dict__["_token_index"] = TokenIndex()
+        return None
+    if not root._watched:
+        # For the modifications of the tree to drop its entries
+        journal.watch(root)
+    return index.subtree_filter(search_root, identifier, args, kwargs)
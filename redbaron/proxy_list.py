@@ -1,24 +1,44 @@
-import baron
+import copy
+from functools import lru_cache
 
-from redbaron.utils import in_a_shell, truncate
+import baron
 
-from .base_nodes import Node, NodeList
+from .base_nodes import Node, NodeList, NodeRegistration
+from .journal import journaled, watch
 
 SEP_KEY_PREFIX = "sep:"
 
+# fst of the separators built by make_separator(), by (separator type, new line)
+_separator_fsts = {}
+
+
+class _RenderedData:
+    "data of a proxy list pickled without it, rendered again when first read"
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        # Not a modification of the tree, kept out of the journal
+        data = obj.__dict__["data"] = obj._rendered_data()
+        if obj._watched:
+            for node in data:
+                watch(node)
+        return data
+
 
 class ProxyList(NodeList):
     strict_separator = True
     auto_separator = True
-    middle_separator = None
     trailing_separator = False
+    # Baron type of the separators
+    separator_baron_type = None
+    data = _RenderedData()
 
     def __init__(self, node_list=None, parent=None, on_attribute=None):
         super().__init__(parent=parent, on_attribute=on_attribute)
         self.header = []
         self.footer = []
         self._data = []
-        self.separator_type = type(self.middle_separator)
         assert not self.node_list
         assert not self.data
         self.extend_node_list(node_list or [])
@@ -120,16 +140,25 @@ class ProxyList(NodeList):
         if leftover_indent:
             footer.append(self.make_empty_el(leftover_indent))
 
+    @journaled
     def _data_to_node_list(self):
+        self.data = self._rendered_data()
+
+    def _rendered_data(self):
+        "Elements of the lists in rendering order, with the indentations of those indented"
         from .nodes import IndentationNode
 
         expected_list = []
+        # Their value is the indentation of their element, they can be kept
+        data = self.__dict__.get("data", ())
+        indentations = {id(node.node): node for node in data if isinstance(node, IndentationNode)}
 
         def _append_el(el):
             if not el:
                 return
             if el.indentation:
-                expected_list.append(IndentationNode(el, parent=self))
+                indentation = indentations.get(id(el))
+                expected_list.append(indentation if indentation is not None else IndentationNode(el, parent=self))
             expected_list.append(el)
 
         for el in self.header:
@@ -144,12 +173,22 @@ class ProxyList(NodeList):
         for el in self.footer:
             _append_el(el)
 
-        self.data = expected_list
+        return expected_list
 
-    def make_separator(self):
-        separator = self.middle_separator.copy()
-        separator.parent = self
-        return separator
+    @property
+    def separator_type(self):
+        return NodeRegistration.class_from_baron_type(self.separator_baron_type)
+
+    def make_separator(self, new_line=False):
+        "New separator, followed by a new line if new_line is true"
+        separator_type = self.separator_type
+        fst = _separator_fsts.get((separator_type, new_line))
+        if fst is None:
+            separator = separator_type()
+            if new_line:
+                separator.second_formatting = ["\n"]
+            fst = _separator_fsts[separator_type, new_line] = separator.fst()
+        return separator_type(fst, parent=self)
 
     def make_separator_if_strict(self):
         return self.make_separator() if self.auto_separator else None
@@ -164,11 +203,46 @@ class ProxyList(NodeList):
 
         return el
 
+    def _iter_on_new_line(self):
+        """
+        Yield the data tuples along with el.on_new_line for their element,
+        computed in one pass instead of looking for the previous element
+        of each of them.
+
+        Each value is computed when the tuple is reached, so changes to the
+        separators of the previous tuples are taken into account.
+        """
+        previous = None
+        for data_tuple in self._data:
+            el = self._el_from_data_tuple(data_tuple)
+            if type(el).on_new_line is not Node.on_new_line:
+                on_new_line = el.on_new_line
+            elif previous is None:
+                # First element
+                if self.header and self.header[-1].baron_type == "endl":
+                    on_new_line = True
+                else:
+                    on_new_line = self.on_new_line
+            else:
+                previous_el = self._el_from_data_tuple(previous)
+                if type(previous_el).endl is Node.endl:
+                    sep = self._sep_from_data_tuple(previous)
+                    # No need to look for sep in the list to know it is one
+                    on_new_line = bool(sep and (sep._endl if type(sep).endl is Node.endl else sep.endl))
+                else:
+                    on_new_line = bool(previous_el.endl)
+
+            yield data_tuple, on_new_line
+
+            if not el.hidden:
+                previous = data_tuple
+
+    @journaled
     def reformat(self, force_separator=False):
         indentation = self.el_indentation
 
-        for el in self._data:
-            if el[0].on_new_line:
+        for el, on_new_line in self._iter_on_new_line():
+            if on_new_line:
                 el[0].indentation = indentation
             else:
                 el[0].indentation = ""
@@ -179,8 +253,7 @@ class ProxyList(NodeList):
                 if not el[1]:
                     el[1] = self.make_separator()
                 elif isinstance(el[1], EndlNode) and not isinstance(el[0], CommentNode):
-                    el[1] = self.make_separator()
-                    el[1].second_formatting = ["\n"]
+                    el[1] = self.make_separator(new_line=True)
 
         if self._data and (not self.trailing_separator or not self[-1].endl):
             self._data[-1][1] = None
@@ -196,6 +269,7 @@ class ProxyList(NodeList):
     def __len__(self):
         return len(self._data)
 
+    @journaled
     def _insert(self, index, item):
         value = self.el_to_node_with_indentation(item)
 
@@ -206,10 +280,12 @@ class ProxyList(NodeList):
         self._data.insert(index, [value, sep])
         self._add_separator_if_needed(index)
 
+    @journaled
     def insert(self, i, item):
         self._insert(i, item)
         self._synchronise()
 
+    @journaled
     def put_on_new_line(self, item, indentation=None):
         from .nodes import EndlNode
 
@@ -230,6 +306,7 @@ class ProxyList(NodeList):
 
         self._synchronise()
 
+    @journaled
     def put_on_same_line(self, item):
         from .nodes import EndlNode
 
@@ -243,6 +320,7 @@ class ProxyList(NodeList):
             self.header.pop()
             self._synchronise()
 
+    @journaled
     def remove_endl(self, item):
         from .nodes import EndlNode
 
@@ -271,6 +349,7 @@ class ProxyList(NodeList):
         self._insert(i, item)
         self.add_endl(self[i])
 
+    @journaled
     def add_endl(self, item):
         from .nodes import EndlNode
 
@@ -295,6 +374,7 @@ class ProxyList(NodeList):
     def extend(self, other):
         self[len(self) :] = other
 
+    @journaled
     def pop(self, i=-1):
         el = self._data.pop(i)
         self._synchronise()
@@ -362,6 +442,7 @@ class ProxyList(NodeList):
     def count(self, item):
         return list(self).count(item)
 
+    @journaled
     def __setitem__(self, key, value):
         # Handle key="sep:..."
         if isinstance(key, str):
@@ -378,7 +459,10 @@ class ProxyList(NodeList):
 
         self._add_separator_if_needed(min(key.start, len(self._data)))
 
-        nodes = [[self.el_to_node_with_indentation(el), self.make_separator_if_strict()] for el in value]
+        indentation = self.el_indentation
+        nodes = [[self.el_to_node(el), self.make_separator_if_strict()] for el in value]
+        for node, _ in nodes:
+            node.indentation = indentation
         for (_, sep), node in zip(self._data[key], nodes, strict=False):
             node[1] = sep
         self._data[key] = nodes
@@ -391,13 +475,13 @@ class ProxyList(NodeList):
         if not self._data or not index:
             return
 
-        separator = self.make_separator()
         missing_separator = self._data[index - 1][1] is None
-        if not isinstance(separator, EndlNode) and isinstance(self._data[index - 1][1], EndlNode):
+        if not issubclass(self.separator_type, EndlNode) and isinstance(self._data[index - 1][1], EndlNode):
             missing_separator = True
         if missing_separator and self.auto_separator:
-            self._data[index - 1][1] = separator
+            self._data[index - 1][1] = self.make_separator()
 
+    @journaled
     def __delslice__(self, i, j):
         del self._data[i:j]
         self._synchronise()
@@ -405,19 +489,6 @@ class ProxyList(NodeList):
     def __getslice__(self, i, j):
         return [el for el, _ in self._data[i:j]]
 
-    def __repr__(self):
-        if in_a_shell():
-            return self.__str__()
-
-        return '<{} {}, "{}" {}, on {} {}>'.format(
-            self.__class__.__name__,
-            self.path().to_baron_path(),
-            truncate(self.dumps().replace("\n", "\\n"), 20),
-            id(self),
-            self.parent.__class__.__name__,
-            id(self.parent),
-        )
-
     def __str__(self):
         to_return = ""
         for number, value in enumerate(self._data):
@@ -431,6 +502,7 @@ class ProxyList(NodeList):
         new_list.extend([el.copy() for el in filter(function, self)])
         return new_list
 
+    @journaled
     def replace_data(self, new_data):
         for el, sep in new_data:
             el.parent = self
@@ -441,6 +513,7 @@ class ProxyList(NodeList):
         self._data = list(new_data)
         self._synchronise()
 
+    @journaled
     def extend_node_list(self, new_node_list):
         self.set_parent_and_on_attribute(new_node_list)
         self.data += list(new_node_list)
@@ -448,6 +521,21 @@ class ProxyList(NodeList):
         self.detect_trailing_sep()
         self._data_to_node_list()
 
+    _state_attributes = ("data", "_data", "header", "footer")
+
+    def __getstate__(self):
+        "Pickle and copy the list without data, rendered from the other lists"
+        state = super().__getstate__()
+        state.pop("data", None)
+        return state
+
+    def _save_state(self):
+        return list(self.data), [list(el) for el in self._data], list(self.header), list(self.footer)
+
+    def _restore_state(self, state):
+        data, _data, header, footer = state
+        self.__dict__.update(data=data, _data=_data, header=header, footer=footer)
+
     def detect_trailing_sep(self):
         if not self._data:
             return
@@ -471,6 +559,7 @@ class ProxyList(NodeList):
         node.indentation = self.el_indentation
         return node
 
+    @journaled
     def sort(self, key=None, reverse=False):  # pylint: disable=arguments-differ
         def wrapped_key(el):
             return key(el[0])
@@ -478,6 +567,7 @@ class ProxyList(NodeList):
         self._data = sorted(self._data, key=wrapped_key, reverse=reverse)
         self._synchronise()
 
+    @journaled
     def clear(self):
         self._data.clear()
         self._synchronise()
@@ -489,6 +579,7 @@ class ProxyList(NodeList):
             raise ValueError(f"Invalid Item: {item!r}")
         return sep
 
+    @journaled
     def set_associated_sep(self, item, value):
         data_tuple = self.find_in_data(item)
         if item is data_tuple[1]:
@@ -511,6 +602,7 @@ class ProxyList(NodeList):
             return True
         return False
 
+    @journaled
     def add_brackets(self):
         if self.has_brackets():
             return
@@ -521,6 +613,7 @@ class ProxyList(NodeList):
         self.footer.append(RightParenthesisNode())
         self._synchronise()
 
+    @journaled
     def remove_brackets(self):
         if not self.has_brackets():
             return
@@ -535,21 +628,28 @@ class ProxyList(NodeList):
     def is_multiline(self):
         return bool(self.find("endl"))
 
+    def _column(self):
+        "Number of characters before the list on its first line"
+        code = self._code_before_on_line()
+        if code is None:
+            return self.box.top_left.column - 1
+        return len(code)
+
     @property
     def el_indentation(self):
         from .nodes import LeftParenthesisNode
 
         if self:
             # First element that is not inline, we have an indent reference
-            for el, _ in self._data:
-                if el.on_new_line:
+            for (el, _), on_new_line in self._iter_on_new_line():
+                if on_new_line:
                     return el.indentation
 
             # Compute indent from parent + header length
             header_len = 0
             if self.header and isinstance(self.header[-1], LeftParenthesisNode):
                 header_len = 1
-            return (header_len + self.box.top_left.column - 1) * " "
+            return (header_len + self._column()) * " "
 
         # If list is empty, then first element will be inline
         return ""
@@ -558,6 +658,7 @@ class ProxyList(NodeList):
         super().hide(item)
         self._synchronise()
 
+    @journaled
     def move_after(self, el, to):
         """Keeps new lines"""
         old_index = self.index(el)
@@ -578,19 +679,11 @@ class ProxyList(NodeList):
 
 
 class SpaceProxyList(ProxyList):
-    def __init__(self, node_list=None, parent=None, on_attribute=None):
-        from .nodes import SpaceNode
-
-        self.middle_separator = SpaceNode()
-        super().__init__(node_list, parent=parent, on_attribute=on_attribute)
+    separator_baron_type = "space"
 
 
 class CommaProxyList(ProxyList):
-    def __init__(self, node_list=None, parent=None, on_attribute=None):
-        from .nodes import CommaNode
-
-        self.middle_separator = CommaNode()
-        super().__init__(node_list, parent=parent, on_attribute=on_attribute)
+    separator_baron_type = "comma"
 
     def remove_endl(self, item):
         if item.displayable_next:
@@ -603,12 +696,7 @@ class CommaProxyList(ProxyList):
 class DotProxyList(ProxyList):
     strict_separator = False
     auto_separator = True
-
-    def __init__(self, node_list=None, parent=None, on_attribute=None):
-        from .nodes import DotNode
-
-        self.middle_separator = DotNode()
-        super().__init__(node_list, parent=parent, on_attribute=on_attribute)
+    separator_baron_type = "dot"
 
     def reformat(self, force_separator=False):
         from .nodes import CallNode, GetitemNode, ListNode, TupleNode
@@ -634,12 +722,11 @@ class LineProxyList(ProxyList):
     strict_separator = False
     auto_separator = False
     trailing_separator = True
+    separator_baron_type = "endl"
 
-    def __init__(self, node_list=None, parent=None, on_attribute=None):
-        from .nodes import EndlNode
 
-        self.middle_separator = EndlNode()
-        super().__init__(node_list, parent=parent, on_attribute=on_attribute)
+def _is_indented_code(value):
+    return value.lstrip("\n").startswith(" ")
 
 
 class CodeProxyList(LineProxyList):
@@ -648,6 +735,7 @@ class CodeProxyList(LineProxyList):
             return False
         return isinstance(node, self.separator_type)
 
+    @journaled
     def consume_leftover_indentation(self):
         if not self.footer:
             return ""
@@ -666,6 +754,7 @@ class CodeProxyList(LineProxyList):
 
         return self.parent.el_indentation
 
+    @journaled
     def _insert(self, index, item):
         from .nodes import EmptyLineNode
 
@@ -707,17 +796,48 @@ class CodeProxyList(LineProxyList):
 
         return [[el, None]]
 
+    def _values_to_data(self, values):
+        """
+        el_to_data() for several values, runs of code strings being parsed
+        at once like they would be in a file instead of one by one.
+        """
+        from .node_mixin import IndentedCodeBlockMixin
+
+        # Inline code blocks only take one line at a time
+        joinable = bool(self.header) or not isinstance(self.parent, IndentedCodeBlockMixin)
+
+        data = []
+        run = []
+        for value in values:
+            if (
+                run
+                and isinstance(value, str)
+                and run[-1].endswith("\n")
+                and _is_indented_code(value) == _is_indented_code(run[0])
+            ):
+                run.append(value)
+                continue
+
+            if run:
+                data += self.el_to_data("".join(run))
+            if joinable and isinstance(value, str):
+                run = [value]
+            else:
+                run = []
+                data += self.el_to_data(value)
+
+        if run:
+            data += self.el_to_data("".join(run))
+        return data
+
+    @journaled
     def __setitem__(self, key, value):
         # Single element, make a one element slice
         if not isinstance(key, slice):
             key = slice(key, key + 1)
             value = [value]
 
-        nodes = []
-        for node_list_to_convert in value:
-            nodes += self.el_to_data(node_list_to_convert)
-
-        self._data[key] = nodes
+        self._data[key] = self._values_to_data(value)
         self._synchronise()
 
     def hide(self, item):
@@ -748,6 +868,73 @@ class CodeProxyList(LineProxyList):
 
         return not isinstance(el, CodeBlockMixin)
 
+    def line_groups(self, line=1):
+        """
+        Split the elements in groups of whole lines, given the line the
+        block starts on.
+
+        Yield (start, end, first_line, code) tuples, start and end being
+        indexes in _data. A compound statement is a single group.
+        """
+        line += sum(sep.dumps().count("\n") for sep in self.header)
+        start = 0
+        code = ""
+        for index, (node, sep) in enumerate(self._data):
+            if not node.hidden:
+                code += node.indentation + "".join(node._iter_dumps())
+            if sep is not None:
+                code += sep.dumps()
+
+            if code.endswith("\n") or index == len(self._data) - 1:
+                yield start, index + 1, line, code
+                line += code.count("\n")
+                start = index + 1
+                code = ""
+
+    @journaled
+    def reparse_region(self, start, end, code):
+        """
+        Replace _data[start:end] with the parsed code, code being whole lines
+        rendered at the indentation of the block.
+
+        Return the new nodes or None if the code can not be parsed as
+        elements of this block on its own.
+        """
+        from .nodes import CommentNode, EmptyLineNode
+
+        indentation = self.el_indentation
+        lines = code.split("\n")
+        # Dedented lines belong to an enclosing block
+        if any(line.strip(" ") and not line.startswith(indentation) for line in lines):
+            return None
+
+        try:
+            fst = self.parent._parse_value("\n".join(line[len(indentation) :] for line in lines))
+        except baron.BaronError:
+            return None
+        data = self.el_to_data(fst)
+
+        rendered = ""
+        for node, sep in data:
+            # Over indented statements would be an indentation error
+            starts_line = not rendered or rendered.endswith("\n")
+            if starts_line and node.indentation != indentation and not isinstance(node, EmptyLineNode):
+                return None
+            rendered += node.dumps()
+            if sep is not None:
+                rendered += sep.dumps()
+        if rendered != code:
+            return None
+
+        if self.parent.parent is not None:
+            remaining = self._data[:start] + data + self._data[end:]
+            if all(isinstance(node, (CommentNode, EmptyLineNode)) for node, _ in remaining):
+                return None
+
+        self._data[start:end] = data
+        self._synchronise()
+        return [node for node, _ in data if not isinstance(node, EmptyLineNode)]
+
 
 class DictProxyList(CommaProxyList):
     def el_to_node(self, el):
@@ -798,7 +985,7 @@ class ImportsProxyList(CommaProxyList):
                     header_len = 1
                 elif isinstance(self.header[-2], LeftParenthesisNode) and isinstance(self.header[-1], EndlNode):
                     return self.indent_unit
-            return (header_len + self.box.top_left.column - 1) * " "
+            return (header_len + self._column()) * " "
 
         # If list is empty, then first element will be inline
         return ""
@@ -834,14 +1021,21 @@ class ContextsProxyList(CommaProxyList):
         return Node.generic_from_fst(fst, parent=self)
 
 
+@lru_cache(maxsize=256)
+def _decorator_fst(code):
+    "The same decorators tend to be added over and over"
+    # We add @pre decorator in case code is a comment
+    return baron.parse(f"@pre\n{code}\ndef a():\n pass")[0]["decorators"][2]
+
+
 class DecoratorsProxyList(LineProxyList):
     auto_separator = True
 
     def el_to_node(self, el):
-        # We add @pre decorator in case el is a comment
-        fst = baron.parse(f"@pre\n{el}\ndef a():\n pass")[0]["decorators"][2]
+        fst = copy.deepcopy(_decorator_fst(str(el)))
         return Node.generic_from_fst(fst, parent=self)
 
+    @journaled
     def _data_to_node_list(self):
         # Remove indentation as it is always handled by the def node
         for el, _ in self._data:
@@ -1,16 +1,29 @@
 from __future__ import annotations
 
+import mmap
+import os
+import re
 from typing import TYPE_CHECKING
 
-from .base_nodes import Node
-from .node_mixin import CodeBlockMixin, ValueIterableMixin
+from .base_nodes import Node, NodeList
+from .journal import start_journal
+from .node_mixin import CodeBlockMixin, ScopeMixin, ValueIterableMixin
+from .proxy_list import CodeProxyList
+from .utils import decode_source, detect_newline, has_mixed_newlines
 
 if TYPE_CHECKING:
     from baron import BaronFST
 
+# Files bigger than this are decoded straight from a memory map
+MMAP_THRESHOLD = 1024 * 1024
 
-class RedBaron(CodeBlockMixin, ValueIterableMixin, Node):
+
+class RedBaron(ScopeMixin, CodeBlockMixin, ValueIterableMixin, Node):
     baron_type = "root"
+    encoding = "utf-8"
+    # None when the source mixes new line styles
+    newline: str | None = "\n"
+    _journal = None
 
     def _default_fst(self) -> BaronFST:
         return {"type": "root", "value": []}
@@ -19,6 +32,172 @@ class RedBaron(CodeBlockMixin, ValueIterableMixin, Node):
         super().__init__()
         self.value = source_code
 
+    @classmethod
+    def from_bytes(cls, source: bytes | bytearray | mmap.mmap) -> RedBaron:
+        """
+        Parse encoded source code.
+
+        The encoding is detected following PEP 263 and kept along with the
+        new line style so that to_bytes() gives back the same kind of file.
+        The new lines of a source mixing styles are left as they are.
+        """
+        source_code, encoding = decode_source(source)
+        red = cls(source_code)
+        red.encoding = encoding
+        red.newline = None if has_mixed_newlines(source_code) else detect_newline(source_code)
+        return red
+
+    @classmethod
+    def from_path(cls, path: str | os.PathLike[str]) -> RedBaron:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < MMAP_THRESHOLD:
+                return cls.from_bytes(f.read())
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as source:
+                return cls.from_bytes(source)
+
+    def __getstate__(self):
+        "Pickle and copy the tree without its snapshots and its token index"
+        state = super().__getstate__()
+        state.pop("_journal", None)
+        state.pop("_token_index", None)
+        return state
+
+    def to_bytes(self) -> bytes:
+        "Dumps the code encoded like the source given to from_bytes() or from_path()"
+        source_code = self.dumps()
+        if self.newline is not None and self.newline != "\n":
+            # Inserted code always uses \n
+            source_code = re.sub(r"\r?\n", self.newline, source_code)
+        return source_code.encode(self.encoding)
+
+    def snapshot(self):
+        """
+        Return a snapshot of the current state of the tree for restore().
+
+        Taking the first snapshot starts journaling the modifications made
+        to the tree, so restoring only undoes what changed since then.
+        """
+        if self._journal is None:
+            # Not a modification of the tree
+            self.__dict__["_journal"] = start_journal(self)
+        return self._journal.snapshot()
+
+    def restore(self, snapshot) -> None:
+        "Undo all the modifications made since the snapshot was taken"
+        if self._journal is None:
+            raise ValueError("No snapshot taken")
+        self._journal.restore(snapshot)
+
+    def drop_snapshots(self) -> None:
+        "Stop journaling modifications, all snapshots become invalid"
+        self.__dict__.pop("_journal", None)
+
+    def changes(self, snapshot=None) -> list[tuple[tuple[int, int], tuple[int, int], str]]:
+        """
+        Text edits turning the code at the time of the snapshot into the
+        current code, defaults to the first snapshot.
+
+        Return a sorted list of (start, end, replacement), start and end
+        being (line, column) positions in the code of the snapshot, the end
+        being excluded like in reparse_range(). Only the modified nodes are
+        rendered to compute them.
+        """
+        if self._journal is None:
+            raise ValueError("No snapshot taken")
+        if snapshot is None:
+            snapshot = self._journal.snapshots[0]
+        from .changes import changes_since
+
+        return changes_since(self, self._journal, snapshot)
+
+    def rename(self, binding: Node, new_name: str) -> list[Node]:
+        """
+        Rename a variable everywhere it is bound or read, taking shadowing
+        into account, binding being one of its names or a node binding it,
+        e.g. a def, an argument or an import of a single name. See
+        scopes.rename().
+        Return the modified nodes.
+        """
+        if binding.root is not self:
+            raise ValueError("The binding belongs to another tree")
+        from .scopes import rename
+
+        return rename(binding, new_name)
+
+    def reparse_range(self, start: tuple[int, int], end: tuple[int, int], new_text: str) -> list[Node]:
+        """
+        Replace the code between the start and end positions with new_text.
+
+        Positions are (line, column) tuples like in find_by_position(), the
+        end being excluded. Only the statements touched by the edit, in the
+        innermost block that can hold the new code, are parsed again: the
+        other nodes of the tree are kept as they are.
+        Return the new nodes.
+        """
+        if tuple(end) < tuple(start):
+            raise ValueError(f"End {end} is before start {start}")
+
+        first_line = start[0]
+        # An edit ending at the start of a line does not touch that line
+        last_line = end[0] - 1 if end[1] == 1 and end[0] > start[0] else end[0]
+
+        for code_list, groups, first, last in reversed(self._edited_blocks(first_line, last_line)):
+            while True:
+                block_line = groups[first][2]
+                code = "".join(group[3] for group in groups[first : last + 1])
+                code = code[: _offset(code, start, block_line)] + new_text + code[_offset(code, end, block_line) :]
+                # The edit joined the last line with the next one
+                if code and not code.endswith("\n") and last + 1 < len(groups):
+                    last += 1
+                    continue
+                break
+
+            if code.endswith("\n") or code_list is self.value:
+                nodes = code_list.reparse_region(groups[first][0], groups[last][1], code)
+                if nodes is not None:
+                    return nodes
+
+        # e.g. edit in the leading empty lines of the file
+        code = self.dumps()
+        code = code[: _offset(code, start, 1)] + new_text + code[_offset(code, end, 1) :]
+        self.value = code
+        return list(self.value)
+
+    def _edited_blocks(self, first_line, last_line):
+        """
+        Find the code blocks enclosing the edited lines, from the root to
+        the innermost one.
+
+        Return a list of (code_list, groups, first, last) tuples, groups
+        being the line_groups() of the block and first and last the indexes
+        of the groups holding the first and last edited lines.
+        """
+        blocks = []
+        code_list = self.value
+        # No need to render the rest of the file
+        groups = list(_take_groups(code_list.line_groups(), last_line))
+        while code_list is not None and groups:
+            first = _find_group(groups, first_line)
+            last = _find_group(groups, last_line)
+            if first is None:
+                break
+            blocks.append((code_list, groups, first, last))
+
+            start, end, line, _ = groups[first]
+            code_list = None
+            # Only go down into a compound statement holding all the edited lines
+            if first != last or end - start != 1:
+                break
+            for block, block_line in _iter_code_blocks(blocks[-1][0]._data[start][0], line):
+                block_groups = list(block.line_groups(block_line))
+                if block_groups and block_groups[0][2] <= first_line and last_line < _end_line(block_groups[-1]):
+                    code_list, groups = block, block_groups
+                    break
+
+        return blocks
+
     @property
     def indentation(self) -> str:
         return ""
@@ -31,3 +210,77 @@ class RedBaron(CodeBlockMixin, ValueIterableMixin, Node):
     @property
     def value_on_new_line(self) -> bool:
         return True
+
+
+def _iter_code_blocks(node, line):
+    "Yield the multi-line code blocks of a compound statement along with the line they start on"
+    for kind, key, dependent in node._baron_attributes():
+        if not node._is_rendered(dependent):
+            continue
+
+        if kind == "constant":
+            code = key
+        elif kind == "string":
+            code = getattr(node, key)
+        else:
+            value = getattr(node, key)
+            if kind == "key" and not value:
+                continue
+            if isinstance(value, CodeProxyList) and value.header:
+                yield value, line
+            elif isinstance(value, CodeBlockMixin):
+                # e.g. else or finally clause
+                yield from _iter_code_blocks(value, line)
+            elif isinstance(value, CodeProxyList) or type(value) is NodeList:
+                # e.g. if/elif/else or except clauses
+                clause_line = line
+                for clause in value.node_list:
+                    if isinstance(clause, CodeBlockMixin):
+                        yield from _iter_code_blocks(clause, clause_line)
+                    if not clause.hidden:
+                        clause_line += "".join(clause._iter_dumps()).count("\n")
+            code = "".join(node._iter_dumps_attribute(key, value))
+
+        line += code.count("\n")
+
+
+def _take_groups(groups, last_line):
+    "Take the groups up to the line, and the one after it in case the edit joins them"
+    for group in groups:
+        yield group
+        if _end_line(group) > last_line:
+            next_group = next(groups, None)
+            if next_group is not None:
+                yield next_group
+            return
+
+
+def _end_line(group):
+    "Line following a group from CodeProxyList.line_groups()"
+    _, _, line, code = group
+    return line + code.count("\n") + (not code.endswith("\n"))
+
+
+def _find_group(groups, line):
+    if line < groups[0][2]:
+        return None
+    for index, group in enumerate(groups):
+        if line < _end_line(group):
+            return index
+    # Past the end of the file
+    return len(groups) - 1
+
+
+def _offset(code, position, line):
+    "Offset in code of a (line, column) position, code starting at the given line"
+    line_no, column = position
+    offset = 0
+    for _ in range(line_no - line):
+        offset = code.find("\n", offset) + 1
+        if not offset:
+            raise ValueError(f"Position {position} is out of the code")
+
+    line_end = code.find("\n", offset)
+    if not 0 < column <= (len(code) if line_end == -1 else line_end) - offset + 1:
+        raise ValueError(f"Position {position} is out of the code")
+    return offset + column - 1
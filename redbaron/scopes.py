@@ -0,0 +1,506 @@
+"""
+Symbol tables of the scopes of a tree.
+
+The nodes opening a scope, RedBaron, def, class, lambda and the
+comprehensions, have a scope property: the Scope of the names bound and
+used in the code of the scope, excluding the nested scopes. A scope table
+is built the first time it is needed and kept on its node, so that
+finding where a name is bound, or all the uses of a variable, are lookups
+in the tables instead of walks of the tree.
+
+The parts of a scope node evaluated where it is defined, the name, the
+decorators, the default values and annotations of the arguments, the
+bases of a class and the first iterable of a comprehension, belong to the
+enclosing scope.
+
+Building a table watches its tree, see journal.watch(): modifying the
+tree, including the string attributes like the value of a name, drops
+the tables of the scopes that may contain the modification, see
+journal.drop_caches().
+"""
+
+from __future__ import annotations
+
+import builtins
+import re
+from keyword import iskeyword
+
+from . import journal
+from .base_nodes import Node, NodeList
+from .node_mixin import ScopeMixin
+
+# Targets of a list or a tuple being assigned are assigned too
+_TARGET_CONTAINERS = frozenset({"tuple", "list", "associative_parenthesis", "star_expression", "list_argument"})
+# Attributes of the nodes binding names
+_BINDING_KEYS = {
+    "assignment": "target",
+    # The target of a loop is its iterable
+    "for": "iterator",
+    "with_context_item": "as",
+    "except": "target",
+    "except_star": "target",
+    "named_expr": "target",
+    "pattern_as": "target",
+}
+
+
+class Scope:
+    """
+    Symbol table of a scope.
+
+    bindings maps the names bound in the scope to the nodes binding them, in
+    the order of the code: the names assigned, the arguments, def and class
+    nodes, dotted_as_name and name_as_name nodes of the imports. uses maps
+    the names to the name nodes reading them. A name bound in a scope is a
+    variable of the scope, unless it is declared global or nonlocal.
+    fstrings lists the f-strings of the scope, whose code isn't parsed.
+
+    A Scope is a snapshot of the tree, get it again from the scope property
+    of its node after modifying the tree.
+    """
+
+    def __init__(self, node):
+        self.node = node
+        self.bindings = {}
+        self.uses = {}
+        # Names of global and nonlocal statements, and their name nodes
+        self.declarations = {}
+        self.global_names = set()
+        self.nonlocal_names = set()
+        self.fstrings = []
+        # Scope nodes directly nested in this scope
+        self.children = []
+        # id(name node) -> name node, for each name referring to a variable
+        self._names = {}
+
+    def __repr__(self):
+        return f"<Scope of {self.node.baron_type} {sorted(self.bindings)}>"
+
+    @property
+    def parent(self):
+        "Scope enclosing this one, None for the module"
+        return scope_of(self.node)
+
+    def refers_to_variable(self, name_node):
+        "Whether name_node is a name of a variable of this scope table, not an attribute or a keyword"
+        return self._names.get(id(name_node)) is name_node
+
+    def resolve(self, name):
+        """
+        Scope of the variable that name refers to in this scope. Names not
+        bound in the enclosing functions are resolved to the module, even
+        when they aren't bound there, e.g. builtins. None when there is no
+        such scope, e.g. for a nonlocal name without binding.
+        """
+        if name in self.global_names:
+            return self._module()
+        is_nonlocal = name in self.nonlocal_names
+        if not is_nonlocal and (name in self.bindings or self.node.baron_type == "root"):
+            return self
+
+        scope = self.parent
+        while scope is not None:
+            kind = scope.node.baron_type
+            if kind == "root":
+                return None if is_nonlocal else scope
+            # Names bound in class bodies aren't visible from nested scopes
+            if kind != "class":
+                if name in scope.global_names:
+                    return scope._module()
+                if name in scope.bindings and name not in scope.nonlocal_names:
+                    return scope
+            scope = scope.parent
+        return None
+
+    def find_bindings(self, name):
+        "Nodes binding the variable that name refers to in this scope"
+        return self._variable_nodes(name, "bindings")
+
+    def find_uses(self, name):
+        "Name nodes reading the variable that name refers to in this scope"
+        return self._variable_nodes(name, "uses")
+
+    def walk(self):
+        "This scope and the nested scopes, depth first"
+        yield self
+        for node in self.children:
+            yield from scope_table(node).walk()
+
+    def variable_scopes(self, name, other=None):
+        """
+        Yield the scopes, this one and the nested ones, in which name refers
+        to the variable of this scope, along with whether other, another
+        name, would refer to this scope there too, i.e. isn't bound in
+        between. The tables are computed top down instead of resolving
+        the name in each scope.
+        """
+        in_module = self.node.baron_type == "root"
+
+        def visit(scope, reaches, other_reaches, passing):
+            if reaches:
+                yield scope, other_reaches
+            # Names bound in class bodies aren't visible from nested scopes
+            if scope.node.baron_type != "class":
+                passing = (reaches, other_reaches)
+            # Only global declarations get past a function not seeing the variable
+            if not passing[0] and not in_module:
+                return
+            for node in scope.children:
+                child = scope_table(node)
+                yield from visit(
+                    child,
+                    _reaches(child, name, passing[0], in_module),
+                    _reaches(child, other, passing[1], in_module),
+                    passing,
+                )
+
+        yield from visit(self, True, True, (False, True))
+
+    def _variable_nodes(self, name, table):
+        target = self.resolve(name)
+        if target is None:
+            return []
+
+        nodes = []
+        for scope, _ in target.variable_scopes(name):
+            nodes += getattr(scope, table).get(name, ())
+        return nodes
+
+    def _module(self):
+        scope = self
+        while scope.parent is not None:
+            scope = scope.parent
+        return scope if scope.node.baron_type == "root" else None
+
+    def _bind(self, name, node):
+        self.bindings.setdefault(name, []).append(node)
+
+    def _name(self, name_node, store=False):
+        name = name_node.value
+        self._names[id(name_node)] = name_node
+        if store:
+            self._bind(name, name_node)
+        else:
+            self.uses.setdefault(name, []).append(name_node)
+
+    def _build(self):
+        node = self.node
+        kind = node.baron_type
+        if kind in ("def", "lambda"):
+            for argument in node.arguments:
+                self._visit_argument(argument, inner=True)
+            self._visit(node.value)
+        elif kind in ("root", "class"):
+            self._visit(node.value)
+        else:
+            for i, loop in enumerate(node.generators):
+                self._visit(loop.iterator, store=True)
+                # The first iterable is evaluated in the enclosing scope
+                if i:
+                    self._visit(loop.target)
+                self._visit(loop.ifs)
+            self._visit(node.result)
+
+    def _visit_argument(self, argument, inner):
+        kind = argument.baron_type
+        if kind == "def_argument":
+            if inner:
+                self._visit(argument.target, store=True)
+            else:
+                self._visit(getattr(argument, "annotation", None))
+                self._visit(argument.value)
+        elif kind in ("list_argument", "dict_argument"):
+            if inner:
+                self._visit(argument.value, store=True)
+            else:
+                self._visit(getattr(argument, "annotation", None))
+
+    def _visit_nested(self, node):
+        "Parts of a nested scope node evaluated in this scope"
+        self.children.append(node)
+        kind = node.baron_type
+        if kind in ("def", "class"):
+            self._bind(node.name, node)
+            self._visit(node.decorators)
+        if kind == "def":
+            for argument in node.arguments:
+                self._visit_argument(argument, inner=False)
+            self._visit(node.return_annotation)
+        elif kind == "class":
+            self._visit(node.inherit_from)
+        elif kind == "lambda":
+            for argument in node.arguments:
+                self._visit_argument(argument, inner=False)
+        else:
+            self._visit(node.generators[0].target)
+
+    def _visit(self, node, store=False):
+        if not node:
+            return
+        if isinstance(node, NodeList):
+            for child in node.node_list:
+                self._visit(child, store)
+            return
+
+        kind = node.baron_type
+        if kind == "name":
+            self._name(node, store)
+        elif isinstance(node, ScopeMixin):
+            self._visit_nested(node)
+        elif kind == "atomtrailers":
+            # The names after the first one are attributes
+            for i, child in enumerate(node.value.node_list):
+                if i == 0 or child.baron_type != "name":
+                    self._visit(child)
+        elif kind == "dotted_name":
+            self._visit(node.value.node_list[0])
+        elif kind == "call_argument":
+            self._visit(node.value)
+        elif kind == "import":
+            for dotted in node.value:
+                if dotted.baron_type == "dotted_as_name":
+                    name = dotted.target or dotted.value.node_list[0].value
+                    self._bind(name, dotted)
+        elif kind == "from_import":
+            for name_as_name in node.targets:
+                if name_as_name.baron_type == "name_as_name":
+                    self._bind(name_as_name.target or name_as_name.value, name_as_name)
+        elif kind in ("interpolated_string", "interpolated_raw_string"):
+            self.fstrings.append(node)
+        elif kind in ("global", "nonlocal"):
+            declared = self.global_names if kind == "global" else self.nonlocal_names
+            for name_node in node.value:
+                name = name_node.value
+                declared.add(name)
+                self.declarations.setdefault(name, []).append(name_node)
+                self._names[id(name_node)] = name_node
+        elif kind == "assignment" and node.operator:
+            # Augmented assignments read their target too
+            self._visit(node.target)
+            self._visit_attributes(node, "target")
+        else:
+            self._visit_attributes(node, _BINDING_KEYS.get(kind), store and kind in _TARGET_CONTAINERS)
+
+    def _visit_attributes(self, node, binding_key=None, store=False):
+        for kind, key, _ in node._baron_attributes():
+            if kind == "string" and key == binding_key:
+                # e.g. the target of an as pattern
+                name = getattr(node, key)
+                if name:
+                    self._bind(name, node)
+            elif kind in ("key", "list"):
+                self._visit(getattr(node, key), store or key == binding_key)
+
+
+def _reaches(scope, name, from_enclosing, in_module):
+    """
+    Whether name refers to a variable of an enclosing scope in scope,
+    from_enclosing telling whether it does in the enclosing scope
+    """
+    if name in scope.global_names:
+        return in_module
+    if name in scope.nonlocal_names:
+        return from_enclosing and not in_module
+    if name in scope.bindings:
+        return False
+    return from_enclosing
+
+
+def scope_table(node):
+    "Scope of a scope node, built if needed"
+    table = node.__dict__.get("_scope_table")
+    if table is not None:
+        return table
+
+    # For the modifications of the tree to drop the table
+    journal.watch(node.root)
+    table = Scope(node)
+    table._build()
+    # Not a modification of the tree, kept out of the journal
+    node.__dict__["_scope_table"] = table
+    return table
+
+
+def scope_of(node):
+    "Scope in which node is, None if there is none, e.g. for a root"
+    path = [node]
+    parent = node.__dict__.get("parent")
+    while parent is not None:
+        if parent._scope_covers is not None and parent._scope_covers(path):
+            return scope_table(parent)
+        path.append(parent)
+        parent = parent.__dict__.get("parent")
+    return None
+
+
+def variable_of(node):
+    """
+    (scope, name) of the variable of node, a name node, a node binding a
+    name, see Scope.bindings, an argument of a function or an import of a
+    single name. Raise ValueError if there is none.
+    """
+    kind = node.baron_type
+    if kind in ("def_argument", "list_argument", "dict_argument"):
+        return variable_of(node.target if kind == "def_argument" else node.value)
+    if kind in ("import", "from_import"):
+        targets = node.value if kind == "import" else node.targets
+        if len(targets) != 1:
+            raise ValueError(f"{node.dumps()!r} binds several names, give the one to rename")
+        return variable_of(targets[0])
+
+    scope = scope_of(node)
+    if kind == "name":
+        if scope is None or not scope.refers_to_variable(node):
+            raise ValueError(f"{node.value!r} isn't the name of a variable")
+        name = node.value
+    elif kind in ("def", "class"):
+        name = node.name
+    elif kind == "dotted_as_name":
+        name = node.target or node.value.node_list[0].value
+    elif kind == "name_as_name":
+        name = node.target or node.value
+    else:
+        raise ValueError(f"A {kind} node doesn't bind any name")
+
+    variable_scope = scope.resolve(name) if scope is not None else None
+    if variable_scope is None:
+        raise ValueError(f"{name!r} isn't bound in the tree")
+    return variable_scope, name
+
+
+def _keywords(function, name):
+    "Name nodes of the keyword arguments name of the calls of function by its name"
+    scope = scope_of(function)
+    if scope is None:
+        return []
+
+    keywords = []
+    for use in scope.find_uses(function.name):
+        # use.parent is a proxy list for the first name of an atomtrailers
+        atomtrailers = use.parent.parent if use.parent is not None else None
+        if not isinstance(atomtrailers, Node) or atomtrailers.baron_type != "atomtrailers":
+            continue
+        trailers = atomtrailers.value.node_list
+        if trailers[0] is not use or len(trailers) < 2 or trailers[1].baron_type != "call":
+            continue
+        for argument in trailers[1].value:
+            if argument.baron_type == "call_argument" and argument.target and argument.target.value == name:
+                keywords.append(argument.target)
+    return keywords
+
+
+def _in_fstring(fstring, name):
+    "Whether name may be read in the replacement fields of an f-string"
+    code = fstring.value.replace("{{", "").replace("}}", "")
+    pattern = re.compile(rf"(?<![\w.]){re.escape(name)}(?!\w)")
+    return any(pattern.search(field) for field in re.findall(r"\{([^{}]*)", code))
+
+
+def _imported_name(node):
+    "Name bound by an import without as"
+    if node.baron_type == "name_as_name":
+        return node.value
+    names = node.value.node_list
+    return names[0].value if len(names) == 1 else None
+
+
+def _mixed_class_reads(variable_scope, name, new_name):
+    """
+    (class scope, name) of a class body reading a name that it binds too,
+    where the reads may be of the variable being renamed, None if there
+    is none: class bodies look their names up in the class, then in the
+    module, whichever binds them when they are read.
+    """
+    module = variable_scope._module()
+    if variable_scope is module:
+        reads = [
+            (scope, read) for scope in module.walk() if scope.node.baron_type == "class" for read in (name, new_name)
+        ]
+    elif variable_scope.node.baron_type == "class" and (
+        (module is not None and name in module.bindings) or hasattr(builtins, name)
+    ):
+        reads = [(variable_scope, name)]
+    else:
+        return None
+
+    for scope, read in reads:
+        if read in scope.bindings and read in scope.uses and read not in scope.global_names | scope.nonlocal_names:
+            return scope, read
+    return None
+
+
+def rename(binding, new_name):
+    """
+    Rename the variable of binding, see variable_of(), where it is bound,
+    read and declared global or nonlocal, along with the keywords of the
+    calls of a function by its name when it is one of its arguments.
+
+    The names are found in the scope tables and their values replaced,
+    without parsing anything. Raise ValueError, before modifying anything,
+    when new_name would refer to another variable where the variable is
+    used, or when another variable would be renamed by the way. As the
+    code of f-strings isn't parsed, ValueError is raised too when one of
+    them may read either name where the variable is, and so is it when a
+    class body reads one of the names while binding it, as the reads may
+    be of either the class or the module variable.
+    Return the modified nodes.
+    """
+    if not new_name.isidentifier() or iskeyword(new_name):
+        raise ValueError(f"{new_name!r} isn't a valid name")
+    variable_scope, name = variable_of(binding)
+    if new_name == name:
+        return []
+
+    mixed = _mixed_class_reads(variable_scope, name, new_name)
+    if mixed is not None:
+        scope, read = mixed
+        raise ValueError(f"The reads of {read!r} in {scope!r} may be of the class or of the module variable")
+
+    nodes = []
+    for scope, new_name_reaches in variable_scope.variable_scopes(name, new_name):
+        tables = (scope.bindings, scope.uses, scope.declarations)
+        has_name = any(name in table for table in tables)
+        has_new_name = any(new_name in table for table in tables)
+        if name in scope.global_names or name in scope.nonlocal_names:
+            # Declared again under the new name
+            conflict = has_new_name
+        else:
+            conflict = (has_name and not new_name_reaches) or (has_new_name and new_name_reaches)
+        if conflict:
+            raise ValueError(
+                f"Renaming {name!r} to {new_name!r} would mix it up with another {new_name!r} in {scope!r}"
+            )
+        for fstring in scope.fstrings:
+            if _in_fstring(fstring, name) or _in_fstring(fstring, new_name):
+                raise ValueError(f"Can't rename {name!r} to {new_name!r}, {fstring.value} may read them")
+        for table in tables:
+            nodes += table.get(name, ())
+
+    keywords = []
+    if variable_scope.node.baron_type == "def":
+        for node in nodes:
+            if node.parent is not None and node.parent.baron_type == "def_argument" and node.on_attribute == "target":
+                keywords = _keywords(variable_scope.node, name)
+                break
+    for keyword in keywords:
+        arguments = keyword.parent.parent
+        if any(
+            argument.baron_type == "call_argument" and argument.target and argument.target.value == new_name
+            for argument in arguments
+        ):
+            raise ValueError(f"A call of {variable_scope.node.name!r} has a {new_name!r} keyword already")
+
+    for node in nodes:
+        if node.baron_type in ("dotted_as_name", "name_as_name") and not node.target and _imported_name(node) is None:
+            raise ValueError(f"Can't rename the {name!r} of {node.dumps()!r}, it binds a package")
+
+    for node in nodes + keywords:
+        kind = node.baron_type
+        if kind == "name":
+            node.value = new_name
+        elif kind in ("def", "class"):
+            node.name = new_name
+        else:
+            # import name as new_name, or just import name
+            node.target = "" if new_name == _imported_name(node) else new_name
+    return nodes + keywords
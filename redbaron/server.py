@@ -0,0 +1,244 @@
+"""
+Resident query server keeping the trees of a code base in memory.
+
+    python -m redbaron.server src/ --socket /tmp/redbaron.sock
+
+The python files under the directory are parsed once, and then parsed
+again only when their modification time or size changes, the files being
+checked in a background thread. Each tree comes with an index of its
+nodes by type, so that a find_all() query only looks at the nodes of the
+types matching its identifier instead of walking every tree.
+
+The server listens on a Unix socket. Each request is a line of JSON and
+gets a line of JSON as its response:
+
+    {"command": "find_all", "identifier": "def", "args": ["g:test_*"], "kwargs": {}}
+    -> {"results": [{"path": "src/a.py", "line": 3, "column": 1, "type": "def"}, ...]}
+    {"command": "refresh"} -> {"changed": [...], "removed": [...]}
+    {"command": "stats"} -> {"files": 12, "nodes": 4242, "errors": {"src/b.py": "..."}}
+
+"code": true in a find_all request adds the code of the nodes to the
+results. See query() for a client.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import socket
+import socketserver
+import stat
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .node_path import positions_by_path
+from .redbaron import RedBaron
+from .utils import logger, python_files, stat_key
+
+
+class IndexedFile:
+    "Tree of a file along with its nodes indexed by type"
+
+    def __init__(self, path, stat_key):
+        self.path = path
+        self.stat_key = stat_key
+        self.tree = RedBaron.from_path(path)
+        # Nodes of each type, and the rank of each node, in the order of find_all()
+        self.types = {}
+        self.ranks = {}
+        for rank, node in enumerate(self.tree.find_iter(lambda _: True)):
+            self.types.setdefault(node.baron_type, []).append(node)
+            self.ranks[id(node)] = rank
+        # Computed along with the index for the queries not to wait for it
+        self.positions = positions_by_path(self.tree.fst())
+
+    def find_all(self, identifier, *args, **kwargs):
+        if isinstance(identifier, str) and not identifier.startswith("re:"):
+            identifier = identifier.lower()
+
+        candidates = []
+        for nodes in self.types.values():
+            node = nodes[0]
+            if node._attribute_match_query(node.generate_identifiers(), identifier):
+                candidates += nodes
+        if len(candidates) > 1:
+            candidates.sort(key=lambda node: self.ranks[id(node)])
+        return [node for node in candidates if node._node_match_query(node, identifier, *args, **kwargs)]
+
+    def position(self, node):
+        "(line, column) of the start of node"
+        return self.positions[tuple(node.path().to_baron_path())]
+
+
+class CodeBase:
+    "Indexed trees of the python files under a directory"
+
+    def __init__(self, root, max_workers=None):
+        self.root = root
+        self.max_workers = max_workers
+        self.files = {}
+        self.errors = {}
+        self._refresh_lock = threading.Lock()
+
+    def refresh(self):
+        """
+        Parse the files that were added or modified since the last refresh,
+        return (changed paths, removed paths).
+        """
+        with self._refresh_lock:
+            stat_keys = {}
+            for path in python_files(self.root):
+                try:
+                    stat_keys[path] = stat_key(path)
+                except OSError:
+                    continue
+
+            changed = [
+                path for path, key in stat_keys.items() if path not in self.files or self.files[path].stat_key != key
+            ]
+            changed = [path for path in changed if self.errors.get(path, (None,))[0] != stat_keys[path]]
+            removed = [path for path in list(self.files) + list(self.errors) if path not in stat_keys]
+
+            def index(path):
+                try:
+                    return IndexedFile(path, stat_keys[path])
+                except Exception as e:  # pylint: disable=broad-except
+                    return e
+
+            files = dict(self.files)
+            errors = dict(self.errors)
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                for path, indexed in zip(changed, executor.map(index, changed), strict=True):
+                    if isinstance(indexed, Exception):
+                        files.pop(path, None)
+                        errors[path] = (stat_keys[path], f"{type(indexed).__name__}: {indexed}")
+                    else:
+                        files[path] = indexed
+                        errors.pop(path, None)
+            for path in removed:
+                files.pop(path, None)
+                errors.pop(path, None)
+
+            # Replaced at once, queries running meanwhile use the previous trees
+            self.files, self.errors = files, errors
+            return changed, removed
+
+    def watch(self, interval=1.0):
+        "Refresh in a daemon thread every interval seconds, return an event stopping it"
+        stop = threading.Event()
+
+        def run():
+            while not stop.wait(interval):
+                try:
+                    self.refresh()
+                except Exception:  # pylint: disable=broad-except
+                    # e.g. the directory is gone for now, try again later
+                    logger.exception("Refreshing %s failed", self.root)
+
+        threading.Thread(target=run, daemon=True, name="redbaron-watch").start()
+        return stop
+
+    def find_all(self, identifier, *args, **kwargs):
+        "List of (indexed file, node) matching the query in all the files"
+        return [
+            (indexed, node) for indexed in self.files.values() for node in indexed.find_all(identifier, *args, **kwargs)
+        ]
+
+    def stats(self):
+        files = list(self.files.values())
+        return {
+            "files": len(files),
+            "nodes": sum(len(indexed.ranks) for indexed in files),
+            "errors": {path: message for path, (_, message) in self.errors.items()},
+        }
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                response = self.server.answer(json.loads(line))
+            except Exception as e:  # pylint: disable=broad-except
+                response = {"error": f"{type(e).__name__}: {e}"}
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class QueryServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, code_base):
+        self.code_base = code_base
+        super().__init__(socket_path, _RequestHandler)
+
+    def answer(self, request):
+        command = request.get("command")
+        if command == "find_all":
+            results = []
+            for indexed, node in self.code_base.find_all(
+                request["identifier"], *request.get("args", ()), **request.get("kwargs", {})
+            ):
+                line, column = indexed.position(node)
+                result = {"path": indexed.path, "line": line, "column": column, "type": node.baron_type}
+                if request.get("code"):
+                    result["code"] = node.dumps()
+                results.append(result)
+            return {"results": results}
+        if command == "refresh":
+            changed, removed = self.code_base.refresh()
+            return {"changed": changed, "removed": removed}
+        if command == "stats":
+            return self.code_base.stats()
+        raise ValueError(f"Unknown command {command!r}")
+
+
+def query(socket_path, request):
+    "Send a request to the server listening on socket_path, return its response"
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path)
+        with client.makefile("rwb") as stream:
+            stream.write(json.dumps(request).encode("utf-8") + b"\n")
+            stream.flush()
+            return json.loads(stream.readline())
+
+
+def _unlink_socket(path):
+    "Remove the socket at path if there is one, return False if there is something else"
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return True
+    if not stat.S_ISSOCK(mode):
+        return False
+    os.unlink(path)
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m redbaron.server", description="Keep the trees of the python files of a directory in memory"
+    )
+    parser.add_argument("root", help="directory of the python files")
+    parser.add_argument("--socket", default=".redbaron.sock", help="path of the Unix socket to listen on")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between checks for modified files")
+    options = parser.parse_args(argv)
+    # Left by a previous server
+    if not _unlink_socket(options.socket):
+        parser.error(f"{options.socket} exists and isn't a socket")
+
+    code_base = CodeBase(options.root)
+    code_base.refresh()
+    stop_watching = code_base.watch(options.interval)
+    try:
+        with QueryServer(options.socket, code_base) as server:
+            server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_watching.set()
+        _unlink_socket(options.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,19 @@
 from __future__ import annotations
 
-import importlib.util
+from functools import cache
 
-HAS_PYGMENTS = importlib.util.find_spec("pygments") is not None
+# pygments is only imported when highlighting for the first time, it takes
+# longer to import than redbaron itself
 
 
-if HAS_PYGMENTS:
-    from pygments import highlight
+@cache
+def _highlighting():
+    "(highlight, help lexer, python lexer, formatter), None without pygments"
+    try:
+        from pygments import highlight
+    except ImportError:
+        return None
+
     from pygments.formatters import TerminalTrueColorFormatter  # pylint: disable=no-name-in-module
     from pygments.lexer import RegexLexer, bygroups
     from pygments.lexers import PythonLexer  # pylint: disable=no-name-in-module
@@ -29,16 +36,28 @@ if HAS_PYGMENTS:
             ]
         }
 
-    def help_highlight(string: str) -> str:
-        return highlight(string, HelpLexer(), TerminalTrueColorFormatter(style="monokai"))[:-1]
-
-    def python_highlight(string: str) -> str:
-        return highlight(string, PythonLexer(), TerminalTrueColorFormatter(style="monokai"))[:-1]
+    return highlight, HelpLexer, PythonLexer, TerminalTrueColorFormatter
 
-else:
 
-    def help_highlight(string: str) -> str:
+def help_highlight(string: str) -> str:
+    highlighting = _highlighting()
+    if highlighting is None:
         return string
 
-    def python_highlight(string: str) -> str:
+    highlight, help_lexer, _, formatter = highlighting
+    return highlight(string, help_lexer(), formatter(style="monokai"))[:-1]
+
+
+def python_highlight(string: str) -> str:
+    highlighting = _highlighting()
+    if highlighting is None:
         return string
+
+    highlight, _, python_lexer, formatter = highlighting
+    return highlight(string, python_lexer(), formatter(style="monokai"))[:-1]
+
+
+def __getattr__(name):
+    if name == "HAS_PYGMENTS":
+        return _highlighting() is not None
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,1094 @@
+"""
+Conversion of a tree to the nodes of the ast module.
+
+The tree is walked once in rendering order, building the ast nodes from
+the nodes of the tree and keeping track of the position of the code they
+stand for, so that nothing is rendered as a whole and parsed again. The
+nodes that can't be converted, e.g. f-strings, are parsed on their own
+and moved where they are in the code.
+"""
+
+import ast
+
+import baron
+
+from .base_nodes import Node, NodeList
+from .node_mixin import _NOT_SIMPLE, _simple_literal_value
+from .proxy_list import CodeProxyList
+
+# Nodes that are only formatting
+_NO_AST = {
+    "comma",
+    "comment",
+    "dot",
+    "empty_line",
+    "endl",
+    "indentation",
+    "left_parenthesis",
+    "right_parenthesis",
+    "semicolon",
+    "space",
+}
+
+# Nodes that are part of another one and can't be parsed on their own
+_PARTS = {
+    "call",
+    "call_argument",
+    "comparison_operator",
+    "comprehension_if",
+    "comprehension_loop",
+    "decorator",
+    "def_argument",
+    "dict_argument",
+    "dictitem",
+    "dotted_as_name",
+    "dotted_name",
+    "elif",
+    "else",
+    "else_attribute",
+    "except",
+    "except_star",
+    "finally",
+    "getitem",
+    "if",
+    "kwargs_only_marker",
+    "list_argument",
+    "name_as_name",
+    "positional_only_marker",
+    "slice",
+    "star",
+    "with_context_item",
+}
+
+_OPERATIONS = {"binary_operator", "boolean_operator", "comparison", "unitary_operator"}
+
+_BINARY_OPERATORS = {
+    "|": (ast.BitOr, 5),
+    "^": (ast.BitXor, 6),
+    "&": (ast.BitAnd, 7),
+    "<<": (ast.LShift, 8),
+    ">>": (ast.RShift, 8),
+    "+": (ast.Add, 9),
+    "-": (ast.Sub, 9),
+    "*": (ast.Mult, 10),
+    "/": (ast.Div, 10),
+    "//": (ast.FloorDiv, 10),
+    "%": (ast.Mod, 10),
+    "@": (ast.MatMult, 10),
+    "**": (ast.Pow, 12),
+}
+_BOOLEAN_OPERATORS = {"or": (ast.Or, 1), "and": (ast.And, 2)}
+_UNARY_OPERATORS = {"not": (ast.Not, 3), "-": (ast.USub, 11), "+": (ast.UAdd, 11), "~": (ast.Invert, 11)}
+_COMPARISON_PRECEDENCE = 4
+_COMPARISON_OPERATORS = {
+    "<": ast.Lt,
+    ">": ast.Gt,
+    "==": ast.Eq,
+    "<=": ast.LtE,
+    ">=": ast.GtE,
+    "!=": ast.NotEq,
+    "<>": ast.NotEq,
+    "in": ast.In,
+    "not in": ast.NotIn,
+    "is": ast.Is,
+    "is not": ast.IsNot,
+}
+
+
+class Unsupported(Exception):
+    "Raised by the converters for the nodes they can't handle"
+
+
+class Parts:
+    "What a node is made of: its attributes converted, with the span of their code"
+
+    def __init__(self):
+        self.values = {}
+        self.spans = {}
+        self.keywords = {}
+        self.span = None
+
+    def pop(self, key):
+        return self.values.pop(key, None)
+
+    def add(self, key, value, span):
+        self.values[key] = value
+        self.spans[key] = span
+        if span is not None:
+            self.span = span if self.span is None else (self.span[0], span[1])
+
+    def left_over(self):
+        "Attributes that are not empty and were not used"
+        keys = []
+        for key, value in self.values.items():
+            if isinstance(value, list):
+                value = [result for _, result, _ in value if result is not None]
+            if value:
+                keys.append(key)
+        return keys
+
+
+class ListPart:
+    "Converted arguments of a call or subscript, to be put together by the atomtrailers"
+
+    def __init__(self, kind, value):
+        self.kind = kind
+        self.value = value
+
+
+def join_spans(first, last):
+    return (first[0], last[1])
+
+
+def locate(node, span):
+    "Give node the position of the code it stands for unless it already has one"
+    if span is not None and "lineno" in node._attributes and not hasattr(node, "lineno"):
+        (node.lineno, node.col_offset), (node.end_lineno, node.end_col_offset) = span
+    return node
+
+
+def set_context(node, context):
+    "Turn an expression into an assignment or deletion target"
+    if isinstance(node, (ast.Name, ast.Attribute, ast.Subscript)):
+        node.ctx = context()
+    elif isinstance(node, ast.Starred):
+        node.ctx = context()
+        set_context(node.value, context)
+    elif isinstance(node, (ast.Tuple, ast.List)):
+        node.ctx = context()
+        for element in node.elts:
+            set_context(element, context)
+    return node
+
+
+def statements(items):
+    body = []
+    for _, result, span in items:
+        if result is None:
+            continue
+        if isinstance(result, ast.expr):
+            result = locate(ast.Expr(value=result), span)
+        body.append(result)
+    return body
+
+
+def results(items):
+    "Converted elements of a node list, without the formatting"
+    return [(node, result, span) for node, result, span in items if result is not None]
+
+
+class AstBuilder:
+    """
+    Walk the tree from the rendering root down to target to convert it,
+    advancing the position over the code of everything else.
+
+    Positions are (line, column) tuples like in the ast module, the column
+    being an offset in bytes.
+    """
+
+    def __init__(self, target):
+        self.target = target
+        self.ancestors = set()
+        node = target
+        while node.parent is not None:
+            node = node.parent
+            self.ancestors.add(id(node))
+        self.root = node
+
+        self.position = (1, 0)
+        # Indentation of the new lines of the decorators
+        self.endl_indentation = None
+        # Span of the last comma
+        self.last_comma = None
+
+    def build(self):
+        found, result = self.walk(self.root)
+        if not found:
+            raise ValueError(f"{self.target!r} is not rendered")
+        if not isinstance(result, ast.AST):
+            raise ValueError(f"{self.target.baron_type} nodes have no ast equivalent")
+        return result
+
+    def walk(self, node):
+        "Return (found, ast of target)"
+        if node is self.target:
+            return True, self.visit(node)[0]
+
+        if id(node) not in self.ancestors:
+            self.skip(node)
+            return False, None
+
+        found = [False, None]
+
+        def visit(child):
+            if not found[0]:
+                found[:] = self.walk(child)
+            return None, None
+
+        if isinstance(node, NodeList):
+            self.visit_list(node, visit)
+        else:
+            for _ in self.iter_parts(node, visit):
+                if found[0]:
+                    break
+        return found
+
+    def advance(self, code):
+        line, column = self.position
+        newline = code.rfind("\n")
+        if newline == -1:
+            column += len(code) if code.isascii() else len(code.encode())
+        else:
+            line += code.count("\n")
+            column = len(code[newline + 1 :].encode())
+        self.position = (line, column)
+
+    def advance_over(self, code):
+        "Advance over code, return its span"
+        if not code:
+            return None
+        start = self.position
+        self.advance(code)
+        return (start, self.position)
+
+    def skip(self, node):
+        self.advance("".join(node._iter_dumps()))
+
+    def iter_parts(self, node, visit):
+        """
+        Walk the attributes of node in rendering order, calling visit on
+        its children.
+
+        Yield (kind, key, value, span) tuples, value being what visit
+        returned for the children.
+        """
+        for kind, key, dependent in node._baron_attributes():
+            if kind == "bool" or not node._is_rendered(dependent):
+                continue
+
+            if kind == "constant":
+                yield kind, key, key, self.advance_over(key)
+            elif kind == "string":
+                value = getattr(node, key)
+                yield kind, key, value, self.advance_over(value)
+            else:
+                value = getattr(node, key)
+                if kind == "key" and not value:
+                    yield kind, key, None, None
+                    continue
+                result, span = self.visit_attribute(node, key, value, visit)
+                yield kind, key, result, span
+
+    def visit_attribute(self, node, key, value, visit):
+        if type(node)._iter_dumps_attribute is Node._iter_dumps_attribute:
+            return visit(value)
+
+        code = "".join(node._iter_dumps_attribute(key, value))
+        if id(node) in self.ancestors and value is not self.target and id(value) not in self.ancestors:
+            self.advance(code)
+            return None, None
+
+        own_code = "".join(value._iter_dumps())
+        if code.startswith(own_code):
+            # e.g. indentation of the next clause
+            result = visit(value)
+            self.advance(code[len(own_code) :])
+            return result
+
+        # e.g. decorators are rendered with the indentation of the function
+        self.endl_indentation = node.indentation
+        return visit(value)
+
+    def visit_list(self, node_list, visit):
+        indentation, self.endl_indentation = self.endl_indentation, None
+        items = []
+        span = None
+        for node in node_list.node_list:
+            if node.hidden:
+                continue
+            if indentation is not None and node.baron_type == "endl":
+                self.advance(baron.dumps(dict(node.fst(), indent=indentation)))
+                continue
+
+            result, node_span = visit(node)
+            items.append((node, result, node_span))
+            if node_span is not None:
+                span = node_span if span is None else join_spans(span, node_span)
+        return items, span
+
+    def visit(self, node):
+        "Convert node, return (ast, span)"
+        if isinstance(node, NodeList):
+            return self.visit_list(node, self.visit)
+
+        baron_type = node.baron_type
+        if baron_type in _NO_AST:
+            code = "".join(node._iter_dumps())
+            if baron_type in ("left_parenthesis", "right_parenthesis"):
+                # Part of the statement
+                return None, self.advance_over(code)
+            if baron_type == "comma":
+                # A trailing comma is part of a tuple without parenthesis
+                self.last_comma = self.parts(node).keywords[","]
+                return None, None
+            self.advance(code)
+            return None, None
+
+        if baron_type in _OPERATIONS:
+            converter = AstBuilder.convert_operation
+        else:
+            converter = getattr(AstBuilder, f"convert_{baron_type}", None)
+        if converter is None:
+            if baron_type in _PARTS:
+                raise Unsupported(baron_type)
+            return self.parse(node)
+
+        position = self.position
+        try:
+            return converter(self, node)
+        except Unsupported:
+            if baron_type in _PARTS:
+                raise
+            self.position = position
+            return self.parse(node)
+
+    def parts(self, node):
+        parts = Parts()
+        for kind, key, value, span in self.iter_parts(node, self.visit):
+            if kind == "constant":
+                if span is not None:
+                    parts.keywords.setdefault(key, span)
+                    parts.span = span if parts.span is None else join_spans(parts.span, span)
+            else:
+                parts.add(key, value, span)
+        return parts
+
+    def parse(self, node):
+        "Convert node by parsing its code, for what the converters don't handle"
+        code = "".join(node._iter_dumps())
+        leading = len(code) - len(code.lstrip())
+        trailing = len(code.rstrip())
+        self.advance(code[:leading])
+        line, column = self.position
+        self.advance(code[leading:trailing])
+        span = ((line, column), self.position)
+        self.advance(code[trailing:])
+        code = code[leading:trailing]
+
+        # Padded so that the columns are the ones in the whole code
+        if isinstance(node.parent, CodeProxyList):
+            if column:
+                tree = ast.parse("if True:\n" + " " * column + code).body[0].body[0]
+                ast.increment_lineno(tree, line - 2)
+            else:
+                tree = ast.parse(code).body[0]
+                ast.increment_lineno(tree, line - 1)
+        else:
+            tree = ast.parse("(\n" + " " * column + code + "\n)", mode="eval").body
+            ast.increment_lineno(tree, line - 2)
+        return tree, span
+
+    def convert_node(self, node, build):
+        """
+        Convert node with build(parts), checking that all its attributes
+        were used.
+        """
+        parts = self.parts(node)
+        result = build(parts)
+        if parts.left_over():
+            raise Unsupported(node.baron_type)
+        if isinstance(result, ast.AST):
+            locate(result, parts.span)
+        return result, parts.span
+
+    # Module and statements
+
+    def convert_root(self, node):
+        return self.convert_node(node, lambda parts: ast.Module(body=statements(parts.pop("value")), type_ignores=[]))
+
+    def convert_assignment(self, node):
+        def build(parts):
+            target = set_context(parts.pop("target"), ast.Store)
+            annotation = parts.pop("annotation")
+            operator = parts.pop("operator")
+            value = parts.pop("value")
+            if annotation is not None:
+                return ast.AnnAssign(
+                    target=target, annotation=annotation, value=value, simple=int(node.target.baron_type == "name")
+                )
+            if operator:
+                return ast.AugAssign(target=target, op=_BINARY_OPERATORS[operator][0](), value=value)
+            if isinstance(value, ast.Assign) and node.value.baron_type == "assignment":
+                # a = b = c
+                return ast.Assign(targets=[target, *value.targets], value=value.value)
+            return ast.Assign(targets=[target], value=value)
+
+        return self.convert_node(node, build)
+
+    def convert_standalone_annotation(self, node):
+        def build(parts):
+            target = set_context(parts.pop("target"), ast.Store)
+            simple = int(node.target.baron_type == "name")
+            return ast.AnnAssign(target=target, annotation=parts.pop("annotation"), value=None, simple=simple)
+
+        return self.convert_node(node, build)
+
+    def convert_return(self, node):
+        return self.convert_node(node, lambda parts: ast.Return(value=parts.pop("value")))
+
+    def convert_pass(self, node):
+        return self.keyword_statement(node, ast.Pass)
+
+    def convert_break(self, node):
+        return self.keyword_statement(node, ast.Break)
+
+    def convert_continue(self, node):
+        return self.keyword_statement(node, ast.Continue)
+
+    def keyword_statement(self, node, statement):
+        def build(parts):
+            parts.pop("type")
+            return statement()
+
+        return self.convert_node(node, build)
+
+    def convert_del(self, node):
+        def build(parts):
+            value = parts.pop("value")
+            targets = value.elts if node.value.baron_type == "tuple" and not node.value.with_parenthesis else [value]
+            return ast.Delete(targets=[set_context(target, ast.Del) for target in targets])
+
+        return self.convert_node(node, build)
+
+    def convert_global(self, node):
+        return self.convert_node(node, lambda parts: ast.Global(names=self.names(parts.pop("value"))))
+
+    def convert_nonlocal(self, node):
+        return self.convert_node(node, lambda parts: ast.Nonlocal(names=self.names(parts.pop("value"))))
+
+    def names(self, items):
+        names = []
+        for child, result, _ in results(items):
+            if not isinstance(result, ast.Name):
+                raise Unsupported(child.baron_type)
+            names.append(result.id)
+        return names
+
+    def convert_assert(self, node):
+        return self.convert_node(node, lambda parts: ast.Assert(test=parts.pop("value"), msg=parts.pop("message")))
+
+    def convert_raise(self, node):
+        def build(parts):
+            if parts.pop("comma_or_from") not in (None, "", "from"):
+                raise Unsupported("raise")
+            return ast.Raise(exc=parts.pop("value"), cause=parts.pop("instance"))
+
+        return self.convert_node(node, build)
+
+    def convert_import(self, node):
+        return self.convert_node(
+            node, lambda parts: ast.Import(names=[result for _, result, _ in results(parts.pop("value"))])
+        )
+
+    def convert_dotted_as_name(self, node):
+        def build(parts):
+            name = ".".join(result.id for _, result, _ in results(parts.pop("value")))
+            return ast.alias(name=name, asname=parts.pop("target") or None)
+
+        return self.convert_node(node, build)
+
+    def convert_from_import(self, node):
+        def build(parts):
+            level = 0
+            module = []
+            for child, result, _ in parts.pop("value"):
+                if result is not None:
+                    module.append(result.id)
+                elif child.baron_type == "dot" and not module:
+                    level += 1
+            names = [result for _, result, _ in results(parts.pop("targets"))]
+            return ast.ImportFrom(module=".".join(module) or None, names=names, level=level)
+
+        return self.convert_node(node, build)
+
+    def convert_name_as_name(self, node):
+        return self.convert_node(
+            node, lambda parts: ast.alias(name=parts.pop("value"), asname=parts.pop("target") or None)
+        )
+
+    def convert_star(self, node):
+        return self.convert_node(node, lambda parts: ast.alias(name=parts.pop("value"), asname=None))
+
+    def convert_ifelseblock(self, node):
+        def build(parts):
+            clauses = results(parts.pop("value"))
+            orelse = []
+            for child, result, span in reversed(clauses):
+                if child.baron_type == "else":
+                    orelse = result
+                    continue
+                result.orelse = orelse
+                # The clause goes up to the end of the if statement
+                if orelse:
+                    result.end_lineno, result.end_col_offset = orelse[-1].end_lineno, orelse[-1].end_col_offset
+                orelse = [result]
+            return orelse[0]
+
+        return self.convert_node(node, build)
+
+    def convert_if(self, node):
+        return self.convert_node(
+            node, lambda parts: ast.If(test=parts.pop("test"), body=statements(parts.pop("value")))
+        )
+
+    convert_elif = convert_if
+
+    def convert_else(self, node):
+        return self.convert_node(node, lambda parts: statements(parts.pop("value")))
+
+    convert_else_attribute = convert_else
+    convert_finally = convert_else
+
+    def convert_for(self, node):
+        def build(parts):
+            loop = ast.AsyncFor if node.async_ else ast.For
+            return loop(
+                target=set_context(parts.pop("iterator"), ast.Store),
+                iter=parts.pop("target"),
+                body=statements(parts.pop("value")),
+                orelse=parts.pop("else") or [],
+            )
+
+        return self.convert_node(node, build)
+
+    def convert_while(self, node):
+        def build(parts):
+            return ast.While(
+                test=parts.pop("test"), body=statements(parts.pop("value")), orelse=parts.pop("else") or []
+            )
+
+        return self.convert_node(node, build)
+
+    def convert_try(self, node):
+        def build(parts):
+            return ast.Try(
+                body=statements(parts.pop("value")),
+                handlers=[result for _, result, _ in results(parts.pop("excepts"))],
+                orelse=parts.pop("else") or [],
+                finalbody=parts.pop("finally") or [],
+            )
+
+        return self.convert_node(node, build)
+
+    def convert_except(self, node):
+        def build(parts):
+            if parts.pop("delimiter") not in (None, "", "as"):
+                raise Unsupported("except")
+            target = parts.pop("target")
+            return ast.ExceptHandler(
+                type=parts.pop("exception"), name=target.id if target else None, body=statements(parts.pop("value"))
+            )
+
+        return self.convert_node(node, build)
+
+    def convert_with(self, node):
+        def build(parts):
+            statement = ast.AsyncWith if node.async_ else ast.With
+            items = [result for _, result, _ in results(parts.pop("contexts"))]
+            return statement(items=items, body=statements(parts.pop("value")))
+
+        return self.convert_node(node, build)
+
+    def convert_with_context_item(self, node):
+        def build(parts):
+            optional_vars = parts.pop("as")
+            if optional_vars is not None:
+                set_context(optional_vars, ast.Store)
+            return ast.withitem(context_expr=parts.pop("value"), optional_vars=optional_vars)
+
+        return self.convert_node(node, build)
+
+    def convert_def(self, node):
+        def build(parts):
+            function = ast.AsyncFunctionDef if node.async_ else ast.FunctionDef
+            keyword = parts.keywords.get("async") or parts.keywords["def"]
+            parts.span = join_spans(keyword, parts.span)
+            result = function(
+                name=parts.pop("name"),
+                args=self.arguments(parts.pop("arguments")),
+                body=statements(parts.pop("value")),
+                decorator_list=[result for _, result, _ in results(parts.pop("decorators"))],
+                returns=parts.pop("return_annotation"),
+            )
+            if "type_params" in function._fields:
+                result.type_params = []
+            return result
+
+        return self.convert_node(node, build)
+
+    def convert_class(self, node):
+        def build(parts):
+            parts.span = join_spans(parts.keywords["class"], parts.span)
+            args, keywords = self.call_arguments(parts.pop("inherit_from"))
+            result = ast.ClassDef(
+                name=parts.pop("name"),
+                bases=args,
+                keywords=keywords,
+                body=statements(parts.pop("value")),
+                decorator_list=[result for _, result, _ in results(parts.pop("decorators"))],
+            )
+            if "type_params" in ast.ClassDef._fields:
+                result.type_params = []
+            return result
+
+        return self.convert_node(node, build)
+
+    def convert_decorator(self, node):
+        def build(parts):
+            value = parts.pop("value")
+            call = parts.pop("call")
+            if call is None:
+                return value
+            args, keywords = call.value
+            return locate(
+                ast.Call(func=value, args=args, keywords=keywords),
+                join_spans(parts.spans["value"], parts.spans["call"]),
+            )
+
+        return self.convert_node(node, build)
+
+    def convert_dotted_name(self, node):
+        def build(parts):
+            value = None
+            for _, result, span in results(parts.pop("value")):
+                if value is None:
+                    value, start = result, span[0]
+                else:
+                    value = locate(ast.Attribute(value=value, attr=result.id, ctx=ast.Load()), (start, span[1]))
+            return value
+
+        return self.convert_node(node, build)
+
+    def arguments(self, items):
+        "ast.arguments of a function or a lambda"
+        arguments = ast.arguments(
+            posonlyargs=[], args=[], vararg=None, kwonlyargs=[], kw_defaults=[], kwarg=None, defaults=[]
+        )
+        keyword_only = False
+        for child, result, _ in results(items):
+            if child.baron_type == "positional_only_marker":
+                arguments.posonlyargs, arguments.args = arguments.args, []
+            elif child.baron_type == "kwargs_only_marker":
+                keyword_only = True
+            elif child.baron_type == "list_argument":
+                arguments.vararg = result
+                keyword_only = True
+            elif child.baron_type == "dict_argument":
+                arguments.kwarg = result
+            else:
+                argument, default = result
+                if keyword_only:
+                    arguments.kwonlyargs.append(argument)
+                    arguments.kw_defaults.append(default)
+                else:
+                    arguments.args.append(argument)
+                    if default is not None:
+                        arguments.defaults.append(default)
+        return arguments
+
+    def convert_def_argument(self, node):
+        def build(parts):
+            target = parts.pop("target")
+            if not isinstance(target, ast.Name):
+                raise Unsupported("def_argument")
+            return self.arg(target, parts), parts.pop("value")
+
+        return self.convert_node(node, build)
+
+    def arg(self, name, parts):
+        "Argument of a function, from the name to the annotation"
+        span = (name.lineno, name.col_offset), (name.end_lineno, name.end_col_offset)
+        if parts.values.get("annotation") is not None:
+            span = join_spans(span, parts.spans["annotation"])
+        return locate(ast.arg(arg=name.id, annotation=parts.pop("annotation")), span)
+
+    def convert_kwargs_only_marker(self, node):
+        return self.convert_node(node, lambda parts: True)
+
+    convert_positional_only_marker = convert_kwargs_only_marker
+
+    def convert_list_argument(self, node):
+        return self.starred_argument(node, ast.Starred)
+
+    def convert_dict_argument(self, node):
+        return self.starred_argument(node, ast.keyword)
+
+    def starred_argument(self, node, call_type):
+        "*args or **kwargs, in a call or in the arguments of a function"
+
+        def build(parts):
+            value = parts.pop("value")
+            # Elements of a proxy list have it as parent
+            owner = node.parent.parent if node.parent is not None else None
+            if isinstance(owner, Node) and owner.baron_type in ("def", "lambda"):
+                if not isinstance(value, ast.Name):
+                    raise Unsupported(node.baron_type)
+                return self.arg(value, parts)
+            if parts.pop("annotation") is not None:
+                raise Unsupported(node.baron_type)
+            if call_type is ast.Starred:
+                return ast.Starred(value=value, ctx=ast.Load())
+            return ast.keyword(arg=None, value=value)
+
+        return self.convert_node(node, build)
+
+    # Expressions
+
+    def convert_name(self, node):
+        def build(parts):
+            name = parts.pop("value")
+            if name in ("True", "False", "None"):
+                return ast.Constant(value=_simple_literal_value(name), kind=None)
+            return ast.Name(id=name, ctx=ast.Load())
+
+        return self.convert_node(node, build)
+
+    def convert_literal(self, node):
+        def build(parts):
+            code = parts.pop("value")
+            value = _simple_literal_value(code)
+            if value is _NOT_SIMPLE:
+                value = ast.literal_eval(code)
+            return ast.Constant(value=value, kind="u" if code[:1] in "uU" else None)
+
+        return self.convert_node(node, build)
+
+    convert_number = convert_literal
+    convert_int = convert_literal
+    convert_long = convert_literal
+    convert_float = convert_literal
+    convert_float_exponant = convert_literal
+    convert_float_exponant_complex = convert_literal
+    convert_complex = convert_literal
+    convert_hexa = convert_literal
+    convert_octa = convert_literal
+    convert_binary = convert_literal
+    convert_string = convert_literal
+    convert_raw_string = convert_literal
+    convert_unicode_string = convert_literal
+    convert_unicode_raw_string = convert_literal
+    convert_binary_string = convert_literal
+    convert_binary_raw_string = convert_literal
+
+    def convert_string_chain(self, node):
+        def build(parts):
+            values = []
+            for _, result, _ in results(parts.pop("value")):
+                if not isinstance(result, ast.Constant):
+                    raise Unsupported("string_chain")
+                values.append(result.value)
+            try:
+                return ast.Constant(value=type(values[0])().join(values), kind=None)
+            except TypeError as e:
+                raise Unsupported("string_chain") from e
+
+        return self.convert_node(node, build)
+
+    def convert_ellipsis(self, node):
+        return self.convert_node(node, lambda parts: ast.Constant(value=..., kind=None))
+
+    def convert_associative_parenthesis(self, node):
+        # The parenthesis are part of the enclosing expression, not of the value
+        return self.convert_node(node, lambda parts: parts.pop("value"))
+
+    def convert_tuple(self, node):
+        def build(parts):
+            items = parts.pop("value")
+            if not node.with_parenthesis and items and items[-1][0].baron_type == "comma":
+                parts.span = join_spans(parts.span, self.last_comma)
+            return ast.Tuple(elts=self.elements(items), ctx=ast.Load())
+
+        return self.convert_node(node, build)
+
+    def convert_list(self, node):
+        return self.convert_node(node, lambda parts: ast.List(elts=self.elements(parts.pop("value")), ctx=ast.Load()))
+
+    def convert_set(self, node):
+        return self.convert_node(node, lambda parts: ast.Set(elts=self.elements(parts.pop("value"))))
+
+    def elements(self, items):
+        return [result for _, result, _ in results(items)]
+
+    def convert_dict(self, node):
+        def build(parts):
+            keys = []
+            values = []
+            for _, (key, value), _ in results(parts.pop("value")):
+                keys.append(key)
+                values.append(value)
+            return ast.Dict(keys=keys, values=values)
+
+        return self.convert_node(node, build)
+
+    def convert_dictitem(self, node):
+        return self.convert_node(node, lambda parts: (parts.pop("key"), parts.pop("value")))
+
+    def convert_star_expression(self, node):
+        return self.convert_node(node, lambda parts: ast.Starred(value=parts.pop("value"), ctx=ast.Load()))
+
+    def convert_list_comprehension(self, node):
+        return self.comprehension(node, ast.ListComp)
+
+    def convert_set_comprehension(self, node):
+        return self.comprehension(node, ast.SetComp)
+
+    def convert_generator_comprehension(self, node):
+        return self.comprehension(node, ast.GeneratorExp)
+
+    def convert_argument_generator_comprehension(self, node):
+        return self.comprehension(node, ast.GeneratorExp)
+
+    def convert_dict_comprehension(self, node):
+        return self.comprehension(node, ast.DictComp)
+
+    def comprehension(self, node, comprehension_type):
+        def build(parts):
+            generators = [result for _, result, _ in results(parts.pop("generators"))]
+            result = parts.pop("result")
+            if comprehension_type is ast.DictComp:
+                key, value = result
+                return ast.DictComp(key=key, value=value, generators=generators)
+            return comprehension_type(elt=result, generators=generators)
+
+        return self.convert_node(node, build)
+
+    def convert_comprehension_loop(self, node):
+        def build(parts):
+            ifs = [result for _, result, _ in results(parts.pop("ifs"))]
+            return ast.comprehension(
+                target=set_context(parts.pop("iterator"), ast.Store), iter=parts.pop("target"), ifs=ifs, is_async=0
+            )
+
+        return self.convert_node(node, build)
+
+    def convert_comprehension_if(self, node):
+        return self.convert_node(node, lambda parts: parts.pop("value"))
+
+    def convert_ternary_operator(self, node):
+        def build(parts):
+            return ast.IfExp(test=parts.pop("value"), body=parts.pop("first"), orelse=parts.pop("second"))
+
+        return self.convert_node(node, build)
+
+    def convert_lambda(self, node):
+        return self.convert_node(
+            node, lambda parts: ast.Lambda(args=self.arguments(parts.pop("arguments")), body=parts.pop("value"))
+        )
+
+    def convert_await(self, node):
+        return self.convert_node(node, lambda parts: ast.Await(value=parts.pop("value")))
+
+    def convert_yield(self, node):
+        return self.convert_node(node, lambda parts: ast.Yield(value=parts.pop("value")))
+
+    def convert_yield_from(self, node):
+        return self.convert_node(node, lambda parts: ast.YieldFrom(value=parts.pop("value")))
+
+    def convert_yield_atom(self, node):
+        def build(parts):
+            # Like associative parenthesis, the yield goes from the keyword to the value
+            span = parts.keywords["yield"]
+            if parts.values.get("value") is not None:
+                span = join_spans(span, parts.spans["value"])
+            return locate(ast.Yield(value=parts.pop("value")), span)
+
+        return self.convert_node(node, build)
+
+    def convert_atomtrailers(self, node):
+        def build(parts):
+            value = None
+            start = None
+            for child, result, span in results(parts.pop("value")):
+                if value is None:
+                    value, start = result, span[0]
+                elif isinstance(result, ListPart) and result.kind == "call":
+                    args, keywords = result.value
+                    value = ast.Call(func=value, args=args, keywords=keywords)
+                elif isinstance(result, ListPart):
+                    value = ast.Subscript(value=value, slice=result.value, ctx=ast.Load())
+                elif isinstance(result, ast.Name):
+                    value = ast.Attribute(value=value, attr=result.id, ctx=ast.Load())
+                else:
+                    raise Unsupported(child.baron_type)
+                locate(value, (start, span[1]))
+            return value
+
+        return self.convert_node(node, build)
+
+    def convert_call(self, node):
+        def build(parts):
+            args, keywords = self.call_arguments(parts.pop("value"))
+            if len(node.value) == 1 and node.value[0].baron_type == "argument_generator_comprehension":
+                # The parenthesis of the call are the ones of the generator
+                (args[0].lineno, args[0].col_offset), (args[0].end_lineno, args[0].end_col_offset) = join_spans(
+                    parts.keywords["("], parts.keywords[")"]
+                )
+            return ListPart("call", (args, keywords))
+
+        return self.convert_node(node, build)
+
+    def call_arguments(self, items):
+        "Positional and keyword arguments of a call"
+        args = []
+        keywords = []
+        for _, result, _ in results(items):
+            if isinstance(result, ast.keyword):
+                keywords.append(result)
+            else:
+                args.append(result)
+        return args, keywords
+
+    def convert_call_argument(self, node):
+        def build(parts):
+            target = parts.pop("target")
+            value = parts.pop("value")
+            if target is None:
+                return value
+            if not isinstance(target, ast.Name):
+                raise Unsupported("call_argument")
+            return ast.keyword(arg=target.id, value=value)
+
+        return self.convert_node(node, build)
+
+    def convert_getitem(self, node):
+        return self.convert_node(node, lambda parts: ListPart("getitem", parts.pop("value")))
+
+    def convert_slice(self, node):
+        def build(parts):
+            return ast.Slice(lower=parts.pop("lower"), upper=parts.pop("upper"), step=parts.pop("step"))
+
+        return self.convert_node(node, build)
+
+    def convert_comparison_operator(self, node):
+        def build(parts):
+            operator = " ".join(filter(None, (parts.pop("first"), parts.pop("second"))))
+            return _COMPARISON_OPERATORS[operator]
+
+        return self.convert_node(node, build)
+
+    def convert_operation(self, node):
+        """
+        Binary, boolean, comparison and unary operations.
+
+        Baron nests the operations following the order of the code instead
+        of the precedence and associativity of the operators, so they are
+        taken as a sequence of operators and operands and then put back
+        together like Python does.
+        """
+        tokens = []
+        self.operation_tokens(node, tokens)
+        result, span = OperationParser(tokens).parse()
+        return result, span
+
+    def operation_tokens(self, node, tokens):
+        def visit(child):
+            if isinstance(child, Node) and child.baron_type in _OPERATIONS:
+                self.operation_tokens(child, tokens)
+                return None, None
+
+            result, span = self.visit(child)
+            if span is not None:
+                is_operator = isinstance(child, Node) and child.baron_type == "comparison_operator"
+                kind = "comparison" if is_operator else "operand"
+                tokens.append((kind, result, span))
+            return result, span
+
+        for kind, key, value, span in self.iter_parts(node, visit):
+            if kind == "string" and key in ("value", "first") and span is not None:
+                kind = "unary" if node.baron_type == "unitary_operator" else "binary"
+                tokens.append((kind, value, span))
+            elif kind in ("constant", "string") and span is not None:
+                raise Unsupported(node.baron_type)
+
+
+class OperationParser:
+    "Precedence climbing over the operators and operands of an operation"
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.index = 0
+
+    def parse(self):
+        result, span = self.expression(0)
+        if self.index != len(self.tokens):
+            raise Unsupported("operation")
+        return result, span
+
+    def peek(self):
+        if self.index < len(self.tokens):
+            return self.tokens[self.index]
+        return None, None, None
+
+    def next(self):
+        token = self.peek()
+        self.index += 1
+        return token
+
+    def precedence(self, kind, value):
+        if kind == "binary":
+            operators = _BINARY_OPERATORS if value in _BINARY_OPERATORS else _BOOLEAN_OPERATORS
+            if value not in operators:
+                raise Unsupported(value)
+            return operators[value][1]
+        if kind == "comparison":
+            return _COMPARISON_PRECEDENCE
+        return None
+
+    def expression(self, minimum):
+        left, span = self.unary()
+        while True:
+            kind, value, _ = self.peek()
+            precedence = self.precedence(kind, value)
+            if precedence is None or precedence < minimum:
+                return left, span
+
+            if kind == "comparison":
+                operators = []
+                comparators = []
+                while self.peek()[0] == "comparison":
+                    operators.append(self.next()[1]())
+                    comparator, comparator_span = self.expression(precedence + 1)
+                    comparators.append(comparator)
+                span = join_spans(span, comparator_span)
+                left = locate(ast.Compare(left=left, ops=operators, comparators=comparators), span)
+            elif value in _BOOLEAN_OPERATORS:
+                values = [left]
+                while self.peek()[:2] == (kind, value):
+                    self.next()
+                    operand, operand_span = self.expression(precedence + 1)
+                    values.append(operand)
+                span = join_spans(span, operand_span)
+                left = locate(ast.BoolOp(op=_BOOLEAN_OPERATORS[value][0](), values=values), span)
+            else:
+                self.next()
+                # Only the power operator is right associative
+                right, right_span = self.expression(precedence if value == "**" else precedence + 1)
+                span = join_spans(span, right_span)
+                left = locate(ast.BinOp(left=left, op=_BINARY_OPERATORS[value][0](), right=right), span)
+
+    def unary(self):
+        kind, value, span = self.next()
+        if kind == "unary":
+            if value not in _UNARY_OPERATORS:
+                raise Unsupported(value)
+            operator, precedence = _UNARY_OPERATORS[value]
+            operand, operand_span = self.expression(precedence)
+            span = join_spans(span, operand_span)
+            return locate(ast.UnaryOp(op=operator(), operand=operand), span), span
+        if kind != "operand":
+            raise Unsupported("operation")
+        return value, span
+
+
+def node_to_ast(node):
+    return AstBuilder(node).build()
@@ -1,16 +1,24 @@
 from __future__ import annotations
 
-import logging
+import os
 import re
 import sys
 from collections.abc import Generator, Iterable
-from io import StringIO
+from io import BytesIO, StringIO
+from mmap import mmap
 from typing import TYPE_CHECKING, Any
 
 if TYPE_CHECKING:
     from baron.utils import BaronBoundingBox
 
-logger = logging.getLogger("redbaron")
+
+def __getattr__(name: str) -> Any:
+    # logging is imported on first use of the logger
+    if name == "logger":
+        import logging
+
+        return logging.getLogger("redbaron")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def fix_baron_box(box: BaronBoundingBox) -> BaronBoundingBox:
@@ -78,6 +86,59 @@ def truncate(text: str, n: int) -> str:
     return "".join(truncated)
 
 
+def truncate_chunks(chunks: Iterable[str], n: int) -> str:
+    """
+    Truncate text given as an iterable of chunks to n characters.
+
+    Chunks are consumed lazily and iteration stops as soon as the
+    limit is exceeded, so the full text never has to be generated.
+    """
+    text = ""
+    for chunk in chunks:
+        text += chunk
+        if len(text) > n:
+            break
+    else:
+        return text
+
+    return text[: max(n - 3, 0)] + "..."
+
+
+def decode_source(source: bytes | bytearray | mmap) -> tuple[str, str]:
+    """
+    Decode python source code given as bytes or as a memory mapped file.
+
+    The encoding is detected following PEP 263 (coding cookie or BOM,
+    utf-8 by default). Return the decoded code and the encoding.
+    """
+    # The coding cookie can only be on the first 2 lines
+    end_of_second_line = source.find(b"\n", source.find(b"\n") + 1)
+    head = source[: end_of_second_line + 1] if end_of_second_line != -1 else source
+    import tokenize
+
+    encoding, _ = tokenize.detect_encoding(BytesIO(head).readline)
+    return str(memoryview(source), encoding), encoding
+
+
+def detect_newline(text: str) -> str:
+    "Return the style of the first new line found in text"
+    index = text.find("\n")
+    if index == -1:
+        return "\r" if "\r" in text else "\n"
+
+    if index and text[index - 1] == "\r":
+        return "\r\n"
+
+    return "\n"
+
+
+def has_mixed_newlines(text: str) -> bool:
+    "Whether text has new lines of more than one style"
+    crlf = text.count("\r\n")
+    counts = (crlf, text.count("\n") - crlf, text.count("\r") - crlf)
+    return sum(1 for count in counts if count) > 1
+
+
 def squash_successive_duplicates(iterable: Iterable[Any]) -> Generator[Any, None, None]:
     previous = None
     for j in iterable:
@@ -89,3 +150,18 @@ def squash_successive_duplicates(iterable: Iterable[Any]) -> Generator[Any, None
 
 def strip_comments(code: str) -> str:
     return "\n".join([line for line in code.split("\n") if not line.lstrip(" ").startswith("#")])
+
+
+def python_files(root: str | os.PathLike) -> Generator[str, None, None]:
+    "Paths of the python files under a directory, hidden directories excluded"
+    for directory, directories, files in os.walk(root):
+        directories[:] = sorted(d for d in directories if not d.startswith(".") and d != "__pycache__")
+        for name in sorted(files):
+            if name.endswith(".py"):
+                yield os.path.join(directory, name)
+
+
+def stat_key(path: str | os.PathLike) -> tuple[int, int]:
+    "Modification time and size of a file, to tell whether it changed"
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
@@ -0,0 +1,75 @@
+import asyncio
+import threading
+
+import pytest
+
+from redbaron import aio
+
+
+def test_parse_and_dumps():
+    async def main():
+        red = await aio.parse(b"def f(): pass\n")
+        return await aio.dumps(red.find("def"))
+
+    assert asyncio.run(main()) == "def f(): pass\n"
+
+
+def test_map_trees_from_async_iterable():
+    async def sources():
+        for name in "abcdef":
+            await asyncio.sleep(0)
+            yield f"def {name}(): pass\n".encode()
+
+    async def main():
+        return [name async for name in aio.map_trees(lambda red: red.find("def").name, sources(), concurrency=2)]
+
+    assert asyncio.run(main()) == list("abcdef")
+
+
+def test_map_trees_backpressure():
+    started = []
+    release = threading.Event()
+
+    def function(red):
+        started.append(red.dumps())
+        release.wait(5)
+        return red.dumps()
+
+    async def main():
+        results = aio.map_trees(function, [f"{name}\n".encode() for name in "abcdef"], concurrency=2)
+        first = asyncio.ensure_future(anext(results))
+        await asyncio.sleep(0.1)
+        # The loop isn't blocked and only concurrency sources were taken
+        assert len(started) == 2
+        release.set()
+        assert await first == "a\n"
+        return ["a\n"] + [result async for result in results]
+
+    assert asyncio.run(main()) == [f"{name}\n" for name in "abcdef"]
+
+
+def test_map_trees_invalid_concurrency():
+    async def main():
+        async for _ in aio.map_trees(lambda red: red, [b"a\n"], concurrency=0):
+            pass
+
+    with pytest.raises(ValueError):
+        asyncio.run(main())
+
+
+def test_rewrite_files(tmp_path):
+    a = tmp_path / "a.py"
+    a.write_bytes(b"def f():\r\n    pass\r\n")
+    b = tmp_path / "b.py"
+    b.write_bytes(b"class A:\n    pass\n")
+
+    def rename(red):
+        for node in red.find_all("def"):
+            node.name = "g"
+
+    async def main():
+        return [result async for result in aio.rewrite_files(rename, [a, b])]
+
+    assert asyncio.run(main()) == [(a, True), (b, False)]
+    assert a.read_bytes() == b"def g():\r\n    pass\r\n"
+    assert b.read_bytes() == b"class A:\n    pass\n"
@@ -31,6 +31,23 @@ def test_node_previous():
     assert node_list[0].previous is None
 
 
+def test_node_next_after_modification():
+    node_list = node("[a, b, c]")
+    a, b, c = node_list
+    assert a.next is b
+    node_list.insert(1, "d")
+    assert a.next is node_list[1]
+    assert node_list[1].next is b
+    node_list.remove(b)
+    assert node_list[1].next is c
+    assert c.previous is node_list[1]
+
+
+def test_node_next_of_separator():
+    node_list = node("[a, b]")
+    assert node_list.node_list[1].next is None
+
+
 def test_node_displayable_next():
     node_list = node("[1, 2, 3]")
     node_list.hide(node_list[1])
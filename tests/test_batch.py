@@ -0,0 +1,75 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from redbaron import RedBaron
+from redbaron.batch import load, map_trees, parse_all
+
+code = """\
+class A:
+    def f(self, a, b=c):
+        if a:
+            return [a, b]
+        else:
+            return {a: b}
+
+def g(*args, **kwargs):
+    try:
+        pass
+    finally:
+        pass
+"""
+
+
+def transform(red):
+    "Modify the tree under a snapshot, return what it looked like and the restored code"
+    snapshot = red.snapshot()
+    red.find("def", "f").name = "h"
+    red.find("list").append("d")
+    red.find("dict").value.append("c: d")
+    red.find("def", "g").value.append("return args")
+    red.find("class").decorators.append("@decorator")
+    modified = red.dumps()
+    red.restore(snapshot)
+    red.drop_snapshots()
+    return modified, red.dumps()
+
+
+def test_map_trees_in_order():
+    sources = [f"def {name}(): pass\n".encode() for name in "abcdefgh"]
+    assert list(map_trees(lambda red: red.find("def").name, sources, max_workers=4)) == list("abcdefgh")
+
+
+def test_load(tmp_path):
+    path = tmp_path / "a.py"
+    path.write_bytes(b"a = b\r\n")
+    assert load(path).to_bytes() == b"a = b\r\n"
+    assert load(str(path)).to_bytes() == b"a = b\r\n"
+    assert load(b"a = b\n").dumps() == "a = b\n"
+
+
+def test_parse_all():
+    trees = parse_all([b"a\n", b"b\n"])
+    assert [red.dumps() for red in trees] == ["a\n", "b\n"]
+
+
+def test_stress_separate_trees():
+    expected = transform(RedBaron(code))
+    assert expected[0] != code and expected[1] == code
+    results = list(map_trees(transform, [code.encode()] * 200, max_workers=8))
+    assert results == [expected] * 200
+
+
+def test_stress_reading_shared_tree():
+    red = RedBaron(code)
+    expected = [
+        (node.dumps(), node.index_on_parent, node.next is None)
+        for node in red.find_all(["def", "return", "pass", "if"])
+    ]
+
+    def read(_):
+        return [
+            (node.dumps(), node.index_on_parent, node.next is None)
+            for node in red.find_all(["def", "return", "pass", "if"])
+        ]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        assert list(executor.map(read, range(200))) == [expected] * 200
@@ -0,0 +1,56 @@
+import json
+import mmap
+import pickle
+
+import pytest
+
+from redbaron import RedBaron
+from redbaron.binary_fst import decode, encode, node_from_bytes, node_to_bytes
+
+code = """\
+class A(B):
+    @decorator
+    async def f(a, *b, c=d, **e):
+        # comment
+        return [x for x in a if x], 'é'
+"""
+
+
+def test_binary_fst_round_trip():
+    red = RedBaron(code)
+    fst = red.fst()
+    assert decode(encode(fst)) == fst
+
+
+def test_binary_fst_smaller_than_pickle_and_json():
+    fst = RedBaron(code * 10).fst()
+    assert len(encode(fst)) * 3 < len(pickle.dumps(fst, protocol=5))
+    assert len(encode(fst)) * 10 < len(json.dumps(fst))
+
+
+def test_binary_fst_generic_node():
+    fst = {"type": "name", "value": "a", "extra": [None, True, {}, {"type": "name", "value": "b"}]}
+    assert decode(encode(fst)) == fst
+
+
+def test_binary_fst_node_from_bytes():
+    red = RedBaron(code)
+    node = red.find("def")
+    new = node_from_bytes(node_to_bytes(node))
+    assert new.parent is None
+    assert new.indentation == node.indentation
+    assert new.dumps() == node.dumps()
+
+
+def test_binary_fst_root_from_mmap(tmp_path):
+    path = tmp_path / "tree.rbf"
+    path.write_bytes(node_to_bytes(RedBaron(code)))
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        red = node_from_bytes(data)
+    assert type(red) is RedBaron
+    assert red.dumps() == code
+
+
+def test_binary_fst_not_encoded():
+    with pytest.raises(ValueError):
+        decode(b"a = b")
@@ -0,0 +1,116 @@
+"""Tests RedBaron.changes()"""
+
+# pylint: disable=redefined-outer-name
+import pytest
+
+from redbaron import RedBaron
+
+CODE = """\
+import os
+
+
+@deco
+def fun(a, b=c):
+    x = [a, b]
+    if x:
+        y = x
+    else:
+        y = a
+    return {a: b}
+
+
+class A(B):
+    def meth(self):
+        pass
+"""
+
+
+@pytest.fixture
+def red():
+    red = RedBaron(CODE)
+    red.snapshot()
+    return red
+
+
+def apply_changes(code, changes):
+    lines = code.split("\n")
+    offsets = [0]
+    for line in lines:
+        offsets.append(offsets[-1] + len(line) + 1)
+
+    # Later edits first so that the positions of the others stay valid
+    for (start_line, start_column), (end_line, end_column), new in reversed(changes):
+        start = offsets[start_line - 1] + start_column - 1
+        end = offsets[end_line - 1] + end_column - 1
+        code = code[:start] + new + code[end:]
+    return code
+
+
+def check(red):
+    changes = red.changes()
+    assert apply_changes(CODE, changes) == red.dumps()
+    return changes
+
+
+def test_no_changes(red):
+    assert red.changes() == []
+
+
+def test_changes_rename(red):
+    red.find("def").name = "other"
+    assert check(red) == [((5, 5), (5, 8), "other")]
+
+
+def test_changes_list_append(red):
+    red.find("list").append("c")
+    assert check(red) == [((6, 14), (6, 14), ", c")]
+
+
+def test_changes_statement_insertion(red):
+    red.find("else").value.append("z = y")
+    assert check(red) == [((11, 5), (11, 5), "    z = y\n    ")]
+
+
+def test_changes_statement_removal(red):
+    red.find("def").value.remove(red.find("ifelseblock"))
+    assert check(red) == [((7, 5), (11, 5), "")]
+
+
+def test_changes_decorator(red):
+    red.find("def", "meth").decorators.append("@staticmethod")
+    check(red)
+
+
+def test_changes_indentation(red):
+    red.find("class").increase_indentation("    ")
+    check(red)
+
+
+def test_changes_several_edits_sorted(red):
+    red.append("w = v")
+    red.find("return").value = "x"
+    red[0].value = "sys"
+    changes = check(red)
+    assert changes == sorted(changes)
+    assert len(changes) == 3
+
+
+def test_changes_since_snapshot(red):
+    red.find("def").name = "other"
+    snapshot = red.snapshot()
+    red.find("class").name = "C"
+    assert red.changes(snapshot) == [((14, 7), (14, 8), "C")]
+    assert len(red.changes()) == 2
+
+
+def test_changes_leave_tree_unchanged(red):
+    red.find("list").append("c")
+    code, fst = red.dumps(), red.fst()
+    red.changes()
+    assert red.dumps() == code
+    assert red.fst() == fst
+
+
+def test_changes_without_snapshot():
+    with pytest.raises(ValueError):
+        RedBaron(CODE).changes()
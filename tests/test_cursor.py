@@ -0,0 +1,58 @@
+"""Tests the rendering order cursor"""
+
+from redbaron import RedBaron
+from redbaron.cursor import RenderingCursor
+
+CODE = """\
+def fun(a, b):
+    x = [a, b]
+    return x
+"""
+
+
+def test_cursor_walks_rendering_order():
+    red = RedBaron(CODE)
+    order = list(red._generate_nodes_in_rendering_order())
+    assert list(RenderingCursor(red)) == order
+
+
+def test_cursor_retreat():
+    red = RedBaron(CODE)
+    cursor = RenderingCursor(red)
+    for _ in cursor:
+        pass
+    backward = []
+    while (node := cursor.retreat()) is not None:
+        backward.append(node)
+    assert backward == list(reversed(list(red._generate_nodes_in_rendering_order())))
+
+
+def test_cursor_seek():
+    red = RedBaron(CODE)
+    list_node = red.find("list")
+    cursor = red.find("assignment").target.rendering_cursor()
+    assert cursor.node is red.find("assignment").target
+    assert cursor.advance().type == "space"
+    cursor.seek(list_node, last=True)
+    assert cursor.retreat() is list_node.value[-1]
+    assert cursor.advance() is list_node
+
+
+def test_cursor_bounds():
+    red = RedBaron("x = y\n")
+    cursor = RenderingCursor(red)
+    assert cursor.retreat() is None
+    assert cursor.advance() is red.find("name", "x")
+    last = list(red._generate_nodes_in_rendering_order())[-1]
+    cursor.seek(last)
+    assert cursor.advance() is None
+    assert cursor.retreat() is last
+
+
+def test_next_rendered_walk():
+    red = RedBaron(CODE)
+    node = red.find("def").first_formatting[0]
+    assert node.next_rendered is red.find("def")
+    list_value = red.find("list").value
+    assert list_value[-1].previous_rendered is list_value[0]
+    assert list_value[0].next_rendered is list_value[-1]
@@ -1,6 +1,7 @@
 """Tests the rendering feature"""
 
 from redbaron import RedBaron
+from redbaron.base_nodes import Node
 
 
 def test_indented_for_else():
@@ -58,3 +59,37 @@ def test_indented_decorators():
 """
     red = RedBaron(code)
     assert red.dumps() == code
+
+
+def test_iter_dumps_matches_dumps():
+    code = """\
+@deco
+def fun(a, b=c):
+    try:
+        pass
+    except E as e:
+        pass
+    else:
+        pass
+    finally:
+        pass
+    for x in y:
+        pass
+    else:
+        pass
+"""
+    red = RedBaron(code)
+    for node in [red, *red.find_all(lambda x: True)]:
+        assert node.indentation + "".join(node._iter_dumps()) == node.dumps()
+
+
+def test_repr_does_not_render_whole_tree(monkeypatch):
+    red = RedBaron("def fun():\n" + "    a = b\n" * 50)
+
+    def fail(self):
+        raise AssertionError("repr should not dump the whole tree")
+
+    monkeypatch.setattr(Node, "dumps", fail)
+    monkeypatch.setattr(Node, "fst", fail)
+    assert '"def fun():\\n    a..."' in repr(red[0])
+    assert '"def fun():\\n    a..."' in repr(red.value)
@@ -0,0 +1,73 @@
+"""Tests reading and writing encoded source code"""
+
+import redbaron.redbaron
+from redbaron import RedBaron
+from redbaron.utils import decode_source, detect_newline, has_mixed_newlines
+
+
+def test_decode_source_default_utf8():
+    assert decode_source("a = 'é'\n".encode()) == ("a = 'é'\n", "utf-8")
+
+
+def test_decode_source_coding_cookie():
+    source = "#!/usr/bin/python\n# -*- coding: latin-1 -*-\na = 'é'\n"
+    assert decode_source(source.encode("latin-1")) == (source, "iso-8859-1")
+
+
+def test_decode_source_bom():
+    assert decode_source("a = b\n".encode("utf-8-sig")) == ("a = b\n", "utf-8-sig")
+
+
+def test_detect_newline():
+    assert detect_newline("a\nb\r\n") == "\n"
+    assert detect_newline("a\r\nb\n") == "\r\n"
+    assert detect_newline("a\rb") == "\r"
+    assert detect_newline("a") == "\n"
+    assert has_mixed_newlines("a\nb\r\n")
+    assert has_mixed_newlines("a\rb\n")
+    assert not has_mixed_newlines("a\r\nb\r\n")
+    assert not has_mixed_newlines("a")
+
+
+def test_from_bytes_round_trip():
+    source = "# coding: latin-1\r\na = 'é'\r\n".encode("latin-1")
+    red = RedBaron.from_bytes(source)
+    assert red.encoding == "iso-8859-1"
+    assert red.newline == "\r\n"
+    assert red.to_bytes() == source
+
+
+def test_to_bytes_uses_source_newline():
+    red = RedBaron.from_bytes(b"a = b\r\n")
+    red.append("c = d\n")
+    assert red.to_bytes() == b"a = b\r\nc = d\r\n"
+
+
+def test_mixed_newlines_round_trip():
+    source = b"a = b\r\nc = d\ne = f\r\n"
+    red = RedBaron.from_bytes(source)
+    assert red.newline is None
+    assert red.to_bytes() == source
+    red.append("g = h\n")
+    assert red.to_bytes() == source + b"g = h\n"
+
+
+def test_from_path(tmp_path):
+    path = tmp_path / "module.py"
+    path.write_bytes("a = 'é'\n".encode("utf-8-sig"))
+    red = RedBaron.from_path(path)
+    assert red.dumps() == "a = 'é'\n"
+    assert red.to_bytes() == path.read_bytes()
+
+
+def test_from_path_mmap(tmp_path, monkeypatch):
+    monkeypatch.setattr(redbaron.redbaron, "MMAP_THRESHOLD", 0)
+    path = tmp_path / "module.py"
+    path.write_bytes(b"a = b\n")
+    assert RedBaron.from_path(path).dumps() == "a = b\n"
+
+
+def test_from_path_empty(tmp_path):
+    path = tmp_path / "module.py"
+    path.write_bytes(b"")
+    assert RedBaron.from_path(path).dumps() == ""
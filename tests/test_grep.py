@@ -0,0 +1,52 @@
+import io
+
+from redbaron.__main__ import main
+from redbaron.grep import grep, grep_file
+
+code = """\
+class A:
+    def test_a(self):
+        pass
+
+    def helper(self):
+        return [a, b]
+
+def test_b():
+    return {a: b}
+"""
+
+
+def test_grep_file(tmp_path):
+    path = tmp_path / "a.py"
+    path.write_text(code)
+    assert grep_file(path, "def", "g:test_*") == [(2, 5, "def test_a(self):"), (8, 1, "def test_b():")]
+    assert grep_file(path, "return") == [(6, 9, "return [a, b]"), (9, 5, "return {a: b}")]
+
+
+def test_grep_file_prefiltered(tmp_path):
+    path = tmp_path / "a.py"
+    # Only parsed if the prefilter lets it through
+    path.write_text("def (:\n")
+    assert grep_file(path, "def", "g:test_*") == []
+
+
+def test_grep(tmp_path):
+    (tmp_path / "a.py").write_text(code)
+    (tmp_path / "b.py").write_text("def test_c(): (\n")
+    (tmp_path / "c.py").write_text("def other():\n    pass\n")
+    out, err = io.StringIO(), io.StringIO()
+    assert grep("def", ("g:test_*",), [str(tmp_path)], jobs=2, out=out, err=err) == 2
+    assert out.getvalue() == f"{tmp_path}/a.py:2:5: def test_a(self):\n{tmp_path}/a.py:8:1: def test_b():\n"
+    assert err.getvalue().startswith(f"{tmp_path}/b.py: ")
+
+
+def test_main(tmp_path, capsys):
+    (tmp_path / "a.py").write_text(code)
+    assert main(["grep", "def", "test_*", str(tmp_path / "a.py"), "-j", "1"]) == 0
+    assert capsys.readouterr().out.splitlines() == [
+        f"{tmp_path}/a.py:2:5: def test_a(self):",
+        f"{tmp_path}/a.py:8:1: def test_b():",
+    ]
+    assert main(["grep", "class", str(tmp_path)]) == 0
+    assert capsys.readouterr().out == f"{tmp_path}/a.py:1:1: class A:\n"
+    assert main(["grep", "while", str(tmp_path)]) == 1
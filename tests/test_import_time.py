@@ -0,0 +1,41 @@
+import os
+import subprocess
+import sys
+
+# Time spent in redbaron's own modules, baron's parser tables excluded
+IMPORT_TIME_BUDGET = 0.05
+
+
+def run_python(code):
+    env = dict(os.environ)
+    # Measure the import from the bytecode cache, not the compilation
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def test_import_does_not_load_optional_modules():
+    # Only redbaron's own imports, what baron and the standard library import is up to them
+    result = run_python(
+        "import sys, redbaron; "
+        "print(' '.join(m for m in ('pygments', 'redbaron.changes', 'redbaron.to_ast') if m in sys.modules))"
+    )
+    assert result.stdout.strip() == ""
+
+
+def test_import_time_budget():
+    run_python("import redbaron")
+    result = run_python("import redbaron")
+
+    self_time = 0
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].strip().startswith("redbaron"):
+            self_time += int(fields[0].rsplit(":", 1)[1])
+    assert 0 < self_time / 1e6 < IMPORT_TIME_BUDGET
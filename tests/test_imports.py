@@ -0,0 +1,112 @@
+import os
+
+import baron
+import pytest
+
+from redbaron.imports import ImportGraph, absolute_module, fst_imports, module_name
+
+
+def write(path, content):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+    # Make sure the modification is seen even within the same clock tick
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def project(tmp_path):
+    write(tmp_path / "pkg" / "__init__.py", "from . import a\n")
+    write(tmp_path / "pkg" / "a.py", "import os\nfrom . import b\n")
+    write(tmp_path / "pkg" / "b.py", "from .c import helper, other as o\n")
+    write(tmp_path / "pkg" / "c.py", "import pkg.a\n\ndef helper():\n    from os import path\n")
+    write(tmp_path / "main.py", "from pkg import *\n")
+    write(tmp_path / "plain.py", "x = y\n")
+
+
+def test_fst_imports():
+    fst = baron.parse("from ..a.b import c as d, e\nfrom . import (f)\nimport g.h as i, j\nfrom k import *\n")
+    assert fst_imports(fst) == [(2, "a.b", ("c", "e")), (1, "", ("f",)), (0, "g.h", ()), (0, "j", ()), (0, "k", ("*",))]
+
+
+def test_module_names():
+    assert module_name(os.path.join("src", "pkg", "a.py"), "src") == ("pkg.a", False)
+    assert module_name(os.path.join("src", "pkg", "__init__.py"), "src") == ("pkg", True)
+    assert absolute_module("pkg.a", False, 1, "b") == "pkg.b"
+    assert absolute_module("pkg.a", False, 1, "") == "pkg"
+    assert absolute_module("pkg", True, 1, "b") == "pkg.b"
+    assert absolute_module("pkg.sub.a", False, 2, "b") == "pkg.b"
+    assert absolute_module("pkg.a", False, 2, "") is None
+    # Beyond the top-level package
+    assert absolute_module("pkg.a", False, 2, "x") is None
+    assert absolute_module("pkg.sub.c", False, 3, "x") is None
+    assert absolute_module("pkg", True, 2, "x") is None
+    assert absolute_module("a", False, 1, "x") is None
+    assert absolute_module("a", False, 1, "") is None
+    assert absolute_module("a", False, 0, "os") == "os"
+
+
+def test_graph(tmp_path):
+    project(tmp_path)
+    graph = ImportGraph(str(tmp_path))
+    changed, removed = graph.refresh()
+    assert len(changed) == 6 and removed == []
+
+    assert graph.imports_of("pkg.a") == ["os", "pkg", "pkg.b"]
+    assert graph.imports["pkg.b"] == {"pkg.c": {"helper", "other"}}
+    assert graph.imports_of("plain") == []
+    assert graph.importers_of("os") == ["pkg.a", "pkg.c"]
+    assert graph.importers_of("pkg.a") == ["pkg", "pkg.c"]
+    assert graph.dependencies("main") == ["os", "pkg", "pkg.a", "pkg.b", "pkg.c"]
+    assert graph.dependents("pkg.c") == ["main", "pkg", "pkg.a", "pkg.b"]
+    assert graph.cycles() == [["pkg", "pkg.a", "pkg.b", "pkg.c"]]
+
+
+def test_incremental_refresh(tmp_path):
+    project(tmp_path)
+    graph = ImportGraph(str(tmp_path))
+    graph.refresh()
+    assert graph.refresh() == ([], [])
+
+    write(tmp_path / "pkg" / "c.py", "def helper():\n    pass\n")
+    assert graph.refresh() == ([str(tmp_path / "pkg" / "c.py")], [])
+    assert graph.importers_of("pkg.a") == ["pkg"]
+    assert graph.importers_of("os") == ["pkg.a"]
+    # "from . import b" imports the package too
+    assert graph.cycles() == [["pkg", "pkg.a"]]
+
+    # A new module changes what "from . import d" imports
+    write(tmp_path / "pkg" / "b.py", "from . import d\n")
+    graph.refresh()
+    assert graph.imports_of("pkg.b") == ["pkg"]
+    write(tmp_path / "pkg" / "d.py", "from .b import x\n")
+    graph.refresh()
+    assert graph.imports_of("pkg.b") == ["pkg", "pkg.d"]
+    assert graph.cycles() == [["pkg", "pkg.a", "pkg.b", "pkg.d"]]
+
+    os.unlink(tmp_path / "pkg" / "d.py")
+    assert graph.refresh() == ([], [str(tmp_path / "pkg" / "d.py")])
+    assert graph.imports_of("pkg.b") == ["pkg"]
+    assert "pkg.d" not in graph.imports
+
+
+def test_parsing_errors(tmp_path):
+    write(tmp_path / "a.py", "import (\n")
+    graph = ImportGraph(str(tmp_path))
+    graph.refresh()
+    assert list(graph.errors) == [str(tmp_path / "a.py")]
+    assert graph.refresh() == ([], [])
+
+    write(tmp_path / "a.py", "import b\n")
+    graph.refresh()
+    assert graph.errors == {}
+    assert graph.imports_of("a") == ["b"]
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_parallel_parsing(tmp_path, max_workers):
+    for i in range(10):
+        write(tmp_path / f"m{i}.py", f"import m{(i + 1) % 10}\n")
+    graph = ImportGraph(str(tmp_path), max_workers=max_workers)
+    graph.refresh()
+    assert graph.imports_of("m3") == ["m4"]
+    assert graph.cycles() == [sorted(f"m{i}" for i in range(10))]
@@ -48,6 +48,20 @@ def test_indentation_import():
     assert red.targets.el_indentation == "    "
 
 
+def test_indentation_inline_import():
+    red = RedBaron("def f():\n    from a import (b,\n                   c)\n")
+    targets = red.find("fromimport").targets
+    assert targets.el_indentation == " " * len("    from a import (")
+    targets.append("d")
+    assert red.dumps() == "def f():\n    from a import (b,\n                   c, d)\n"
+
+
+def test_indentation_decorator_arguments():
+    red = RedBaron("class A:\n    @b\n    @c(d,\n       e)\n    def f(self):\n        pass\n")
+    call = red.find_all("decorator")[-1].find("call")
+    assert call.value.el_indentation == " " * len("    @c(")
+
+
 def test_indentation_root():
     red = RedBaron("pouet")
     assert red[0].indentation == ""
@@ -0,0 +1,120 @@
+import copy
+import copyreg
+import io
+import pickle
+import time
+
+from redbaron import RedBaron
+from redbaron.base_nodes import BaseNode
+from redbaron.pickling import Subtree
+
+code = """\
+@decorator
+def f(a, b=c):
+    # comment
+    if a:
+        return {a: [b, c]}
+    else:
+        pass
+"""
+
+
+def test_pickle_root():
+    red = RedBaron(code)
+    new = pickle.loads(pickle.dumps(red))
+    assert type(new) is RedBaron
+    assert new.dumps() == code
+    assert new.find("return").parent_find("def") is new.find("def")
+
+
+class _WholeStatePickler(pickle.Pickler):
+    "Pickle the nodes with all their attributes, like the default reduction"
+
+    def reducer_override(self, obj):
+        if isinstance(obj, BaseNode):
+            return copyreg.__newobj__, (type(obj),), obj.__dict__
+        return NotImplemented
+
+
+def _best_load_time(data):
+    best = None
+    for _ in range(5):
+        start = time.perf_counter()
+        pickle.loads(data)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def test_pickle_without_what_is_built_again():
+    red = RedBaron(code * 20)
+    # The default formatting and the rendered lists are built again when read
+    red.dumps()
+    whole = io.BytesIO()
+    _WholeStatePickler(whole, protocol=pickle.HIGHEST_PROTOCOL).dump(red)
+    data = pickle.dumps(red, protocol=pickle.HIGHEST_PROTOCOL)
+    assert len(data) * 2 < len(whole.getvalue())
+    assert _best_load_time(data) < _best_load_time(whole.getvalue())
+    new = pickle.loads(data)
+    assert new.dumps() == red.dumps()
+    new.find("def").value.append("return b")
+    assert new.find("def").dumps().endswith("        pass\n    return b\n")
+
+
+def test_pickle_root_keeps_newline():
+    red = RedBaron.from_bytes(b"a = b\r\n")
+    new = pickle.loads(pickle.dumps(red))
+    assert new.to_bytes() == b"a = b\r\n"
+
+
+def test_pickle_journaled_root_with_scope_tables():
+    red = RedBaron(code)
+    red.snapshot()
+    assert "a" in red.find("def").scope.bindings
+    new = pickle.loads(pickle.dumps(red))
+    assert new._journal is None
+    assert "_scope_table" not in new.find("def").__dict__
+    new.find("def").arguments[0].target.value = "z"
+    assert "z" in new.find("def").scope.bindings
+    new.find("def").value.append("return b")
+    assert new.dumps().endswith("        pass\n    return b\n")
+
+
+def test_pickle_node_in_its_tree():
+    red = RedBaron(code)
+    new = pickle.loads(pickle.dumps(red.find("return")))
+    assert new.root.dumps() == code
+    assert new.root.find("return") is new
+
+
+def test_deepcopy_copies_the_tree():
+    red = RedBaron(code)
+    node = red.find("if")
+    new = copy.deepcopy(node)
+    assert new.root is not red
+    assert new.root.dumps() == code
+    assert new.root.find("if") is new
+
+
+def test_copy_is_shallow():
+    red = RedBaron(code)
+    red.snapshot()
+    node = red.find("def")
+    new = copy.copy(node)
+    assert new.parent is node.parent
+    assert new.value is node.value
+    assert node.value.parent is node
+    assert copy.copy(red)._journal is None
+
+
+def test_pickle_subtree():
+    red = RedBaron(code)
+    node = red.find("dict")
+    data = pickle.dumps(Subtree(node))
+    assert len(data) * 2 < len(pickle.dumps(red))
+    subtree = pickle.loads(data)
+    assert subtree.node.parent is None
+    assert subtree.node.on_attribute is None
+    assert subtree.node.dumps() == node.dumps()
+    assert subtree.find_in(red) is node
+    assert node.parent is not None
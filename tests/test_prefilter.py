@@ -0,0 +1,149 @@
+import pytest
+
+from redbaron import RedBaron
+from redbaron.nodes import DefNode, NameNode
+from redbaron.prefilter import query_prefilter, type_needles
+
+code = """\
+@decorator
+class A(B):
+    def test_a(self, a=b):
+        return [a, 'b']
+
+async def helper(*args):
+    with a as b:
+        yield {a: b}
+"""
+
+queries = [
+    ("def",),
+    ("def", "test_a"),
+    ("def", "g:test_*"),
+    ("def", "g:*_a"),
+    ("def", "g:[ht]*"),
+    ("def", "re:test"),
+    ("def", ["helper", "other"]),
+    ("class", "A"),
+    (["def", "class"],),
+    ("re:(list|dict)",),
+    ("name", "b"),
+    ("string", "'b'"),
+    ("string", '"b"'),
+    ("with",),
+    ("while",),
+    ("return", "a"),
+]
+
+
+def test_type_needles():
+    assert type_needles(DefNode) == ("def", "(", ")", ":")
+    assert type_needles(NameNode) == ()
+
+
+@pytest.mark.parametrize("query", queries)
+def test_prefilter_agrees_with_find_all(query):
+    may_match = query_prefilter(*query)
+    if RedBaron(code).find_all(*query):
+        assert may_match is None or may_match(code)
+
+    for line in code.splitlines():
+        if may_match is not None and not may_match(line):
+            # Only rejected when nothing can be found
+            try:
+                assert not RedBaron(line.strip() + "\n").find_all(*query)
+            except Exception:  # pylint: disable=broad-except
+                pass
+
+
+def test_prefilter_rejects():
+    assert not query_prefilter("def", "g:test_*")("def helper():\n    pass\n")
+    assert not query_prefilter("while")(code)
+    assert not query_prefilter("def", name="other")(code)
+    assert query_prefilter("name") is None
+    assert query_prefilter("name", "re:a") is None
+
+
+def find_all_without_index(node, identifier, *args, **kwargs):
+    return [found for found in node._find_iter(identifier, *args, **kwargs) if found is not node]
+
+
+def assert_same_results(red):
+    for query in queries + [("name", "c"), ("def", "test_b")]:
+        assert red.find_all(*query) == find_all_without_index(red, *query)
+    assert red.find_all("def", name="g:*_b") == find_all_without_index(red, "def", name="g:*_b")
+
+
+def test_index_used_while_journaled():
+    red = RedBaron(code * 4)
+    red.snapshot()
+    assert_same_results(red)
+    index = red._token_index
+    assert index.subtrees
+    # Searching doesn't modify the tree
+    red.find_all("def", "test_a")
+    assert red._token_index is index
+
+
+def test_index_without_journal():
+    red = RedBaron(code * 4)
+    assert_same_results(red)
+    assert red._token_index.tokens(red.find("def"))[1] >= {"test_a"}
+    assert len(red.find_all("with")) == 4
+
+    red.find("def").value.append("with c: pass")
+    assert len(red.find_all("with")) == 5
+    red.find("def").name = "c"
+    assert_same_results(red)
+    red.find("return").value = "b"
+    assert len(red.find_all("list")) == 3
+    assert_same_results(red)
+
+
+def test_index_built_from_the_second_search():
+    red = RedBaron(code * 4)
+    red.find_all("def")
+    assert not red._token_index.subtrees and not red._watched
+    red.find_all("def")
+    assert red._token_index.subtrees and red.find("name")._watched
+    red.find("def", "helper").value[0].contexts[0].as_.value = "renamed"
+    assert len(red.find_all("name", "renamed")) == 1
+
+
+def test_modifications_only_drop_entries_of_ancestors():
+    red = RedBaron(code * 4)
+    red.find_all("def")
+    entries = red._token_index.subtrees
+    classes = red.find_all("class")
+    assert id(red) in entries and id(classes[0]) in entries and id(classes[3]) in entries
+
+    classes[0].value[0].value.append("del a")
+    assert id(red) not in entries and id(classes[0]) not in entries
+    assert id(classes[3]) in entries
+    assert len(red.find_all("del")) == 1
+
+
+def test_find_does_not_use_the_index():
+    red = RedBaron(code * 4)
+    assert red.find("def", "helper").name == "helper"
+    assert "_token_index" not in red.__dict__
+    red.find_all("def")
+    red.find("def", "helper").value.append("with c: pass")
+    assert red.find("with") is red.find_all("with")[0]
+    assert len(red.find_all("with")) == 5
+
+
+def test_index_follows_modifications():
+    red = RedBaron(code * 4)
+    snapshot = red.snapshot()
+    assert red.find_all("name", "c") == []
+
+    red.find("def").arguments[0].target.value = "c"
+    assert len(red.find_all("name", "c")) == 1
+    red.find("def").value.append("test_b(c)")
+    assert len(red.find_all("name", "c")) == 2
+    red.find("class").name = "test_b"
+    assert_same_results(red)
+
+    red.restore(snapshot)
+    assert red.find_all("name", "c") == []
+    assert_same_results(red)
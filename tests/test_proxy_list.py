@@ -1165,6 +1165,24 @@ def test_line_proxy_correctly_indent_code_block():
     assert red.dumps() == "while True:\n    pass\n    if a:\n        pass\n\n"
 
 
+def test_line_proxy_extend_parses_code_at_once(monkeypatch):
+    red = RedBaron("class A:\n    pass\n")
+    parse = redbaron.node_mixin.baron.parse
+    calls = []
+    monkeypatch.setattr(redbaron.node_mixin.baron, "parse", lambda code: calls.append(code) or parse(code))
+    red[0].extend(["def f(self):\n    return self\n", "\n", "def g(self):\n    pass\n"])
+    assert len(calls) == 1
+    assert red.dumps() == (
+        "class A:\n    pass\n    def f(self):\n        return self\n\n    def g(self):\n        pass\n"
+    )
+
+
+def test_line_proxy_extend_inline_code_block():
+    red = RedBaron("while a: pass\n")
+    red[0].extend(["b\n", "c\n"])
+    assert [x.dumps() for x in red[0]] == ["pass", "b", "c"]
+
+
 def test_root_as_line_proxy_list_len():
     red = RedBaron("a\nb\nc\n")
     assert len(red) == 3
@@ -1244,6 +1262,14 @@ def test_root_as_line_proxy_list_extend():
     assert red.dumps() == "\n\na\nb\nc\nzob\n"
 
 
+def test_decorators_append_same_decorator():
+    red = RedBaron("def f():\n    pass\ndef g():\n    pass\n")
+    for def_node in red.find_all("def"):
+        def_node.decorators.append("@staticmethod")
+    red[0].decorators[0].value = "classmethod"
+    assert red.dumps() == "@classmethod\ndef f():\n    pass\n@staticmethod\ndef g():\n    pass\n"
+
+
 def test_regression_first_method_of_a_class_decorators_append():
     red = RedBaron("class A:\n    def foo():\n        pass")
     red.find("def").decorators.append("@staticmethod")
@@ -1327,3 +1353,23 @@ def test_comma_proxy_clear():
     comma_proxy_list.clear()
     assert not comma_proxy_list._data
     assert not comma_proxy_list.data
+
+
+def test_comma_proxy_list_reformat_keeps_lines():
+    red = RedBaron("x = [a,\n     b, c,\n     d]\n")
+    comma_proxy_list = red.find("list").value
+    comma_proxy_list.append("e")
+    assert red.dumps() == "x = [a,\n     b, c,\n     d, e]\n"
+    assert [el.on_new_line for el in comma_proxy_list] == [False, True, False, True, False]
+    assert [on_new_line for _, on_new_line in comma_proxy_list._iter_on_new_line()] == [False, True, False, True, False]
+
+
+def test_make_separator():
+    comma_proxy_list = RedBaron("[a, b]")[0].value
+    first, second = comma_proxy_list.make_separator(), comma_proxy_list.make_separator()
+    assert first is not second
+    assert first.parent is comma_proxy_list
+    assert first.dumps() == ", "
+    first.second_formatting = "  "
+    assert second.dumps() == comma_proxy_list.make_separator().dumps() == ", "
+    assert comma_proxy_list.make_separator(new_line=True).dumps() == ",\n"
@@ -0,0 +1,170 @@
+import pytest
+
+from redbaron import RedBaron
+
+code = """\
+import os
+from m import a as b, c
+x = y
+
+def f(a, b=x, *args):
+    def h():
+        nonlocal a
+        a = b
+        return [a for q in args if q]
+    return lambda z=b: z + x + a
+
+class C(x):
+    def m(self, x):
+        return x
+
+f(a=x, b=c)
+o.x = x
+"""
+
+
+def test_rename_global():
+    red = RedBaron(code)
+    renamed = red.rename(red.find("assignment").target, "w")
+    assert len(renamed) == 6
+    assert all(node.value == "w" for node in renamed)
+    assert red.dumps() == code.replace("x = y", "w = y").replace("b=x", "b=w").replace("z + x", "z + w").replace(
+        "C(x)", "C(w)"
+    ).replace("a=x", "a=w").replace("o.x = x", "o.x = w")
+
+
+def test_rename_argument():
+    red = RedBaron(code)
+    red.rename(red.find("def").arguments[0].target, "first")
+    assert red.dumps() == code.replace("f(a,", "f(first,").replace("nonlocal a", "nonlocal first").replace(
+        "a = b", "first = b"
+    ).replace("[a for", "[first for").replace("+ a\n", "+ first\n").replace("f(a=x", "f(first=x")
+
+
+def test_rename_from_a_use():
+    red = RedBaron(code)
+    # The argument of the method shadows the global
+    red.rename(red.find("def", "m").value[0].value, "value")
+    assert "\n    def m(self, value):\n        return value\n" in red.dumps()
+    assert red.find("assignment").target.value == "x"
+
+
+def test_rename_def_and_imports():
+    red = RedBaron(code)
+    red.rename(red.find("def"), "g")
+    red.rename(red[0].value[0], "operating_system")
+    red.rename(red[1].targets[0], "a")
+    red.rename(red[1].targets[1], "d")
+    assert red.dumps().startswith("import os as operating_system\nfrom m import a, c as d\n")
+    assert "\ndef g(a, b=x, *args):\n" in red.dumps()
+    assert "\ng(a=x, b=d)\n" in red.dumps()
+
+
+@pytest.mark.parametrize(
+    "name, new_name",
+    [
+        # Already bound, read or declared where the variable is
+        ("x", "y"),
+        ("x", "f"),
+        ("x", "a"),
+        ("a", "b"),
+        # Not a name
+        ("x", "class"),
+        ("x", "a b"),
+    ],
+)
+def test_rename_conflicts(name, new_name):
+    red = RedBaron(code)
+    with pytest.raises(ValueError):
+        red.rename(red.find("name", name), new_name)
+    assert red.dumps() == code
+
+
+def test_rename_without_conflict():
+    red = RedBaron(code)
+    # Only bound in scopes where x isn't used
+    red.rename(red.find("name", "x"), "q")
+    assert red.dumps().startswith("import os\nfrom m import a as b, c\nq = y\n")
+    assert "\nclass C(q):\n    def m(self, x):\n        return x\n" in red.dumps()
+
+
+def test_rename_argument_of_function_used_as_a_value():
+    red = RedBaron("def f(k):\n    return k\n\ng = f\nprint(f)\nf(k=a)\n")
+    red.rename(red.find("def").arguments[0].target, "j")
+    assert red.dumps() == "def f(j):\n    return j\n\ng = f\nprint(f)\nf(j=a)\n"
+
+
+@pytest.mark.parametrize("name, new_name", [("x", "w"), ("c", "y")])
+def test_rename_read_in_fstring(name, new_name):
+    source = "x = a\nc = b\nprint(f'{x!r:>{y}}')\n"
+    red = RedBaron(source)
+    with pytest.raises(ValueError, match="f'"):
+        red.rename(red.find("name", name), new_name)
+    assert red.dumps() == source
+
+
+def test_rename_with_escaped_braces_in_fstring():
+    red = RedBaron("x = a\nprint(f'{{x}}')\n")
+    red.rename(red.find("name", "x"), "w")
+    assert red.dumps() == "w = a\nprint(f'{{x}}')\n"
+
+
+def test_rename_argument_and_import_nodes():
+    red = RedBaron(code)
+    red.rename(red.find("def").arguments[0], "first")
+    red.rename(red.find("def").arguments[2], "rest")
+    red.rename(red[0], "operating_system")
+    assert red.dumps().startswith("import os as operating_system\n")
+    assert "\ndef f(first, b=x, *rest):\n" in red.dumps()
+    with pytest.raises(ValueError, match="several names"):
+        red.rename(red[1], "z")
+
+
+@pytest.mark.parametrize(
+    "source, path, new_name",
+    [
+        # The read of the class body is of the module variable
+        ("x = a\nclass C:\n    x = x\n", ("name", "x"), "z"),
+        ("x = a\nclass C:\n    x = x\n", ("class",), "z"),
+        ("x = a\nclass C:\n    y = y\n", ("name", "x"), "y"),
+    ],
+)
+def test_rename_read_in_class_body_binding_it(source, path, new_name):
+    red = RedBaron(source)
+    binding = red.find(*path)
+    if path == ("class",):
+        binding = binding.value[0].target
+    with pytest.raises(ValueError, match="class or of the module"):
+        red.rename(binding, new_name)
+    assert red.dumps() == source
+
+
+def test_rename_class_variable_read_after_its_binding():
+    red = RedBaron("class C:\n    x = a\n    y = x\n")
+    red.rename(red.find("name", "x"), "w")
+    assert red.dumps() == "class C:\n    w = a\n    y = w\n"
+
+
+def test_rename_invalid_binding():
+    red = RedBaron(code)
+    with pytest.raises(ValueError):
+        red.rename(red.find("name", "os"), "z")
+    with pytest.raises(ValueError):
+        red.rename(red.find("return"), "z")
+    package = RedBaron("import a.b\n")
+    with pytest.raises(ValueError, match="binds a package"):
+        package.rename(package[0].value[0], "z")
+    with pytest.raises(ValueError, match="another tree"):
+        red.rename(RedBaron("a = b").find("name"), "z")
+
+
+def test_rename_journaled():
+    red = RedBaron(code)
+    snapshot = red.snapshot()
+    red.rename(red.find("assignment").target, "w")
+    assert red.find("name", "x") is not None
+    assert red.find("assignment").target.value == "w"
+    red.restore(snapshot)
+    assert red.dumps() == code
+    red.rename(red.find("assignment").target, "v")
+    assert red.find("class").inherit_from[0].value == "v"
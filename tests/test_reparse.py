@@ -0,0 +1,128 @@
+"""Tests RedBaron.reparse_range()"""
+
+# pylint: disable=redefined-outer-name
+import baron
+import pytest
+
+from redbaron import RedBaron
+
+CODE = """\
+import os
+
+
+def fun(a, b=c):
+    x = [a, b]
+    if x:
+        y = x
+    else:
+        y = a
+    return {a: b}
+
+
+class A(B):
+    def meth(self):
+        pass
+"""
+
+
+@pytest.fixture
+def red():
+    return RedBaron(CODE)
+
+
+def position(code, text, after=False):
+    "(line, column) of text in code"
+    offset = code.index(text) + (len(text) if after else 0)
+    return code.count("\n", 0, offset) + 1, offset - code.rfind("\n", 0, offset)
+
+
+def edit(red, old, new):
+    code = red.dumps()
+    start = position(code, old)
+    end = position(code, old, after=True)
+    nodes = red.reparse_range(start, end, new)
+    expected = code.replace(old, new, 1)
+    assert red.dumps() == expected
+    assert red.fst() == RedBaron(expected).fst()
+    return nodes
+
+
+def test_reparse_statement_keeps_other_nodes(red):
+    fun, klass = red.find("def"), red.find("class")
+    if_node = red.find("if")
+    nodes = edit(red, "x = [a, b]", "x = [a, b, c]")
+    assert [node.dumps() for node in nodes] == ["    x = [a, b, c]"]
+    assert red.find("def") is fun
+    assert red.find("class") is klass
+    assert red.find("if") is if_node
+    assert fun.value[0] is nodes[0]
+
+
+def test_reparse_nested_block(red):
+    fun = red.find("def")
+    return_node = fun.value[-1]
+    nodes = edit(red, "y = a", "y = b\n        z = y")
+    assert [node.dumps() for node in nodes] == ["        y = b", "        z = y"]
+    assert fun.value[-1] is return_node
+    assert red.find("else").value[1] is nodes[1]
+
+
+def test_reparse_header_of_compound_statement(red):
+    klass = red.find("class")
+    edit(red, "if x:", "while x:")
+    assert red.find("while").value[0].dumps() == "        y = x"
+    assert red.find("class") is klass
+
+
+def test_reparse_insertion(red):
+    code = red.dumps()
+    line = position(code, "    return")[0]
+    nodes = red.reparse_range((line, 1), (line, 1), "    del x\n")
+    assert nodes[0].dumps() == "    del x"
+    assert red.find("del") is nodes[0]
+    assert nodes[0].next is red.find("return")
+    assert red.dumps() == code.replace("    return", "    del x\n    return")
+
+
+def test_reparse_deletion_of_lines(red):
+    code = red.dumps()
+    start = position(code, "    if x:")
+    end = position(code, "    return")
+    red.reparse_range(start, end, "")
+    assert red.dumps() == code[: code.index("    if x:")] + code[code.index("    return") :]
+    assert red.find("if") is None
+
+
+def test_reparse_joined_lines(red):
+    code = red.dumps()
+    start = position(code, "\n    return")
+    end = position(code, "return")
+    red.reparse_range(start, end, "; ")
+    assert red.dumps() == code.replace("\n    return", "; return")
+    assert red.find("return").indentation == ""
+
+
+def test_reparse_dedent_moves_to_enclosing_block(red):
+    edit(red, "    def meth(self):\n        pass\n", "    def meth(self):\n        pass\nx = y\n")
+    assert red[-1].dumps() == "x = y"
+
+
+def test_reparse_leading_lines():
+    red = RedBaron("\n\nx = y\n")
+    red.reparse_range((1, 1), (2, 1), "import os")
+    assert red.dumps() == "import os\nx = y\n"
+
+
+def test_reparse_invalid_code_leaves_tree_unchanged(red):
+    code = red.dumps()
+    line = position(code, "    return")[0]
+    with pytest.raises(baron.BaronError):
+        red.reparse_range((line, 5), (line, 11), "(")
+    assert red.dumps() == code
+
+
+def test_reparse_invalid_positions(red):
+    with pytest.raises(ValueError):
+        red.reparse_range((3, 1), (1, 1), "")
+    with pytest.raises(ValueError):
+        red.reparse_range((1, 50), (1, 50), "")
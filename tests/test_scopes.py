@@ -0,0 +1,168 @@
+from redbaron import RedBaron
+
+code = """\
+import os.path as p, sys
+from m import a as b, c
+x = y
+
+@decorator
+def f(a, b=x, *args, **kw):
+    global g
+    g = a + b
+    def h():
+        nonlocal a
+        a = b
+        return [a for q in args if q]
+    return lambda z=b: z + x
+
+class C(x):
+    y = x
+    def m(self):
+        return y
+
+for i, (j, k) in e:
+    with o as (s, t):
+        pass
+
+try:
+    pass
+except E as err:
+    x += y
+
+o.attr = f(kw=x)
+"""
+
+
+def binding_types(name_node):
+    return [node.baron_type for node in name_node.find_name_binding()]
+
+
+def names(red, value):
+    return red.find_all("name", value)
+
+
+def test_module_bindings():
+    red = RedBaron(code)
+    scope = red.scope
+    assert sorted(scope.bindings) == ["C", "b", "c", "err", "f", "i", "j", "k", "p", "s", "sys", "t", "x"]
+    assert [node.baron_type for node in scope.bindings["p"]] == ["dotted_as_name"]
+    assert [node.baron_type for node in scope.bindings["b"]] == ["name_as_name"]
+    assert scope.bindings["f"] == [red.find("def", "f")]
+    assert scope.bindings["C"] == [red.find("class")]
+    assert "g" not in scope.bindings
+    assert sorted(scope.uses) == ["E", "decorator", "e", "f", "o", "x", "y"]
+
+
+def test_function_scopes():
+    red = RedBaron(code)
+    f = red.find("def", "f")
+    assert sorted(f.scope.bindings) == ["a", "args", "b", "g", "h", "kw"]
+    assert f.scope.global_names == {"g"}
+    assert f.find("def", "h").scope.nonlocal_names == {"a"}
+    assert f.scope.parent.node is red
+    assert f.find("lambda").scope.parent.node is f
+    assert sorted(f.find("list_comprehension").scope.bindings) == ["q"]
+
+
+def test_find_name_binding():
+    red = RedBaron(code)
+    x_uses = names(red, "x")
+    assert [name.path().to_baron_path() for name in x_uses[0].find_name_binding()] == [
+        ["value", 4, "target"],
+        ["value", 11, "excepts", 0, "value", 2, "target"],
+    ]
+    # The default value is evaluated in the module, the lambda reads the module too
+    assert all(binding_types(name) == ["name", "name"] for name in x_uses)
+
+    # Bound in the function declaring it global
+    assert [binding_types(name) for name in names(red, "g")] == [["name"], ["name"]]
+    # Nonlocal binding in the nested function
+    a_uses = [name for name in names(red, "a") if name.on_attribute != "target" or name.parent.type == "assignment"]
+    assert all(len(name.find_name_binding()) == 2 for name in a_uses)
+    # Class bodies aren't visible from their methods
+    assert names(red, "y")[-1].find_name_binding() == []
+    assert binding_types(names(red, "y")[1]) == ["name"]
+    assert binding_types(names(red, "f")[0]) == ["def"]
+
+    # Not variables
+    assert names(red, "attr")[0].find_name_binding() == []
+    assert names(red, "kw")[-1].find_name_binding() == []
+    assert names(red, "os")[0].find_name_binding() == []
+
+
+def test_find_name_uses():
+    red = RedBaron(code)
+    b = red.find("def", "f").arguments[1].target
+    # Scope by scope: f, where the lambda default value is, then h
+    assert [name.path().to_baron_path()[-2:] for name in b.find_name_uses()] == [
+        ["value", "second"],
+        [0, "value"],
+        [5, "value"],
+    ]
+    assert len(red.scope.find_uses("y")) == 3
+    assert red.scope.find_uses("print") == []
+    assert red.scope.find_bindings("g") == [names(red, "g")[1]]
+
+
+def test_tables_are_kept():
+    red = RedBaron(code)
+    f = red.find("def", "f")
+    scope = red.scope
+    assert red.scope is scope
+    assert f.scope is f.scope
+
+
+def test_modification_drops_the_scope_tables():
+    red = RedBaron(code)
+    f = red.find("def", "f")
+    module_scope, f_scope = red.scope, f.scope
+    h_scope = f.find("def", "h").scope
+
+    f.value.append("w = kw")
+    assert "w" in f.scope.bindings
+    assert f.scope is not f_scope
+    # The enclosing and the nested scopes are kept
+    assert red.scope is module_scope
+    assert f.find("def", "h").scope is h_scope
+
+    f.arguments[1].value = "y"
+    assert len(red.scope.uses["x"]) == 3
+    assert len(red.scope.find_uses("y")) == 4
+
+    red.find("class").value.append("q = x")
+    assert "q" in red.find("class").scope.bindings
+
+
+def test_name_modification_drops_the_scope_table():
+    red = RedBaron(code)
+    assert "w" not in red.scope.bindings
+    red.find("assignment").target.value = "w"
+    assert "w" in red.scope.bindings
+    assert len(red.scope.bindings["x"]) == 1
+
+    red.find("def", "f").name = "renamed"
+    assert "renamed" in red.scope.bindings
+
+
+def test_scope_tables_only_watch_their_tree():
+    red, other = RedBaron(code), RedBaron(code)
+    assert not red.find("name")._watched
+    assert "h" in red.find("def", "f").scope.bindings
+    assert red.find("name")._watched
+    assert not other.find("name")._watched
+
+
+def test_scope_tables_of_journaled_tree():
+    red = RedBaron(code)
+    snapshot = red.snapshot()
+    f = red.find("def", "f")
+    assert "w" not in f.scope.bindings
+
+    f.value.append("w = kw")
+    names(red, "kw")[0].value = "kwargs"
+    assert "w" in f.scope.bindings
+    assert "kwargs" in f.scope.bindings
+
+    red.restore(snapshot)
+    assert "w" not in f.scope.bindings
+    assert "kwargs" not in f.scope.bindings
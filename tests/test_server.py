@@ -0,0 +1,135 @@
+import os
+import threading
+
+import pytest
+
+from redbaron import RedBaron
+from redbaron.server import CodeBase, QueryServer, main, query
+
+code = """\
+class A:
+    def test_a(self):
+        pass
+
+    def helper(self):
+        return [a, b]
+
+def test_b():
+    return {a: b}
+"""
+
+
+def write(path, content):
+    path.write_text(content)
+    # Make sure the modification is seen even within the same clock tick
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_find_all_like_redbaron(tmp_path):
+    write(tmp_path / "a.py", code)
+    code_base = CodeBase(str(tmp_path))
+    code_base.refresh()
+
+    red = RedBaron(code)
+    for query_args in (("def",), ("def", "g:test_*"), (["def", "class"],), ("name",), ("re:(list|dict)",)):
+        found = [node.dumps() for _, node in code_base.find_all(*query_args)]
+        assert found == [node.dumps() for node in red.find_all(*query_args)]
+
+
+def test_positions(tmp_path):
+    write(tmp_path / "a.py", code)
+    code_base = CodeBase(str(tmp_path))
+    code_base.refresh()
+
+    for indexed, node in code_base.find_all(["def", "return", "name"]):
+        box = node.box.top_left
+        assert indexed.position(node) == (box.line, box.column)
+
+
+def test_refresh_only_changed_files(tmp_path):
+    write(tmp_path / "a.py", code)
+    write(tmp_path / "b.py", "def f():\n    pass\n")
+    (tmp_path / ".hidden").mkdir()
+    write(tmp_path / ".hidden" / "c.py", "def g():\n    pass\n")
+    code_base = CodeBase(str(tmp_path))
+    assert sorted(code_base.refresh()[0]) == [str(tmp_path / "a.py"), str(tmp_path / "b.py")]
+    first = code_base.files[str(tmp_path / "a.py")]
+
+    write(tmp_path / "b.py", "def h():\n    pass\n")
+    assert code_base.refresh() == ([str(tmp_path / "b.py")], [])
+    assert code_base.files[str(tmp_path / "a.py")] is first
+    assert [node.name for _, node in code_base.find_all("def", "h")] == ["h"]
+
+    os.unlink(tmp_path / "b.py")
+    assert code_base.refresh() == ([], [str(tmp_path / "b.py")])
+    assert code_base.find_all("def", "h") == []
+
+
+def test_parsing_errors(tmp_path):
+    write(tmp_path / "a.py", "def (:\n")
+    code_base = CodeBase(str(tmp_path))
+    code_base.refresh()
+    assert list(code_base.stats()["errors"]) == [str(tmp_path / "a.py")]
+    assert code_base.refresh() == ([], [])
+
+    write(tmp_path / "a.py", code)
+    code_base.refresh()
+    assert code_base.stats()["errors"] == {}
+
+
+def test_server(tmp_path):
+    write(tmp_path / "a.py", code)
+    code_base = CodeBase(str(tmp_path))
+    code_base.refresh()
+    socket_path = str(tmp_path / "s")
+
+    with QueryServer(socket_path, code_base) as server:
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            response = query(socket_path, {"command": "find_all", "identifier": "def", "args": ["g:test_*"]})
+            assert response == {
+                "results": [
+                    {"path": str(tmp_path / "a.py"), "line": 2, "column": 5, "type": "def"},
+                    {"path": str(tmp_path / "a.py"), "line": 8, "column": 1, "type": "def"},
+                ]
+            }
+
+            response = query(socket_path, {"command": "find_all", "identifier": "list", "code": True})
+            assert response["results"][0]["code"] == "[a, b]"
+
+            assert query(socket_path, {"command": "stats"})["files"] == 1
+            assert "error" in query(socket_path, {"command": "unknown"})
+        finally:
+            server.shutdown()
+            thread.join()
+
+
+def test_watch_keeps_polling_after_errors(tmp_path, caplog):
+    code_base = CodeBase(str(tmp_path))
+    calls = []
+    done = threading.Event()
+
+    def refresh():
+        calls.append(None)
+        if len(calls) == 1:
+            raise OSError("gone")
+        done.set()
+        return [], []
+
+    code_base.refresh = refresh
+    stop = code_base.watch(interval=0.01)
+    try:
+        assert done.wait(5)
+    finally:
+        stop.set()
+    assert "Refreshing" in caplog.text
+
+
+def test_main_keeps_files_that_are_not_sockets(tmp_path):
+    path = tmp_path / "not_a_socket"
+    path.write_text("keep me")
+    with pytest.raises(SystemExit):
+        main([str(tmp_path), "--socket", str(path)])
+    assert path.read_text() == "keep me"
@@ -1595,6 +1595,14 @@ def test_else_while():
     assert red.dumps() == "while True:\n    pass\nelse:\n    pass\n"
 
 
+def test_else_several_nodes():
+    red = RedBaron("while a:\n    pass\nwhile b:\n    pass\n")
+    red[0].else_ = "\nc\n"
+    red[1].else_ = "\nd\n"
+    assert red[0].else_ is not red[1].else_
+    assert red.dumps() == "while a:\n    pass\nelse:\n    c\nwhile b:\n    pass\nelse:\n    d\n"
+
+
 def test_else_for_inline():
     red = RedBaron("for a in b:\n    pass\n")
     red[0].else_ = "pass\n"
@@ -0,0 +1,165 @@
+"""Tests snapshot() and restore() on RedBaron"""
+
+# pylint: disable=redefined-outer-name
+import copy
+import pickle
+
+import pytest
+
+from redbaron import RedBaron
+from redbaron.base_nodes import BaseNode
+
+CODE = """\
+import os
+from a import (b,
+    c)
+
+
+@deco
+def fun(a, b=c):
+    x = [a, b]
+    for y in x:
+        pass
+    return {a: b}
+
+
+class A(B):
+    def meth(self):
+        pass
+"""
+
+
+@pytest.fixture
+def red():
+    red = RedBaron(CODE)
+    yield red
+    red.drop_snapshots()
+
+
+def test_restore_attributes(red):
+    snapshot = red.snapshot()
+    red.find("def").name = "renamed"
+    red.find("class").inherit_from = "C, D"
+    red.find("for").else_ = "pass"
+    red.restore(snapshot)
+    assert red.dumps() == CODE
+
+
+def test_restore_lists(red):
+    snapshot = red.snapshot()
+    fun = red.find("def")
+    fun.value.append("z = y")
+    fun.value[0].value.append("c")
+    fun.arguments.append("d")
+    fun.decorators.append("@other")
+    red.find("from_import").targets.append("e")
+    del red.find("class").value[0]
+    red[0].replace("import sys")
+    red.restore(snapshot)
+    assert red.dumps() == CODE
+
+
+def test_restore_keeps_nodes_identity(red):
+    fun = red.find("def")
+    first_statement = fun.value[0]
+    snapshot = red.snapshot()
+    fun.value.pop(0)
+    red.restore(snapshot)
+    assert red.find("def") is fun
+    assert fun.value[0] is first_statement
+    assert first_statement.parent is fun.value
+
+
+def test_tree_still_editable_after_restore(red):
+    snapshot = red.snapshot()
+    red.find("def").value.append("z = y")
+    red.restore(snapshot)
+    red.find("def").name = "other"
+    assert red.find("def").dumps().startswith("@deco\ndef other(")
+
+
+def test_nested_snapshots(red):
+    first = red.snapshot()
+    red.find("def").name = "second"
+    second = red.snapshot()
+    red.find("def").name = "third"
+    red.restore(second)
+    assert red.find("def").name == "second"
+    red.restore(first)
+    assert red.dumps() == CODE
+
+    with pytest.raises(ValueError):
+        red.restore(second)
+
+
+def test_restore_other_tree_snapshot(red):
+    other = RedBaron("a")
+    snapshot = other.snapshot()
+    red.snapshot()
+    with pytest.raises(ValueError):
+        red.restore(snapshot)
+    other.drop_snapshots()
+
+
+def test_journal_hook_only_on_journaled_tree(red):
+    other = RedBaron("a = b\n")
+    fun_class = type(red.find("def"))
+    red.snapshot()
+    assert type(red.find("def")) is not fun_class
+    assert type(red.find("def")).__name__ == fun_class.__name__
+    assert "__setattr__" not in BaseNode.__dict__
+    assert not other.find("assignment")._watched
+
+    red.drop_snapshots()
+    assert red._journal is None
+    red.find("name").value = "c"
+    assert red.find("name").value == "c"
+
+
+def test_inserted_nodes_are_journaled(red):
+    other = RedBaron("def other():\n    a = b\n")
+    inserted = other.find("def")
+    red.snapshot()
+    red.append(inserted)
+    snapshot = red.snapshot()
+    assert inserted._watched and inserted.value[0]._watched
+    inserted.value[0].target = "c"
+    assert red.find("def", "other").value[0].target.value == "c"
+    red.restore(snapshot)
+    assert red.find("def", "other").value[0].target.value == "a"
+
+
+def test_journaled_tree_pickled_and_copied_unjournaled(red):
+    red.snapshot()
+    for new in (pickle.loads(pickle.dumps(red)), copy.deepcopy(red)):
+        assert type(new) is RedBaron
+        assert not new.find("def")._watched
+        assert new.dumps() == CODE
+
+
+def test_lists_journaled_as_deltas(red):
+    body = red.find("def").value
+    length = len(body)
+    first = red.snapshot()
+    body.append("z = y")
+    second = red.snapshot()
+    body.insert(1, "w = x")
+    red.snapshot()
+    # Only where the statements were inserted is kept
+    records = [record for record in red._journal.records if record[0] is body and record[1] is None]
+    assert [splices.splices for _, _, splices in records] == [
+        [("data", 13, [], 3), ("_data", 5, [], 1)],
+        [("data", 4, [], 3), ("_data", 1, [], 1)],
+    ]
+
+    code = body.dumps()
+    third = red.snapshot()
+    del body[0]
+    body.reverse()
+    red.restore(third)
+    assert body.dumps() == code
+    red.restore(second)
+    assert body[-1].target.value == "z"
+    assert len(body) == length + 1
+    red.restore(first)
+    assert red.dumps() == CODE
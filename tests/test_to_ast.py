@@ -0,0 +1,84 @@
+import ast
+
+import pytest
+
+from redbaron import RedBaron
+
+code = """\
+import os
+from . import a as b
+
+
+@decorator.attribute(argument)
+class A(Base, metaclass=Meta):
+    def method(self, a, *args, b=c, **kwargs) -> None:
+        "docstring"
+        if not a and b or c < d <= e:
+            x = a - b - c * d ** -e
+        elif a is not b:
+            del a, b[c:d]
+        else:
+            raise Error from error
+        return [i for i in a if i], {k: v for k, v in b}, f(*a, b=c, **d)
+
+    async def other(self):
+        with a as b, c:
+            yield (a, b)
+        try:
+            await a
+        except Error as e:
+            pass
+        finally:
+            x += lambda a, *b: a
+"""
+
+
+def dump(tree):
+    return ast.dump(tree, include_attributes=True)
+
+
+def test_to_ast_root():
+    red = RedBaron(code)
+    assert dump(red.to_ast()) == dump(ast.parse(code))
+
+
+def test_to_ast_compile():
+    red = RedBaron("x = 'a' 'b'\nassert x == 'ab'\n")
+    namespace = {}
+    exec(compile(red.to_ast(), "<test>", "exec"), namespace)
+    assert namespace["x"] == "ab"
+
+
+def test_to_ast_positions_in_tree():
+    red = RedBaron(code)
+    statement = red.find("elif").value[0]
+    expected = ast.parse(code).body[2].body[0].body[1].orelse[0].body[0]
+    assert dump(statement.to_ast()) == dump(expected)
+
+
+def test_to_ast_expression():
+    red = RedBaron("a = b.c(d)[e]")
+    assert dump(red.find("atomtrailers").to_ast()) == dump(ast.parse("a = b.c(d)[e]").body[0].value)
+
+
+def test_to_ast_unicode_columns():
+    red = RedBaron("x = 'é' + y")
+    assert red.find("name", "y").to_ast().col_offset == len("x = 'é' + ".encode())
+
+
+def test_to_ast_not_converted_nodes():
+    red = RedBaron("x = f'{a}' + print(b)")
+    assert dump(red.to_ast()) == dump(ast.parse("x = f'{a}' + print(b)"))
+
+
+def test_to_ast_after_modification():
+    red = RedBaron("def f():\n    return a\n")
+    red.find("def").value.insert(0, "b = a")
+    red.find("return").value = "b"
+    assert dump(red.to_ast()) == dump(ast.parse(red.dumps()))
+
+
+def test_to_ast_formatting_raise():
+    red = RedBaron("a, b")
+    with pytest.raises(ValueError):
+        red.find("comma").to_ast()
@@ -122,3 +122,42 @@ def test_to_python_name_node_otherwise_raise():
     with pytest.raises(ValueError) as exc_info:
         red[0].to_python()
     assert exc_info.value.message.startswith("to_python method only works on")
+
+
+def test_to_python_nested_containers():
+    red = RedBaron("{'a': ['b', ('c', None)], 'd': {'e'}, 'f': 'g' 'h'}")
+    assert red[0].to_python() == {"a": ["b", ("c", None)], "d": {"e"}, "f": "gh"}
+
+
+def test_to_python_set_node():
+    red = RedBaron("{'a', 'b'}")
+    assert red[0].to_python() == {"a", "b"}
+
+
+def test_to_python_after_modification():
+    red = RedBaron("['a\\nb', c]")
+    string = red.find("string")
+    assert string.to_python() == "a\nb"
+    string.value = "'c\\nd'"
+    red[0].value[1] = "True"
+    assert red[0].to_python() == ["c\nd", True]
+
+
+def test_to_python_cache_dropped_by_modifications():
+    red = RedBaron("['a\\nb', c]")
+    string = red.find("string")
+    assert string.to_python() == "a\nb"
+    # Only the string is watched for its cache
+    assert string._watched and not red._watched
+    snapshot = red.snapshot()
+    string.value = "'c\\nd'"
+    assert string.to_python() == "c\nd"
+    red.restore(snapshot)
+    assert string.to_python() == "a\nb"
+
+
+def test_to_python_container_otherwise_raise():
+    red = RedBaron("['a', foo]")
+    with pytest.raises(ValueError) as exc_info:
+        red[0].to_python()
+    assert exc_info.value.message.startswith("to_python method only works on")
@@ -6,6 +6,7 @@ from redbaron.utils import (
     squash_successive_duplicates,
     strip_comments,
     truncate,
+    truncate_chunks,
 )
 
 
@@ -86,6 +87,17 @@ def test_truncate():
     assert truncate("12345678901234567890", 10) == "123456...0"
 
 
+def test_truncate_chunks():
+    assert truncate_chunks(["12", "34"], 4) == "1234"
+    assert truncate_chunks(["1234", "5678", "90"], 5) == "12..."
+
+    def chunks():
+        yield "12345678"
+        raise AssertionError("should not be consumed")
+
+    assert truncate_chunks(chunks(), 5) == "12..."
+
+
 def test_squash_successive_duplicates():
     assert list(squash_successive_duplicates([1, 2, 3, 3, 4])) == [1, 2, 3, 4]
 